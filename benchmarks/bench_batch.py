@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Generation of many boards at once in a shared memory batch (core/Batch.py) against one board at a time, and the
+handoff of the boards to worker processes: pickled list boards against workers that attach to the batch.
+
+Run from the root of the project: python3 -m benchmarks.bench_batch [boards]
+"""
+
+from random import Random
+from time import perf_counter
+import sys
+
+from core.Engine import MinesweeperBoard
+from core.Batch import BoardBatch, map_batch
+from core.Compact import BOMB
+
+BOARDS = 20000
+DIMENSIONS = (16, 30)
+PERCENT = 20.6
+WORKERS = 4
+
+
+def count_zeros(grids, start) -> int:
+    return int((grids == 0).sum())
+
+
+def count_list_zeros(boards) -> int:
+    return sum(row.count(0) for board in boards for row in board)
+
+
+def main(argv):
+    boards = int(argv[0]) if argv else BOARDS
+    rng = Random(1)
+
+    for compact in (False, True):
+        start = perf_counter()
+        for i in range(boards):
+            MinesweeperBoard(DIMENSIONS, PERCENT, compact).generate_board(rng)
+        seconds = perf_counter() - start
+        print("{:>18}: {:8.2f} us per board".format("compact" if compact else "list", seconds / boards * 1000000))
+
+    start = perf_counter()
+    batch = BoardBatch.generate(boards, DIMENSIONS, PERCENT, seed=1)
+    seconds = perf_counter() - start
+    print("{:>18}: {:8.2f} us per board".format("batch", seconds / boards * 1000000))
+
+    # Handoff of the same boards to the workers
+    lists = [[[value if value != BOMB else '*' for value in row] for row in grid.tolist()] for grid in batch.grids]
+    chunk = -(-boards // (WORKERS * 4))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Both include the start of the pool
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers=WORKERS) as executor:
+        pickled = sum(executor.map(count_list_zeros, [lists[i:i + chunk] for i in range(0, boards, chunk)]))
+    seconds = perf_counter() - start
+    print("{:>18}: {:8.2f} ms".format("pickled lists", seconds * 1000))
+
+    start = perf_counter()
+    shared = sum(map_batch(count_zeros, batch, workers=WORKERS, chunk_size=chunk))
+    seconds = perf_counter() - start
+    print("{:>18}: {:8.2f} ms".format("shared batch", seconds * 1000))
+
+    assert pickled == shared
+    batch.unlink()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the generation of the list based board with the compact (numpy) board.
+
+Run from the root of the project: python3 -m benchmarks.bench_compact
+"""
+
+from random import Random
+from timeit import repeat
+
+from core.Engine import MinesweeperBoard
+
+SIZES = [(16, 16), (16, 30), (100, 100), (300, 300)]
+PERCENTS = [5, 25, 50, 75]
+
+
+def best_of(fn, number: int = 3) -> float:
+    return min(repeat(fn, number=1, repeat=number))
+
+
+def generate(dimensions, percent, compact):
+    board = MinesweeperBoard(dimensions, percent, compact=compact)
+    board.generate_board(Random(1))
+    return board
+
+
+def main():
+    print("{:>10} {:>5} {:>12} {:>12} {:>10}".format("size", "%", "list (ms)", "compact (ms)", "speedup"))
+
+    for dimensions in SIZES:
+        for percent in PERCENTS:
+            assert generate(dimensions, percent, True).board == generate(dimensions, percent, False).board
+
+            lists = best_of(lambda: generate(dimensions, percent, False))
+            compact = best_of(lambda: generate(dimensions, percent, True))
+
+            print("{:>10} {:>5} {:>12.3f} {:>12.3f} {:>9.1f}x".format("{}x{}".format(*dimensions), percent,
+                                                                       lists * 1000, compact * 1000,
+                                                                       lists / compact))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the bomb placement by sampling without replacement with the old rejection loop.
+
+Run from the root of the project: python3 -m benchmarks.bench_placement
+"""
+
+from typing import Tuple, List
+from random import Random
+from timeit import repeat
+
+from core.Placement import place_bombs
+
+SIZES = [(16, 16), (16, 30), (100, 100), (300, 300)]
+PERCENTS = [5, 25, 50, 75]
+
+# The rejection loop is quadratic, so it is only measured up to this quantity of fields
+LEGACY_MAX_FIELDS = 100 * 100
+
+
+def legacy_place_bombs(dimensions: Tuple[int, int], total_bombs: int, rng: Random) -> List[Tuple[int, int]]:
+    """
+    The old placement of MinesweeperBoard: rand (x, y) points and search them in the list of bombs.
+    """
+    bombs = list()
+
+    for b in range(total_bombs):
+        bomb = None
+
+        try:
+            while True:
+                bomb = (rng.randint(0, dimensions[0] - 1), rng.randint(0, dimensions[1] - 1))
+                bombs.index(bomb)
+        except ValueError:
+            bombs.append(bomb)
+
+    bombs.sort()
+    return bombs
+
+
+def best_of(fn, number: int = 3) -> float:
+    return min(repeat(fn, number=1, repeat=number))
+
+
+def main():
+    print("{:>10} {:>5} {:>12} {:>12} {:>12} {:>10}".format("size", "%", "legacy (ms)", "sample (ms)", "dense (ms)",
+                                                               "speedup"))
+
+    for dimensions in SIZES:
+        fields = dimensions[0] * dimensions[1]
+
+        for percent in PERCENTS:
+            total_bombs = round(fields * percent / 100)
+
+            sample = best_of(lambda: place_bombs(dimensions, total_bombs, Random(1), dense=False))
+            dense = best_of(lambda: place_bombs(dimensions, total_bombs, Random(1), dense=True))
+
+            if fields <= LEGACY_MAX_FIELDS:
+                legacy = best_of(lambda: legacy_place_bombs(dimensions, total_bombs, Random(1)), number=1)
+                speedup = "{:.1f}x".format(legacy / min(sample, dense))
+                legacy = "{:.3f}".format(legacy * 1000)
+            else:
+                legacy = speedup = "-"
+
+            print("{:>10} {:>5} {:>12} {:>12.3f} {:>12.3f} {:>10}".format("{}x{}".format(*dimensions), percent, legacy,
+                                                                           sample * 1000, dense * 1000, speedup))
+
+
+if __name__ == "__main__":
+    main()
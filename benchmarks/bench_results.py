@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Time of the result store: recording a result (the caller never waits for the disk), writing the batches, the
+leaderboard from memory and the queries of the database (rank and percentile).
+
+Run from the root of the project: python3 -m benchmarks.bench_results [results]
+"""
+
+from random import Random
+from time import perf_counter
+import os
+import sys
+import tempfile
+
+from core.Results import ResultStore, Result
+from core import Metrics
+
+RESULTS = 50000
+PLAYERS = ["player{}".format(i) for i in range(50)]
+SETTINGS = [((9, 9), 12.3), ((16, 16), 15.6), ((16, 30), 20.6)]
+QUERIES = 1000
+
+
+def main(argv):
+    results = int(argv[0]) if argv else RESULTS
+    rng = Random(1)
+    Metrics.enable()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ResultStore(os.path.join(directory, "results.db"))
+        store.start()
+
+        for dimensions, bomb_percent in SETTINGS:
+            store.leaderboard(dimensions, bomb_percent)
+
+        games = [Result(rng.choice(PLAYERS), *rng.choice(SETTINGS), rng.random() < 0.3, rng.uniform(10, 600))
+                 for i in range(results)]
+
+        start = perf_counter()
+        for result in games:
+            store.record(result)
+        recorded = perf_counter() - start
+
+        store.flush()
+        written = perf_counter() - start
+
+        print("record: {:8.2f} us per result, {} results written in {:.2f} s ({} batches)"
+              .format(recorded / results * 1000000, results, written, Metrics.registry.counter("results.batches")))
+
+        dimensions, bomb_percent = SETTINGS[-1]
+        for name, query in [("leaderboard", lambda: store.leaderboard(dimensions, bomb_percent)),
+                            ("rank", lambda: store.rank(dimensions, bomb_percent, 120.0)),
+                            ("percentile", lambda: store.percentile(PLAYERS[0], dimensions, bomb_percent, 50)),
+                            ("statistics", lambda: store.statistics(PLAYERS[0], dimensions, bomb_percent))]:
+            start = perf_counter()
+            for i in range(QUERIES):
+                query()
+            print("{:>11}: {:8.2f} us per query".format(name, (perf_counter() - start) / QUERIES * 1000000))
+
+        store.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Worst case reveals: one click that opens a mostly empty 1000x1000 board.
+
+Run from the root of the project: python3 -m benchmarks.bench_reveal
+"""
+
+from time import perf_counter
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState
+
+DIMENSIONS = (1000, 1000)
+
+
+def clustered_board(dimensions, percent, compact=False) -> MinesweeperBoard:
+    """
+    Board with all the bombs packed in the first rows, so the rest of the board is one big opening.
+    """
+    total_bombs = dimensions[0] * dimensions[1] * percent // 100
+    bombs = [divmod(index, dimensions[1]) for index in range(total_bombs)]
+
+    return MinesweeperBoard.from_bombs(dimensions, bombs, compact)
+
+
+def main():
+    for compact in (False, True):
+        board = clustered_board(DIMENSIONS, 5, compact)
+
+        start = perf_counter()
+        state = GameState(board)
+        created = perf_counter()
+        opened = state.reveal((DIMENSIONS[0] - 1, DIMENSIONS[1] - 1))
+        revealed = perf_counter()
+
+        print("{}x{} {:>8}: state {:8.1f} ms, reveal {:8.1f} ms, {} fields opened"
+              .format(DIMENSIONS[0], DIMENSIONS[1], "compact" if compact else "list",
+                      (created - start) * 1000, (revealed - created) * 1000, len(opened)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Load test of the game server with many simulated clients on localhost: every client joins a room and opens random
+fields, and every room restarts its game when it ends.
+
+Run from the root of the project: python3 -m benchmarks.bench_server [clients] [players per room] [moves per client]
+"""
+
+from random import Random
+from time import perf_counter
+import asyncio
+import resource
+import sys
+
+from server import Protocol
+from server.Server import GameServer
+from core.State import REVEAL, FLAG
+
+DIMENSIONS = (16, 30)
+BOMB_PERCENT = 15
+
+
+async def client(port: int, room: str, player: str, moves: int, rng: Random, counters: dict):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=Protocol.MAX_LINE)
+    writer.write(Protocol.encode({"type": "join", "room": room, "player": player,
+                                  "dimensions": list(DIMENSIONS), "bomb_percent": BOMB_PERCENT}))
+
+    playing = [True]
+
+    async def read():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+
+            counters["received"] += 1
+            if Protocol.decode(line).get("win") is not None and playing[0]:
+                writer.write(Protocol.encode({"type": "restart"}))
+
+    reading = asyncio.ensure_future(read())
+
+    for m in range(moves):
+        coords = [rng.randrange(DIMENSIONS[0]), rng.randrange(DIMENSIONS[1])]
+        writer.write(Protocol.encode({"type": "move", "action": REVEAL if rng.random() < 0.9 else FLAG,
+                                      "coords": coords}))
+        await writer.drain()
+        counters["sent"] += 1
+        await asyncio.sleep(0)
+
+    playing[0] = False
+    writer.write(Protocol.encode({"type": "leave"}))
+    await writer.drain()
+    await reading
+    writer.close()
+
+
+async def run(clients: int, per_room: int, moves: int):
+    server = GameServer(port=0)
+    await server.start()
+
+    rng = Random(1)
+    counters = {"sent": 0, "received": 0}
+    start = perf_counter()
+
+    await asyncio.gather(*[client(server.port, "room{}".format(c // per_room), "player{}".format(c), moves,
+                                  Random(rng.random()), counters) for c in range(clients)])
+
+    elapsed = perf_counter() - start
+    await server.stop()
+
+    print("{} clients in {} rooms: {} moves, {} messages received in {:.2f} s ({:.0f} moves/s, {:.0f} messages/s)"
+          .format(clients, (clients + per_room - 1) // per_room, counters["sent"], counters["received"], elapsed,
+                  counters["sent"] / elapsed, counters["received"] / elapsed))
+
+
+def main(argv):
+    clients = int(argv[0]) if len(argv) > 0 else 1000
+    per_room = int(argv[1]) if len(argv) > 1 else 10
+    moves = int(argv[2]) if len(argv) > 2 else 20
+
+    # Each client uses 2 file descriptors (the client and the server side of the connection)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (max(soft, min(hard, 2 * clients + 64)), hard))
+
+    asyncio.run(run(clients, per_room, moves))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
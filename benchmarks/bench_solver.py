@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Time of the constraint solver and of the probability engine (updated after each move) on the states of real games,
+played with the best guesses of the engine.
+
+Run from the root of the project: python3 -m benchmarks.bench_solver
+"""
+
+from random import Random
+from time import perf_counter
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState
+from core.Solver import Solver
+from core.Probability import ProbabilityEngine
+
+SETTINGS = [((9, 9), 12.3), ((16, 16), 15.6), ((16, 30), 20.6), ((100, 100), 20)]
+GAMES = 20
+
+
+def main():
+    for dimensions, bomb_percent in SETTINGS:
+        rng = Random(1)
+        times = {"solver": list(), "engine": list()}
+
+        for g in range(GAMES):
+            board = MinesweeperBoard(dimensions, bomb_percent)
+            board.generate_board(rng)
+            state = GameState(board)
+            solver = Solver()
+            engine = ProbabilityEngine(state)
+            updates = 0.0  # time of the updates of the engine since the last solve
+
+            while not state.finished:
+                start = perf_counter()
+                solver.solve(state)
+                times["solver"].append(perf_counter() - start)
+
+                start = perf_counter()
+                solution = engine.solve()
+                times["engine"].append(perf_counter() - start + updates)
+
+                guess = solution.best_guess()
+                start = perf_counter()
+                for coords in sorted(solution.safe) or [guess]:
+                    engine.update(state.reveal(coords))
+                updates = perf_counter() - start
+
+        for name, measured in times.items():
+            measured.sort()
+            print("{:>8} {:>5}% {}: {:5d} solves, median {:7.3f} ms, p99 {:7.3f} ms, max {:7.3f} ms"
+                  .format("{}x{}".format(*dimensions), bomb_percent, name, len(measured),
+                          measured[len(measured) // 2] * 1000, measured[int(len(measured) * 0.99)] * 1000,
+                          measured[-1] * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Startup time of each mode of minesweeper.py, measured with python3 -X importtime in a new interpreter. The time is
+the import time of the modules of the mode, without the modules imported by an empty interpreter.
+
+Fails (exit code 1) when the import time of a mode is over its budget, or when it imports a module it should not
+(e.g. Tk in the headless modes).
+
+Run from the root of the project: python3 -m benchmarks.bench_startup [runs]
+"""
+
+from typing import Tuple, List, Set
+import subprocess
+import sys
+
+# (name, arguments of the interpreter, budget of the import time in ms, modules that must not be imported)
+SCENARIOS = [
+    ("simulate", ["minesweeper.py", "simulate", "--help"], 70, {"tkinter", "configparser", "multiprocessing"}),
+    ("terminal", ["minesweeper.py", "terminal", "--help"], 60, {"tkinter", "multiprocessing"}),
+    ("serve", ["minesweeper.py", "serve", "--help"], 160, {"tkinter", "configparser", "multiprocessing"}),
+    ("settings", ["-c", "from core.Config import GameSettings; GameSettings()"], 40, {"tkinter", "configparser"}),
+    ("gui", ["-c", "import ui.PlayableBoard, core.Pool"], 100, {"multiprocessing"}),
+]
+BASELINE = ["-c", "pass"]
+RUNS = 5
+
+
+def import_time(args: List[str]) -> Tuple[float, Set[str]]:
+    """
+    :return: the sum of the import time of all the modules in ms, and the names of the imported modules
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    total = 0
+    modules = set()
+
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        modules.add(name.strip())
+
+    return total / 1000, modules
+
+
+def main(argv: List[str]):
+    runs = int(argv[0]) if argv else RUNS
+    failed = False
+    baseline = min(import_time(BASELINE)[0] for run in range(runs))
+
+    # The first run of each mode also writes the caches (bytecode, settings), it is not measured
+    for name, args, budget, forbidden in SCENARIOS:
+        import_time(args)
+        times = list()
+        imported = set()
+
+        for run in range(runs):
+            elapsed, modules = import_time(args)
+            times.append(elapsed - baseline)
+            imported |= modules
+
+        # The budget is compared with the best run, the least disturbed by the other processes of the machine
+        times.sort()
+        unexpected = sorted(forbidden & {module.split(".")[0] for module in imported})
+        ok = times[0] <= budget and not unexpected
+        failed = failed or not ok
+
+        print("{:>9}: best {:6.1f} ms, median {:6.1f} ms, budget {:4d} ms, {:3d} modules {}{}"
+              .format(name, times[0], times[len(times) // 2], budget, len(imported), "OK" if ok else "FAIL",
+                      " (imported {})".format(", ".join(unexpected)) if unexpected else ""))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
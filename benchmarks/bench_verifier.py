@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of the replay verifier (core/Verifier.py): won games, with the times of a person, verified in this process,
+in a process pool from pickled submissions and in a process pool from the files of a directory.
+
+Run from the root of the project: python3 -m benchmarks.bench_verifier [games]
+"""
+
+from random import Random
+from time import perf_counter
+import sys
+import tempfile
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState, REVEAL
+from core.Verifier import Submission, verify_all, verify_log, submit
+
+GAMES = 2000
+DIMENSIONS = (16, 30)
+PERCENT = 20.6
+WORKERS = 4
+
+
+def won_game(rng: Random) -> Submission:
+    """
+    :return: a won game that reveals the hidden safe fields in a random order, with 150 to 600 ms between the moves
+    """
+    board = MinesweeperBoard(DIMENSIONS, PERCENT, compact=True)
+    board.generate_board(rng)
+    state = GameState(board)
+    bombs = set(board.bombs)
+    fields = [(row, col) for row in range(DIMENSIONS[0]) for col in range(DIMENSIONS[1]) if (row, col) not in bombs]
+    rng.shuffle(fields)
+    moves, time_ms = list(), 0
+
+    for coords in fields:
+        if not state.is_revealed(coords):
+            time_ms += rng.randint(150, 600)
+            moves.append((time_ms, (REVEAL, coords)))
+            state.apply((REVEAL, coords))
+
+    return Submission(board, moves, time_ms / 1000)
+
+
+def main(argv):
+    games = int(argv[0]) if argv else GAMES
+    rng = Random(1)
+    submissions = [won_game(rng) for i in range(games)]
+    moves = sum(len(submission.moves) for submission in submissions)
+
+    for name, workers in (("serial", 1), ("pool", WORKERS)):
+        start = perf_counter()
+        verdicts = verify_all(submissions, workers=workers)
+        seconds = perf_counter() - start
+        print("{:>18}: {:8.0f} games per second, {:8.0f} moves per second"
+              .format(name, games / seconds, moves / seconds))
+
+        assert all(verdict.valid for verdict in verdicts)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for submission in submissions:
+            submit(directory, submission.board, submission.moves, submission.seconds)
+
+        start = perf_counter()
+        verdicts = verify_log(directory, workers=WORKERS)
+        seconds = perf_counter() - start
+        print("{:>18}: {:8.0f} games per second, {:8.0f} moves per second"
+              .format("pool from files", games / seconds, moves / seconds))
+
+        assert all(verdict.valid for verdict in verdicts)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
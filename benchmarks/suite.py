@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite: board creation and generation across sizes and bomb percents, format_board, flood fill reveals,
+the win check and the construction of the UI (with a stubbed Tk when there is no display).
+
+The results (seconds per call) are written as JSON and compared with a stored baseline; a case slower than the
+baseline by more than the tolerance is a regression, and the suite exits with 1.
+
+Run from the root of the project:
+    python3 -m benchmarks.suite --save benchmarks/baseline.json      (store the baseline)
+    python3 -m benchmarks.suite --baseline benchmarks/baseline.json  (compare with it)
+"""
+
+from typing import Tuple, List, Dict, Callable, Optional
+from random import Random
+from timeit import Timer
+import argparse
+import json
+import platform
+import sys
+
+from core.Engine import MinesweeperBoard, Game
+from core.State import GameState
+from benchmarks.bench_reveal import clustered_board
+
+SIZES = [(9, 9), (16, 30), (100, 100), (300, 300)]
+PERCENTS = [5, 25, 50, 75, 100]
+REPEAT = 5
+TOLERANCE = 0.25  # allowed slowdown against the baseline
+
+# (name, setup) - the setup prepares the data and returns the measured function
+Case = Tuple[str, Callable[[], Callable[[], object]]]
+
+
+def generated(dimensions: Tuple[int, int], percent: float, compact: bool = False) -> MinesweeperBoard:
+    board = MinesweeperBoard(dimensions, percent, compact)
+    board.generate_board(Random(1))
+    return board
+
+
+def generation_cases() -> List[Case]:
+    cases = list()
+
+    for dimensions in SIZES:
+        size = "{}x{}".format(*dimensions)
+        cases.append(("init.{}".format(size), lambda d=dimensions: lambda: MinesweeperBoard(d, 25)))
+
+        for percent in PERCENTS:
+            cases.append(("generate.{}.{}%".format(size, percent),
+                          lambda d=dimensions, p=percent: lambda: generated(d, p)))
+
+    try:
+        import core.Compact  # noqa: F401
+    except ImportError:
+        return cases
+
+    for dimensions in SIZES[2:]:
+        cases.append(("generate_compact.{}x{}.25%".format(*dimensions),
+                      lambda d=dimensions: lambda: generated(d, 25, True)))
+
+    return cases
+
+
+def board_cases() -> List[Case]:
+    cases = list()
+
+    for dimensions in SIZES[1:3]:
+        cases.append(("format_board.{}x{}".format(*dimensions),
+                      lambda d=dimensions: generated(d, 20).format_board))
+
+    for dimensions in SIZES[2:] + [(1000, 1000)]:
+        def reveal(d=dimensions):
+            # One click opening the whole board except the bombs (packed in the first rows)
+            board = clustered_board(d, 5)
+            return lambda: GameState(board).reveal((d[0] - 1, d[1] - 1))
+
+        cases.append(("reveal.flood_fill.{}x{}".format(*dimensions), reveal))
+        cases.append(("state.{}x{}".format(*dimensions), lambda d=dimensions: lambda b=generated(d, 20): GameState(b)))
+
+    def win_check():
+        # A flag changes the counters and the win is read: the check is O(1) at any size
+        board = generated((300, 300), 20)
+        state = GameState(board)
+        bomb = board.bombs[0]
+
+        def check():
+            state.flag(bomb)
+            result = state.win
+            state.flag(bomb)
+            return result
+
+        return check
+
+    cases.append(("win_check.300x300", win_check))
+
+    return cases
+
+
+def ui_cases() -> List[Case]:
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+        stubbed = False
+    except Exception:
+        from benchmarks import tkstub
+        tkinter = tkstub.install()
+        stubbed = True
+
+    from ui.PlayableBoard import PlayableBoard, UIProperties
+    from core.Config import GameSettings
+
+    settings = GameSettings()
+    cases = list()
+
+    for dimensions in [(9, 9), (16, 30), (300, 300)]:
+        def build(d=dimensions):
+            board = generated(d, 20)
+
+            def construct():
+                root = tkinter.Tk()
+                PlayableBoard(UIProperties(), Game("bench", settings), board, root)
+                root.destroy()
+
+            return construct
+
+        cases.append(("playable_board{}.{}x{}".format(".stub" if stubbed else "", *dimensions), build))
+
+    return cases
+
+
+def measure(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    :return: the best and the median time of one call, in seconds
+    """
+    timer = Timer(function)
+    number, elapsed = timer.autorange()  # calls that take at least 0.2 seconds
+
+    times = sorted(t / number for t in timer.repeat(repeat=repeat, number=number))
+    return {"best": times[0], "median": times[len(times) // 2], "number": number}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[Tuple[str, float]]:
+    """
+    :return: the cases slower than the baseline by more than the tolerance, with their ratio to the baseline
+    """
+    regressions = list()
+
+    for name, result in results.items():
+        if name in baseline and result["best"] > baseline[name]["best"] * (1 + tolerance):
+            regressions.append((name, result["best"] / baseline[name]["best"]))
+
+    return regressions
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.suite", description="Run the benchmark suite")
+    parser.add_argument("-k", "--filter", default="", help="run only the cases with this text in the name")
+    parser.add_argument("-r", "--repeat", type=int, default=REPEAT)
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--save", help="write the results as the new baseline to this JSON file")
+    parser.add_argument("--baseline", help="compare the results with this JSON file")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    baseline: Optional[dict] = None
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+
+    results = dict()
+
+    for name, setup in generation_cases() + board_cases() + ui_cases():
+        if args.filter not in name:
+            continue
+
+        result = results[name] = measure(setup(), args.repeat)
+        change = ""
+
+        if baseline is not None and name in baseline:
+            change = "{:+7.1f}%".format((result["best"] / baseline[name]["best"] - 1) * 100)
+
+        print("{:<36} best {:12.6f} ms  median {:12.6f} ms {}".format(name, result["best"] * 1000,
+                                                                     result["median"] * 1000, change))
+
+    document = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+
+    for path in (args.output, args.save):
+        if path:
+            with open(path, "w") as file:
+                json.dump(document, file, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+
+        for name, ratio in regressions:
+            print("REGRESSION: {} is {:.2f}x slower than the baseline".format(name, ratio))
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
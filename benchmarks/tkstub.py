@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Minimal stand-in of tkinter, to measure the construction of the UI without a display. The widgets accept any
+option and any method call; only the Python side of the UI is measured.
+
+install() must be called before the modules of the UI are imported.
+"""
+
+import sys
+import types
+
+
+class Anything(object):
+    """
+    Any attribute and any call return an Anything, that converts to 0.
+    """
+    def __getattr__(self, name):
+        return Anything()
+
+    def __call__(self, *args, **kwargs):
+        return Anything()
+
+    def __int__(self):
+        return 0
+
+    def __float__(self):
+        return 0.0
+
+    def __index__(self):
+        return 0
+
+
+class Widget(object):
+    def __init__(self, master=None, *args, **options):
+        self.master = master
+        self.options = dict(options)
+        self.tk = Anything()
+        self._w = "."
+
+    def __getitem__(self, key):
+        return self.options.get(key)
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def __getattr__(self, name):
+        # Methods of the widgets that are not used in the measures (grid, bind, title, ...)
+        return lambda *args, **kwargs: 0
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    config = configure
+    itemconfigure = configure
+
+    def after(self, interval, callback):
+        return "after#0"
+
+    def after_cancel(self, job):
+        pass
+
+
+class PhotoImage(object):
+    def __init__(self, *args, **options):
+        self.options = options
+
+
+def install() -> types.ModuleType:
+    """
+    Register the stub as the tkinter module.
+
+    :return: the stub module
+    """
+    tk = types.ModuleType("tkinter")
+
+    for name in ("Misc", "Tk", "Frame", "Button", "Label", "Canvas", "Scrollbar"):
+        setattr(tk, name, type(name, (Widget,), {}))
+
+    tk.PhotoImage = PhotoImage
+    tk.TclError = RuntimeError
+
+    for name in ("DISABLED", "NORMAL", "CENTER", "HORIZONTAL", "VERTICAL", "NS", "EW", "NW"):
+        setattr(tk, name, name.lower())
+
+    messagebox = types.ModuleType("tkinter.messagebox")
+    messagebox.askokcancel = lambda *args, **kwargs: True
+    messagebox.showinfo = lambda *args, **kwargs: None
+    messagebox.showerror = lambda *args, **kwargs: None
+    tk.messagebox = messagebox
+
+    sys.modules["tkinter"] = tk
+    sys.modules["tkinter.messagebox"] = messagebox
+
+    return tk
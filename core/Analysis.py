@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Difficulty metrics of the boards. This module requires numpy.
+
+- 3BV: the minimum quantity of clicks to open the board, one for each opening and one for each isolated number.
+- Openings: the regions of connected empty fields (8-connected) that a click opens at once, with the numbers around
+  them. The size of an opening is the quantity of fields it opens.
+- Isolated numbers: the numbers that are not around an opening, opened one click each.
+- First click: the fraction of the fields of the board opened by the first click.
+
+The metrics are computed on stacks of int8 grids (see core.Compact and core.Batch), all the boards at once: the
+openings are the connected components of the empty fields, labelled with array operations over the whole stack.
+"""
+
+from typing import Tuple, List, Dict, Iterator, Optional
+import argparse
+
+import numpy as np
+
+from core.Compact import BOMB, build_grid, count_neighbours
+from core.Engine import MinesweeperBoard
+from core.Archive import BoardArchive, BOARD_HEADER
+from core.Batch import BoardBatch
+from core.Simulator import parse_dimensions
+
+METRICS = ("bbbv", "openings", "isolated", "largest_opening", "first_click")
+CHUNK_FIELDS = 1 << 22  # fields analyzed in one vectorized pass
+
+SHIFTS = [(r, c) for r in range(3) for c in range(3) if r != 1 or c != 1]  # the 8 neighbours in a padded grid
+
+
+def _openings(grids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the openings of a stack of boards and their sizes, in the flat padded stack (a border of one field around
+    each board, so the neighbours are at fixed offsets and the borders are never empty).
+
+    The empty fields are numbered and joined along the edges between empty neighbours: the larger label of an edge, if
+    it is the label of itself, is linked to the smaller one and then every field jumps to the label of its label, until
+    both ends of every edge have the same label.
+
+    :param grids: int8 array (boards, rows, cols).
+    :return: the opening of every padded field (-1 if the field is not empty), the position of the first field of
+             each opening and the size of each opening, and the positions of the numbers next to an opening
+    """
+    boards, rows, cols = grids.shape
+    width = cols + 2
+    size = boards * (rows + 2) * width
+    inside = slice(width + 1, size - width - 1)  # the fields with all the neighbours in the padded stack
+
+    empty = np.zeros((boards, rows + 2, width), dtype=bool)
+    empty[:, 1:-1, 1:-1] = grids == 0
+    empty = empty.reshape(-1)
+    fields = np.flatnonzero(empty)
+
+    number = np.full(size, -1, dtype=np.intp)  # number of each empty field
+    number[fields] = np.arange(len(fields))
+
+    # Edges between empty neighbours, each one once: right, down-left, down and down-right
+    first, second = list(), list()
+    for offset in (1, width - 1, width, width + 1):
+        linked = fields[empty[fields + offset]]
+        first.append(number[linked])
+        second.append(number[linked + offset])
+
+    first, second = np.concatenate(first), np.concatenate(second)
+    labels = np.arange(len(fields))
+
+    while True:
+        a, b = labels[first], labels[second]
+        joined = a != b
+
+        if not joined.any():
+            break
+
+        # The edges with the same label at both ends never change again
+        first, second, a, b = first[joined], second[joined], a[joined], b[joined]
+        high, low = np.maximum(a, b), np.minimum(a, b)
+        linked = labels[high] == high
+        labels[high[linked]] = low[linked]
+        labels = labels[labels]
+
+    # The edges agree, but a field can still point to a field that is not the root: flatten to the roots
+    while True:
+        parents = labels[labels]
+
+        if np.array_equal(parents, labels):
+            break
+
+        labels = parents
+
+    # The openings are numbered in the order of their first fields
+    firsts = np.flatnonzero(labels == np.arange(len(fields)))
+    opening = np.full(len(fields), -1, dtype=np.int32)
+    opening[firsts] = np.arange(len(firsts))
+    opening = opening[labels]
+    sizes = np.bincount(opening, minlength=len(firsts))
+
+    openings = np.full(size, -1, dtype=np.int32)
+    openings[fields] = opening
+
+    # The numbers next to an opening are opened with it. Most of them are next to only one opening: the smallest and
+    # the largest opening around them are the same
+    offsets = [(r - 1) * width + c - 1 for r, c in SHIFTS]
+    smallest = np.where(empty, openings, len(firsts)).astype(np.int32)
+    low = np.full(size, len(firsts), dtype=np.int32)
+    high = np.full(size, -1, dtype=np.int32)
+    for offset in offsets:
+        around = slice(width + 1 + offset, size - width - 1 + offset)
+        np.minimum(low[inside], smallest[around], out=low[inside])
+        np.maximum(high[inside], openings[around], out=high[inside])
+
+    numbers = np.zeros((boards, rows + 2, width), dtype=bool)
+    numbers[:, 1:-1, 1:-1] = grids > 0
+    border = np.flatnonzero(numbers.reshape(-1) & (high >= 0))
+    low, high = low[border], high[border]
+    single = low == high
+    sizes += np.bincount(low[single], minlength=len(firsts))
+
+    # The others: the distinct openings around them
+    around = openings[border[~single, np.newaxis] + np.array(offsets)]
+    around.sort(axis=1)
+    distinct = around >= 0
+    distinct[:, 1:] &= around[:, 1:] != around[:, :-1]
+    sizes += np.bincount(around[distinct], minlength=len(firsts))
+
+    return openings, fields[firsts], sizes, border
+
+
+def _measure(grids: np.ndarray, first_click: Tuple[int, int] = None) -> Tuple[Dict[str, np.ndarray], np.ndarray,
+                                                                             np.ndarray]:
+    """
+    :return: the metrics of analyze_grids, the positions of the first fields of the openings (see _openings) and
+             their sizes
+    """
+    boards, rows, cols = grids.shape
+    fields = rows * cols
+    plane = (rows + 2) * (cols + 2)  # fields of a padded board
+
+    if first_click is None:
+        first_click = (rows // 2, cols // 2)
+
+    openings, firsts, sizes, border = _openings(grids)
+    count = np.bincount(firsts // plane, minlength=boards)
+    largest = np.zeros(boards, dtype=np.int64)
+    np.maximum.at(largest, firsts // plane, sizes)
+
+    # The numbers that are not next to an empty field are opened one click each
+    numbers = (grids > 0).reshape(boards, -1).sum(axis=1)
+    isolated = numbers - np.bincount(border // plane, minlength=boards)
+
+    # The first click opens its opening, one field if it is a number and nothing if it is a bomb
+    row, col = first_click
+    clicked = grids[:, row, col]
+    opened = (clicked > 0).astype(np.int64)
+    on_empty = np.flatnonzero(clicked == 0)
+    opened[on_empty] = sizes[openings[on_empty * plane + (row + 1) * (cols + 2) + col + 1]]
+
+    metrics = {
+        "bbbv": count + isolated,
+        "openings": count,
+        "isolated": isolated,
+        "largest_opening": largest,
+        "first_click": opened / fields
+    }
+
+    return metrics, firsts, sizes
+
+
+def analyze_grids(grids: np.ndarray, first_click: Tuple[int, int] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute the metrics of a stack of boards of the same size, in one vectorized pass for each CHUNK_FIELDS fields.
+
+    :param grids: int8 array (boards, rows, cols), e.g. BoardBatch.grids.
+    :param first_click: the first click of the boards. If None, the center of the board (see
+                        core.Generator.default_click).
+    :return: an array with one value per board for each name of METRICS
+    """
+    chunk = max(1, CHUNK_FIELDS // (grids.shape[1] * grids.shape[2]))
+
+    if len(grids) <= chunk:
+        return _measure(grids, first_click)[0]
+
+    # Bounds the temporary arrays of a large stack
+    results = [_measure(grids[start:start + chunk], first_click)[0] for start in range(0, len(grids), chunk)]
+    return {name: np.concatenate([result[name] for result in results]) for name in METRICS}
+
+
+class Difficulty(object):
+    """
+    Difficulty metrics of one board.
+    """
+    bbbv: int = 0
+    openings: int = 0
+    opening_sizes: List[int] = None
+    isolated: int = 0
+    first_click: float = 0.0
+
+    def __init__(self, bbbv: int, openings: int, opening_sizes: List[int], isolated: int, first_click: float):
+        self.bbbv = bbbv
+        self.openings = openings
+        self.opening_sizes = opening_sizes
+        self.isolated = isolated
+        self.first_click = first_click
+
+    @property
+    def largest_opening(self) -> int:
+        return max(self.opening_sizes, default=0)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "bbbv": self.bbbv,
+            "openings": self.openings,
+            "opening_sizes": self.opening_sizes,
+            "isolated": self.isolated,
+            "largest_opening": self.largest_opening,
+            "first_click": self.first_click
+        }
+
+    def __str__(self):
+        return "=== [DIFFICULTY] ===\n" \
+               "- 3BV: {}\n" \
+               "- Openings: {} (largest: {})\n" \
+               "- Isolated numbers: {}\n" \
+               "- Opened by the first click: {:.1f}%\n" \
+            .format(self.bbbv, self.openings, self.largest_opening, self.isolated, self.first_click * 100)
+
+
+def board_grid(board: MinesweeperBoard) -> np.ndarray:
+    """
+    :return: the int8 grid of a board, compact or not
+    """
+    if board.grid is not None:
+        return board.grid
+
+    cols = board.dimensions[1]
+    return build_grid(board.dimensions, [row * cols + col for row, col in board.bombs])
+
+
+def analyze(board: MinesweeperBoard, first_click: Tuple[int, int] = None) -> Difficulty:
+    """
+    Compute the metrics of one board.
+
+    :param board: the board.
+    :param first_click: the first click. If None, the first click of the board, or the center of the board.
+    :return: the metrics
+    """
+    metrics, firsts, sizes = _measure(board_grid(board)[np.newaxis], first_click or board.first_click)
+
+    return Difficulty(int(metrics["bbbv"][0]), int(metrics["openings"][0]), sizes.tolist(),
+                      int(metrics["isolated"][0]), float(metrics["first_click"][0]))
+
+
+def archive_grids(archive: BoardArchive, start: int = 0,
+                  stop: int = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Read the boards of an archive as stacks of grids: consecutive boards of the same size, up to CHUNK_FIELDS fields
+    per stack. The masks of the bombs are unpacked and counted for the whole stack at once, only the boards stored as
+    a seed are generated again.
+
+    :return: generator of (position of the first board, int8 array (boards, rows, cols))
+    """
+    stop = len(archive) if stop is None else stop
+    masks = list()
+    first = start
+    dimensions = None
+
+    def stack():
+        return first, count_neighbours(np.stack(masks))
+
+    for position in range(start, stop):
+        record = archive.record(position)
+        rows, cols, seed, total_bombs = BOARD_HEADER.unpack_from(record)
+
+        if masks and ((rows, cols) != dimensions or (len(masks) + 1) * rows * cols > CHUNK_FIELDS):
+            yield stack()
+            masks = list()
+            first = position
+
+        dimensions = (rows, cols)
+        bits = np.frombuffer(record, dtype=np.uint8, offset=BOARD_HEADER.size)
+
+        if len(bits):
+            mask = np.unpackbits(bits, count=rows * cols, bitorder="little").astype(bool)
+        else:
+            board = MinesweeperBoard.from_seed(dimensions, total_bombs * 100 / (rows * cols), seed, compact=True)
+            mask = board.grid.reshape(-1) == BOMB
+
+        masks.append(mask.reshape(dimensions))
+
+    if masks:
+        yield stack()
+
+
+def analyze_archive(archive: BoardArchive, start: int = 0, stop: int = None) -> Dict[str, np.ndarray]:
+    """
+    Compute the metrics of the boards of an archive, with the first click in the center of each board.
+
+    :return: an array with one value per board (in the order of the archive) for each name of METRICS
+    """
+    results = [analyze_grids(grids) for position, grids in archive_grids(archive, start, stop)]
+
+    return {name: np.concatenate([result[name] for result in results]) if results else np.zeros(0)
+            for name in METRICS}
+
+
+class DifficultyFilter(object):
+    """
+    Rejection filter of the generation: accepts the boards with every given metric in its range, e.g.
+    DifficultyFilter(bbbv=(150, 200)). A limit can be None (no limit).
+
+        board.generate_board(accept=DifficultyFilter(bbbv=(150, 200)))
+        BoardBatch.generate(10000, (16, 30), 20.6, accept=DifficultyFilter(bbbv=(150, 200)).select)
+    """
+    ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = None
+
+    def __init__(self, **ranges: Tuple[Optional[float], Optional[float]]):
+        """
+        :param ranges: the (low, high) limits, inclusive, of the metrics (names of METRICS).
+        """
+        for name in ranges:
+            if name not in METRICS:
+                raise ValueError("Unknown metric: {}".format(name))
+
+        self.ranges = ranges
+
+    def select(self, grids: np.ndarray, first_click: Tuple[int, int] = None) -> np.ndarray:
+        """
+        :return: boolean array with True in the accepted boards of a stack of grids
+        """
+        metrics = analyze_grids(grids, first_click)
+        accepted = np.ones(len(grids), dtype=bool)
+
+        for name, (low, high) in self.ranges.items():
+            if low is not None:
+                accepted &= metrics[name] >= low
+            if high is not None:
+                accepted &= metrics[name] <= high
+
+        return accepted
+
+    def __call__(self, board: MinesweeperBoard) -> bool:
+        return bool(self.select(board_grid(board)[np.newaxis], board.first_click)[0])
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog="minesweeper.py analyze", description="Difficulty metrics of many boards")
+    parser.add_argument("archive", nargs="?", help="a board archive (default: generate a batch of boards)")
+    parser.add_argument("-n", "--boards", type=int, default=10000)
+    parser.add_argument("-d", "--dimensions", type=parse_dimensions, default=(16, 16), help="ROWSxCOLS")
+    parser.add_argument("-b", "--bomb-percent", type=float, default=15)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.archive:
+        with BoardArchive(args.archive, readonly=True) as archive:
+            metrics = analyze_archive(archive)
+    else:
+        with BoardBatch.generate(args.boards, args.dimensions, args.bomb_percent, args.seed) as batch:
+            metrics = analyze_grids(batch.grids, batch.first_click)
+
+    print("{:>16} {:>9} {:>9} {:>9} {:>9} {:>9}".format("metric", "mean", "min", "p10", "median", "p90"))
+    for name in METRICS:
+        values = metrics[name]
+        if len(values):
+            print("{:>16} {:9.2f} {:9.2f} {:9.2f} {:9.2f} {:9.2f}".format(name, values.mean(), values.min(),
+                                                                       *np.percentile(values, [10, 50, 90])))
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Compact binary archives of boards and replays of games.
+
+Both are append-only files of records with a sidecar index (<path>.idx) of fixed-width (offset, length) entries,
+and are read through mmap, so any record is read in O(1) without parsing the rest of the file.
+
+Board record: rows (uint16), cols (uint16), seed (uint64), quantity of bombs (uint32) and the mask of the bombs,
+one bit per field in the flat order (row * cols + col). A seed record has no mask: the board is generated again from
+its seed (see MinesweeperBoard.from_seed), so it takes 16 bytes for any size of board.
+
+Replay record: game id (uint64), quantity of moves (uint32), time claimed by the player in milliseconds (uint32,
+NO_TIME if there is none), length of the name of the player (uint16), the name in UTF-8 and the moves as fixed-width
+records: time since the start of the game in milliseconds (uint32), action (uint8), row (uint16) and col (uint16).
+"""
+
+from typing import Tuple, List, Optional, Iterator
+import mmap
+import os
+import struct
+
+from core.Engine import MinesweeperBoard
+from core.State import Move, REVEAL, FLAG, CHORD, UNDO, REDO
+
+BOARD_MAGIC = b"MSB1"
+REPLAY_MAGIC = b"MSR2"
+
+INDEX_ENTRY = struct.Struct("<QQ")  # offset and length of a record
+BOARD_HEADER = struct.Struct("<HHQI")  # rows, cols, seed, bombs
+REPLAY_HEADER = struct.Struct("<QIIH")  # game id, quantity of moves, claimed time in ms, length of the player name
+MOVE_RECORD = struct.Struct("<IBHH")  # time in ms, action, row, col
+
+NO_TIME = 0xFFFFFFFF  # claimed time of a replay without one
+
+ACTIONS = (REVEAL, FLAG, CHORD, UNDO, REDO)  # code of each action in the move records
+
+TimedMove = Tuple[int, Move]  # (time since the start of the game in milliseconds, move)
+Replay = Tuple[int, List[TimedMove], Optional[float], Optional[str]]  # game id, moves, claimed seconds and player
+
+
+class IndexedFile(object):
+    """
+    Append-only file of variable length records, with an index for random access.
+    """
+    path: str = None
+    readonly: bool = False
+
+    __magic: bytes = None
+    __data = None
+    __index = None
+    __data_map: mmap.mmap = None
+    __index_map: mmap.mmap = None
+
+    def __init__(self, path: str, magic: bytes, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self.__magic = magic
+
+        mode = "rb" if readonly else "a+b"
+        self.__data = open(path, mode)
+        self.__index = open(path + ".idx", mode)
+
+        if not readonly and self.__data.seek(0, os.SEEK_END) == 0:
+            self.__data.write(magic)
+            self.__data.flush()
+
+        self.__data.seek(0)
+        if self.__data.read(len(magic)) != magic:
+            self.close()
+            raise ValueError("{} is not a valid file".format(path))
+
+    def append(self, record: bytes) -> int:
+        """
+        :return: the position of the record
+        """
+        offset = self.__data.seek(0, os.SEEK_END)
+        self.__data.write(record)
+        self.__data.flush()
+
+        self.__index.seek(0, os.SEEK_END)
+        self.__index.write(INDEX_ENTRY.pack(offset, len(record)))
+        self.__index.flush()
+
+        return len(self) - 1
+
+    def __map(self, file, current: Optional[mmap.mmap]) -> Optional[mmap.mmap]:
+        # Map the file again when it has grown since the last map
+        size = os.fstat(file.fileno()).st_size
+
+        if current is not None and len(current) == size:
+            return current
+
+        # The old map is closed by the garbage collector, when no record read from it is alive
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __len__(self) -> int:
+        return os.fstat(self.__index.fileno()).st_size // INDEX_ENTRY.size
+
+    def __getitem__(self, position: int) -> memoryview:
+        if not 0 <= position < len(self):
+            raise IndexError("Record {} does not exist".format(position))
+
+        self.__index_map = self.__map(self.__index, self.__index_map)
+        offset, length = INDEX_ENTRY.unpack_from(self.__index_map, position * INDEX_ENTRY.size)
+
+        self.__data_map = self.__map(self.__data, self.__data_map)
+        return memoryview(self.__data_map)[offset:offset + length]
+
+    def close(self) -> None:
+        # The maps are not closed: the records read from them (memoryviews) can still be in use, a map is closed by
+        # the garbage collector when no record uses it
+        self.__data_map = self.__index_map = None
+
+        self.__data.close()
+        self.__index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def pack_board(board: MinesweeperBoard, seed: int = None, seed_only: bool = False) -> bytes:
+    """
+    :param board: the board.
+    :param seed: the seed stored in the record. If None, the seed of the board (or 0 if it has none).
+    :param seed_only: store only the seed of the board, without the mask of the bombs.
+    :return: the board record of a board
+    """
+    rows, cols = board.dimensions
+
+    if seed_only:
+        if board.seed is None or board.first_click is not None or board.no_guess:
+            raise ValueError("Only the boards generated from a seed without first click can be stored as a seed")
+
+        return BOARD_HEADER.pack(rows, cols, board.seed, board.total_bombs)
+
+    seed = (board.seed or 0) if seed is None else seed
+    mask = bytearray((rows * cols + 7) // 8)
+
+    for row, col in board.bombs:
+        index = row * cols + col
+        mask[index >> 3] |= 1 << (index & 7)
+
+    return BOARD_HEADER.pack(rows, cols, seed, len(board.bombs)) + bytes(mask)
+
+
+def unpack_board(record: memoryview, compact: bool = False) -> Tuple[MinesweeperBoard, int]:
+    """
+    :return: the board of a board record and its seed
+    """
+    rows, cols, seed, total_bombs = BOARD_HEADER.unpack_from(record)
+    mask = record[BOARD_HEADER.size:]
+
+    if not len(mask):
+        # The bomb percent gives back the same quantity of bombs (it is rounded to the nearest integer)
+        board = MinesweeperBoard.from_seed((rows, cols), total_bombs * 100 / (rows * cols), seed, compact)
+
+        if board.total_bombs != total_bombs:
+            raise ValueError("Corrupted board record")
+
+        return board, seed
+
+    bombs = list()
+
+    for byte_index, byte in enumerate(mask):
+        while byte:
+            bit = byte & -byte
+            bombs.append(divmod((byte_index << 3) + bit.bit_length() - 1, cols))
+            byte ^= bit
+
+    if len(bombs) != total_bombs:
+        raise ValueError("Corrupted board record")
+
+    return MinesweeperBoard.from_bombs((rows, cols), bombs, compact), seed
+
+
+class BoardArchive(object):
+    """
+    Archive of boards.
+    """
+    __file: IndexedFile = None
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.__file = IndexedFile(path, BOARD_MAGIC, readonly)
+
+    def append(self, board: MinesweeperBoard, seed: int = None, seed_only: bool = False) -> int:
+        """
+        :param board: the board.
+        :param seed: see pack_board.
+        :param seed_only: store only the seed of the board, see pack_board.
+        :return: the position of the board in the archive
+        """
+        return self.__file.append(pack_board(board, seed, seed_only))
+
+    def header(self, position: int) -> Tuple[Tuple[int, int], int, int]:
+        """
+        :return: the dimensions, the seed and the quantity of bombs of a board, without reading the bombs
+        """
+        rows, cols, seed, total_bombs = BOARD_HEADER.unpack_from(self.__file[position])
+        return (rows, cols), seed, total_bombs
+
+    def record(self, position: int) -> memoryview:
+        """
+        :return: the board record of a board (see unpack_board), a view of the mapped file
+        """
+        return self.__file[position]
+
+    def load(self, position: int, compact: bool = False) -> MinesweeperBoard:
+        return unpack_board(self.__file[position], compact)[0]
+
+    def __getitem__(self, position: int) -> MinesweeperBoard:
+        return self.load(position)
+
+    def __len__(self) -> int:
+        return len(self.__file)
+
+    def __iter__(self) -> Iterator[MinesweeperBoard]:
+        for position in range(len(self)):
+            yield self.load(position)
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ReplayLog(object):
+    """
+    Log of the moves of the games.
+    """
+    __file: IndexedFile = None
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.__file = IndexedFile(path, REPLAY_MAGIC, readonly)
+
+    def append(self, game: int, moves: List[TimedMove], seconds: float = None, player: str = None) -> int:
+        """
+        Append all the moves of a game.
+
+        :param game: the id of the game (e.g. the position of its board in a BoardArchive).
+        :param moves: the (time in ms, (action, (row, col))) of each move.
+        :param seconds: the time of the game claimed by the player (e.g. the time of its result).
+        :param player: the name of the player.
+        :return: the position of the game in the log
+        """
+        name = b"" if player is None else player.encode("utf-8")
+        claimed = NO_TIME if seconds is None else min(NO_TIME - 1, max(0, round(seconds * 1000)))
+        record = bytearray(REPLAY_HEADER.pack(game, len(moves), claimed, len(name)) + name)
+
+        for time_ms, (action, (row, col)) in moves:
+            record += MOVE_RECORD.pack(time_ms, ACTIONS.index(action), row, col)
+
+        return self.__file.append(bytes(record))
+
+    def load(self, position: int) -> Replay:
+        """
+        :return: the id of the game, its moves, the time claimed by the player in seconds and the name of the player
+                 (None if they were not stored)
+        """
+        record = self.__file[position]
+        game, count, claimed, length = REPLAY_HEADER.unpack_from(record)
+        start = REPLAY_HEADER.size + length
+
+        moves = [(time_ms, (ACTIONS[action], (row, col)))
+                 for time_ms, action, row, col in MOVE_RECORD.iter_unpack(record[start:])]
+
+        if len(moves) != count:
+            raise ValueError("Corrupted replay record")
+
+        player = bytes(record[REPLAY_HEADER.size:start]).decode("utf-8") if length else None
+        return game, moves, None if claimed == NO_TIME else claimed / 1000, player
+
+    def __getitem__(self, position: int) -> Replay:
+        return self.load(position)
+
+    def __len__(self) -> int:
+        return len(self.__file)
+
+    def __iter__(self) -> Iterator[Replay]:
+        for position in range(len(self)):
+            yield self.load(position)
+
+    def close(self) -> None:
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Many boards of the same settings generated at once in one shared memory buffer. This module requires numpy.
+
+The boards are stacked in one int8 array (boards, rows, cols) with the same values of the compact board (the quantity
+of bombs nearby and core.Compact.BOMB in the bombs), after a small header with the settings. The bombs of a whole
+chunk of boards are placed and counted in one vectorized pass, and other processes attach to the buffer by its name,
+so the boards are given to the workers without pickling or copying them:
+
+    with BoardBatch.generate(10000, (16, 30), 20.6, seed=1) as batch:
+        results = map_batch(analyze, batch)  # analyze(grids, start) runs in the workers on a view of the buffer
+
+Buffer layout: magic (4 bytes), boards (uint32), rows (uint16), cols (uint16), bombs (uint32), seed (uint64) and
+first click (int16 row and col, -1 if there is none), padded to HEADER_SIZE bytes, then the grids.
+"""
+
+from typing import Tuple, List, Iterable, Callable, Any
+import os
+import struct
+
+import numpy as np
+
+from core.Compact import BOMB, count_neighbours
+from core.Engine import MinesweeperBoard
+from core.Placement import neighbourhood, new_seed, derive_seed
+from core.Workers import run_units
+from core import Metrics
+
+MAGIC = b"MSK1"
+HEADER = struct.Struct("<4sIHHIQhh")
+HEADER_SIZE = 64  # the grids start at a cache line
+CHUNK_FIELDS = 1 << 22  # fields generated in one vectorized pass, bounds the temporary arrays (about 40 MB)
+ATTEMPTS = 1000  # candidates for each board of a batch, at most, with a rejection filter
+
+
+def place_mines(count: int, dimensions: Tuple[int, int], total_bombs: int, rng: np.random.Generator,
+                excluded: Iterable[int] = None) -> np.ndarray:
+    """
+    Place the bombs of many boards at once: each board takes the fields with the `total_bombs` smallest random keys,
+    so the bombs are a sample without replacement, as in core.Placement.sample_cells.
+
+    :param count: the quantity of boards.
+    :param dimensions: the dimensions of the boards.
+    :param total_bombs: the quantity of bombs of each board.
+    :param rng: the numpy random generator of the keys.
+    :param excluded: flat indexes that can not have a bomb in any board (e.g. the first click).
+    :return: boolean array (count, rows, cols) with True in the bombs
+    """
+    fields = dimensions[0] * dimensions[1]
+    excluded = list(excluded) if excluded else list()
+
+    if not 0 <= total_bombs <= fields - len(excluded):
+        raise ValueError("Quantity of fields must be between 0 and {}".format(fields - len(excluded)))
+
+    mask = np.zeros((count, fields), dtype=bool)
+
+    if total_bombs:
+        keys = rng.random((count, fields), dtype=np.float32)
+        keys[:, excluded] = 2  # after every key in [0, 1)
+
+        bombs = np.argpartition(keys, total_bombs - 1, axis=1)[:, :total_bombs]
+        np.put_along_axis(mask, bombs, True, axis=1)
+
+    return mask.reshape((count,) + tuple(dimensions))
+
+
+_created = set()  # names of the buffers created in this process
+
+
+def _open(name: str):
+    from multiprocessing import shared_memory, resource_tracker, parent_process
+
+    try:
+        # The processes that attach must not remove the buffer when they exit
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13 the attached buffers are tracked too, and the tracker removes them when the process exits.
+    # The processes started by multiprocessing share the tracker of their parent, that keeps the buffer registered
+    # for the owner, so only the other processes unregister it
+    memory = shared_memory.SharedMemory(name)
+
+    if parent_process() is None and memory.name not in _created:
+        resource_tracker.unregister(memory._name, "shared_memory")
+
+    return memory
+
+
+class BoardBatch(object):
+    """
+    Boards of one size and bomb percent in a shared memory buffer, created by generate and opened in other processes
+    by attach(name). grids is a view of the buffer: batch.grids[i] is the grid of the board i.
+
+    Only the process that generated the batch removes the buffer (unlink, or at the end of a with block), any other
+    process can attach and exit. close only drops the views of this process, so the arrays taken from grids must not
+    be used after it.
+    """
+    name: str = None
+    dimensions: Tuple[int, int] = None
+    total_bombs: int = None
+    seed: int = None
+    first_click: Tuple[int, int] = None
+    grids: np.ndarray = None  # int8 (boards, rows, cols), a view of the shared buffer
+
+    __memory = None  # multiprocessing.shared_memory.SharedMemory
+    __owner: bool = False  # the buffer was created by this object
+
+    def __init__(self, memory, owner: bool = False):
+        """
+        Use generate or attach.
+
+        :param memory: the shared memory with the header and the grids.
+        :param owner: the buffer is removed by unlink or at the end of a with block.
+        """
+        magic, count, rows, cols, bombs, seed, row, col = HEADER.unpack_from(memory.buf)
+
+        if magic != MAGIC:
+            memory.close()
+            raise ValueError("{} is not a batch of boards".format(memory.name))
+
+        self.name = memory.name
+        self.dimensions = (rows, cols)
+        self.total_bombs = bombs
+        self.seed = seed
+        self.first_click = (row, col) if row >= 0 else None
+        self.grids = np.ndarray((count, rows, cols), dtype=np.int8, buffer=memory.buf, offset=HEADER_SIZE)
+        self.__memory = memory
+        self.__owner = owner
+
+    @classmethod
+    @Metrics.timed("batch.generate")
+    def generate(cls, count: int, dimensions: Tuple[int, int], bomb_percent: float, seed: int = None,
+                 first_click: Tuple[int, int] = None, name: str = None,
+                 accept: Callable[[np.ndarray, Tuple[int, int]], np.ndarray] = None,
+                 attempts: int = ATTEMPTS) -> 'BoardBatch':
+        """
+        Generate a batch of boards in a new shared memory buffer. The boards are generated in chunks of about
+        CHUNK_FIELDS fields, each one with a seed derived from the seed of the batch and the index of the chunk, so
+        the same settings, seed and filter always give the same boards.
+
+        :param count: the quantity of boards.
+        :param dimensions: the dimensions of the boards.
+        :param bomb_percent: the bomb percent of the boards, validated as in MinesweeperBoard.
+        :param seed: the seed of the batch. If None, a new one is used.
+        :param first_click: the bombs are placed away from it and its neighbours, as in generate_board.
+        :param name: the name of the shared memory. If None, a unique name is chosen.
+        :param accept: vectorized rejection filter, accept(grids, first_click) -> boolean array with True in the
+                       boards to keep (e.g. core.Analysis.DifficultyFilter(bbbv=(150, 200)).select).
+        :param attempts: with a filter, the maximum quantity of candidates for each board of the batch.
+        :return: the batch, that owns the buffer
+        """
+        from multiprocessing import shared_memory
+
+        rows, cols = dimensions
+        fields = rows * cols
+        total_bombs = MinesweeperBoard(dimensions, bomb_percent).total_bombs
+        seed = new_seed() if seed is None else seed
+
+        # The seed and the first click must fit the fields of the header
+        if not 0 <= seed < 1 << 64:
+            raise ValueError("The seed of a batch must be between 0 and {}".format((1 << 64) - 1))
+        if first_click is not None and not (0 <= first_click[0] < min(rows, 1 << 15)
+                                            and 0 <= first_click[1] < min(cols, 1 << 15)):
+            raise ValueError("The first click {} is not in the board".format(first_click))
+
+        excluded = None
+        if first_click is not None:
+            excluded = neighbourhood(dimensions, first_click)
+
+            if fields - len(excluded) < total_bombs:
+                excluded = [first_click[0] * cols + first_click[1]]
+
+        # Packed before the buffer is created, so a failure does not leave a buffer behind
+        row, col = first_click if first_click is not None else (-1, -1)
+        header = HEADER.pack(MAGIC, count, rows, cols, total_bombs, seed, row, col)
+
+        memory = shared_memory.SharedMemory(name, create=True, size=HEADER_SIZE + count * fields)
+        _created.add(memory.name)
+        memory.buf[:HEADER.size] = header
+        batch = cls(memory, owner=True)
+
+        try:
+            chunk = max(1, CHUNK_FIELDS // fields)
+            filled = unit = 0
+
+            while filled < count:
+                rng = np.random.default_rng(derive_seed(seed, unit))
+                unit += 1
+
+                if accept is None:
+                    stop = min(count, filled + chunk)
+                    count_neighbours(place_mines(stop - filled, dimensions, total_bombs, rng, excluded),
+                                     out=batch.grids[filled:stop])
+                    filled = stop
+                    continue
+
+                # The accepted candidates of each chunk fill the batch in order
+                candidates = count_neighbours(place_mines(chunk, dimensions, total_bombs, rng, excluded))
+                accepted = candidates[np.asarray(accept(candidates, first_click), dtype=bool)][:count - filled]
+                batch.grids[filled:filled + len(accepted)] = accepted
+                filled += len(accepted)
+                Metrics.count("batch.rejected", chunk - len(accepted))
+
+                if filled < count and unit * chunk >= count * attempts:
+                    raise ValueError("Only {} of {} boards were accepted by the filter in {} candidates"
+                                     .format(filled, count, unit * chunk))
+        except BaseException:
+            batch.unlink()
+            raise
+
+        Metrics.count("batch.boards", count)
+        return batch
+
+    @classmethod
+    def attach(cls, name: str) -> 'BoardBatch':
+        """
+        Open the batch of another process. Nothing is copied: grids is a view of the same memory.
+        """
+        return cls(_open(name))
+
+    def __len__(self) -> int:
+        return 0 if self.grids is None else self.grids.shape[0]
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.grids[index]
+
+    def __enter__(self) -> 'BoardBatch':
+        return self
+
+    def __exit__(self, *args):
+        if self.__owner:
+            self.unlink()
+        else:
+            self.close()
+
+    @property
+    def mines(self) -> np.ndarray:
+        """
+        Boolean array (boards, rows, cols) with True in the bombs (a new array).
+        """
+        return self.grids == BOMB
+
+    def board(self, index: int) -> MinesweeperBoard:
+        """
+        :return: a compact MinesweeperBoard with a copy of the board `index`, that can be used after the batch is
+                 closed
+        """
+        return MinesweeperBoard.from_grid(self.grids[index].copy(), self.first_click)
+
+    def close(self) -> None:
+        """
+        Close the buffer in this process. The buffer can not be closed while other arrays still use it.
+        """
+        if self.__memory is not None:
+            self.grids = None
+            self.__memory.close()
+            self.__memory = None
+
+    def unlink(self) -> None:
+        """
+        Close and remove the buffer. The processes that attached keep their views until they close them.
+        """
+        memory = self.__memory
+        self.close()
+
+        if memory is not None and self.__owner:
+            _created.discard(memory.name)
+            memory.unlink()
+
+
+def _run_chunk(name: str, start: int, stop: int, function: Callable[[np.ndarray, int], Any]) -> Any:
+    batch = BoardBatch.attach(name)
+
+    try:
+        return function(batch.grids[start:stop], start)
+    finally:
+        batch.close()
+
+
+def map_batch(function: Callable[[np.ndarray, int], Any], batch: BoardBatch, workers: int = None,
+              chunk_size: int = None) -> List[Any]:
+    """
+    Run a function over the boards of a batch in a process pool. Only the name of the buffer and the range of the
+    boards are sent to the workers, that attach to the buffer.
+
+    :param function: function(grids, start) of the module level (it is pickled), with grids the view of the boards
+                     start..start + len(grids). Its result must not keep the view.
+    :param batch: the batch of boards.
+    :param workers: the quantity of processes. If 1, the function runs in this process.
+    :param chunk_size: the quantity of boards of each work unit. If None, the boards are split in 4 units per worker.
+    :return: the results of the chunks, in the order of the boards
+    """
+    count = len(batch)
+
+    if workers == 1:
+        return [function(batch.grids, 0)] if count else list()
+
+    if chunk_size is None:
+        chunk_size = max(1, -(-count // ((workers or os.cpu_count() or 1) * 4)))
+
+    return run_units(_run_chunk, ((batch.name, start, min(count, start + chunk_size), function)
+                                  for start in range(0, count, chunk_size)), workers)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Array backed representation of the board. This module requires numpy.
+"""
+
+from typing import Tuple, List, Union, Iterator, Sequence
+
+import numpy as np
+
+BOMB = -1  # Sentinel value of the bombs in the int8 grid
+
+
+def count_neighbours(mask: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Count the bombs around every field of the board with a shifted sum over the bomb mask.
+
+    :param mask: boolean array (rows, cols) with True in the bomb positions, or (..., rows, cols) for many boards.
+    :param out: int8 array with the shape of the mask to write the counts in (e.g. a shared buffer). If None, a new
+                one is created.
+    :return: int8 array with the quantity of bombs nearby each field and BOMB in the bomb positions
+    """
+    rows, cols = mask.shape[-2:]
+
+    # Pad the mask with a border of zeroes, so all the 8 shifts have the same shape of the board
+    padded = np.zeros(mask.shape[:-2] + (rows + 2, cols + 2), dtype=np.int8)
+    padded[..., 1:-1, 1:-1] = mask
+
+    if out is None:
+        grid = np.zeros(mask.shape, dtype=np.int8)
+    else:
+        grid = out
+        grid[...] = 0
+
+    for r in range(3):
+        for c in range(3):
+            if r != 1 or c != 1:
+                grid += padded[..., r:r + rows, c:c + cols]
+
+    grid[mask] = BOMB
+    return grid
+
+
+def build_grid(dimensions: Tuple[int, int], bomb_indexes: Sequence[int]) -> np.ndarray:
+    """
+    Build the int8 grid of a board.
+
+    :param dimensions: the dimensions of the board.
+    :param bomb_indexes: the flat indexes (row * columns + col) of the bombs.
+    :return: int8 array with the board
+    """
+    mask = np.zeros(dimensions[0] * dimensions[1], dtype=bool)
+    mask[np.asarray(bomb_indexes, dtype=np.intp)] = True
+
+    return count_neighbours(mask.reshape(dimensions))
+
+
+class BoardRow(object):
+    """
+    Read only view of a row of an int8 grid: row[col] reads only that field, the row is not copied.
+    """
+    __row: np.ndarray = None
+
+    def __init__(self, row: np.ndarray):
+        self.__row = row
+
+    def __getitem__(self, col: Union[int, slice]) -> Union[int, str, List[Union[int, str]]]:
+        if isinstance(col, slice):
+            return self.tolist()[col]
+
+        value = int(self.__row[col])
+        return '*' if value == BOMB else value
+
+    def __len__(self) -> int:
+        return self.__row.shape[0]
+
+    def __iter__(self) -> Iterator[Union[int, str]]:
+        return iter(self.tolist())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (list, tuple, BoardRow)):
+            return NotImplemented
+
+        return self.tolist() == list(other)
+
+    def tolist(self) -> List[Union[int, str]]:
+        """
+        :return: the row as in the list based board
+        """
+        return ['*' if value == BOMB else value for value in self.__row.tolist()]
+
+
+class BoardView(object):
+    """
+    Read only view of an int8 grid that behaves like the list based board: board[row][col] is the quantity of
+    bombs nearby or '*' for a bomb.
+    """
+    __grid: np.ndarray = None
+
+    def __init__(self, grid: np.ndarray):
+        self.__grid = grid
+
+    def __getitem__(self, row: int) -> BoardRow:
+        return BoardRow(self.__grid[row])
+
+    def __len__(self) -> int:
+        return self.__grid.shape[0]
+
+    def __iter__(self) -> Iterator[BoardRow]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def __eq__(self, other) -> bool:
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
-from typing import Tuple, Dict
-import configparser
+from typing import Tuple, Dict, List, Any, Optional
+import json
+import os
 
 
 DEFAULT_CONFIG_FILE = "config.properties"
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "minesweeper")
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "minesweeper")  # results of the games
+SETTINGS_CACHE = "settings.json"  # parsed settings, in the cache directory
 SECTION_GENERAL = "GENERAL"
 SECTION_BOARD = "BOARD"
 SECTION_ENDGAME = "END_GAME"
@@ -18,7 +22,8 @@ class Language(object):
     end_game = {
         "TITLE": str,
         "WIN_MESSAGE": str,
-        "LOSE_MESSAGE": str
+        "LOSE_MESSAGE": str,
+        "LEADERBOARD": str
     }
     error = {
         "RUNTIME_ERROR": str
@@ -26,7 +31,11 @@ class Language(object):
     general = {
         "TITLE": str,
         "BOMBS": str,
-        "TIME": str
+        "TIME": str,
+        "HINT": str,
+        "HEAT_MAP": str,
+        "UNDO": str,
+        "REDO": str
     }
     quit = {
         "TITLE": str,
@@ -45,40 +54,25 @@ class GameSettings(object):
         "bomb_percent": float
     }
 
-    def __init__(self, config_file: str = None):
-        parser = configparser.RawConfigParser()
-        parser.read(DEFAULT_CONFIG_FILE if config_file is None else config_file, "utf-8")
+    def __init__(self, config_file: str = None, cache_dir: Optional[str] = CACHE_DIR):
+        """
+        :param config_file: the properties file. If None, DEFAULT_CONFIG_FILE.
+        :param cache_dir: the directory of the parsed settings (see load_values). If None, the files are always parsed.
+        """
+        values = load_values(DEFAULT_CONFIG_FILE if config_file is None else config_file, cache_dir)
 
         # Load game config
-        self.minimum["board_size"] = (parser.getint(SECTION_BOARD, 'min.width'),
-                                      parser.getint(SECTION_BOARD, 'min.height'))
-        self.minimum["bomb_percent"] = parser.getfloat(SECTION_BOARD, 'min.bomb_percent')
+        self.minimum["board_size"] = tuple(values["minimum"]["board_size"])
+        self.minimum["bomb_percent"] = values["minimum"]["bomb_percent"]
 
-        self.maximum["board_size"] = (parser.getint(SECTION_BOARD, 'max.width'),
-                                      parser.getint(SECTION_BOARD, 'max.height'))
-
-        self.maximum["bomb_percent"] = parser.getfloat(SECTION_BOARD, 'max.bomb_percent')
+        self.maximum["board_size"] = tuple(values["maximum"]["board_size"])
+        self.maximum["bomb_percent"] = values["maximum"]["bomb_percent"]
 
         # Load game messages
-        self.language.lang = parser.get(SECTION_GENERAL, 'lang')
-        parser.read("core/lang/{}.lang".format(self.language.lang), "utf-8")
-
-        # General
-        self.language.general["TITLE"] = parser.get(SECTION_GENERAL, "TITLE")
-        self.language.general["TIME"] = parser.get(SECTION_GENERAL, "TIME")
-        self.language.general["BOMBS"] = parser.get(SECTION_GENERAL, "BOMBS")
-
-        # Error
-        self.language.error["RUNTIME_ERROR"] = parser.get(SECTION_ERROR, "RUNTIME_ERROR")
+        self.language.lang = values["lang"]
 
-        # END_GAME
-        self.language.end_game["TITLE"] = parser.get(SECTION_ENDGAME, "TITLE")
-        self.language.end_game["WIN_MESSAGE"] = parser.get(SECTION_ENDGAME, "WIN_MESSAGE")
-        self.language.end_game["LOSE_MESSAGE"] = parser.get(SECTION_ENDGAME, "LOSE_MESSAGE")
-
-        # QUIT
-        self.language.quit["TITLE"] = parser.get(SECTION_QUIT, "TITLE")
-        self.language.quit["MESSAGE"] = parser.get(SECTION_QUIT, "MESSAGE")
+        for name, messages in values["messages"].items():
+            getattr(self.language, name).update(messages)
 
     def __str__(self):
         return "[GAME SETTINGS]\n" \
@@ -94,3 +88,106 @@ class GameSettings(object):
                     self.maximum["board_size"][0],
                     self.maximum["board_size"][1],
                     self.maximum["bomb_percent"])
+
+
+# Sections of the messages in the language files, by the name of the dict in Language
+MESSAGES = {"general": SECTION_GENERAL, "end_game": SECTION_ENDGAME, "quit": SECTION_QUIT, "error": SECTION_ERROR}
+
+# Parsed settings of this process: config file -> (stamps of the files, values)
+_parsed: Dict[str, Tuple[List[Any], dict]] = dict()
+
+
+def language_file(lang: str) -> str:
+    return "core/lang/{}.lang".format(lang)
+
+
+def file_stamps(files: List[str]) -> List[Any]:
+    """
+    :return: the path, modification time and size of each file (None for the missing ones)
+    """
+    stamps = list()
+
+    for file in files:
+        try:
+            stat = os.stat(file)
+            stamps.append([file, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            stamps.append([file, None, None])
+
+    return stamps
+
+
+def parse_values(config_file: str) -> dict:
+    """
+    Parse the config file and its language file.
+
+    :return: the values of the settings, in a JSON serializable dict
+    """
+    import configparser
+
+    parser = configparser.RawConfigParser()
+    parser.read(config_file, "utf-8")
+
+    lang = parser.get(SECTION_GENERAL, 'lang')
+    parser.read(language_file(lang), "utf-8")
+
+    return {
+        "lang": lang,
+        "minimum": {"board_size": [parser.getint(SECTION_BOARD, 'min.width'),
+                                   parser.getint(SECTION_BOARD, 'min.height')],
+                    "bomb_percent": parser.getfloat(SECTION_BOARD, 'min.bomb_percent')},
+        "maximum": {"board_size": [parser.getint(SECTION_BOARD, 'max.width'),
+                                   parser.getint(SECTION_BOARD, 'max.height')],
+                    "bomb_percent": parser.getfloat(SECTION_BOARD, 'max.bomb_percent')},
+        "messages": {name: {key: parser.get(section, key) for key in getattr(Language, name)}
+                     for name, section in MESSAGES.items()}
+    }
+
+
+def load_values(config_file: str, cache_dir: Optional[str] = CACHE_DIR) -> dict:
+    """
+    Get the values of the settings without parsing the files when they did not change: the parsed values are kept
+    in memory and in the cache directory, with the modification time and size of the config and language files.
+
+    :param config_file: the properties file.
+    :param cache_dir: the cache directory. If None, only the memory is used.
+    :return: the values of the settings (see parse_values)
+    """
+    key = os.path.abspath(config_file)
+    cached = _parsed.get(key)
+    cache_file = os.path.join(cache_dir, SETTINGS_CACHE) if cache_dir is not None else None
+
+    if cached is None and cache_file is not None:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as file:
+                cached = json.load(file).get(key)
+        except (OSError, ValueError, AttributeError):
+            cached = None
+
+    if cached is not None:
+        stamps, values = cached
+        if file_stamps([stamp[0] for stamp in stamps]) == stamps:
+            _parsed[key] = cached
+            return values
+
+    values = parse_values(config_file)
+    cached = _parsed[key] = (file_stamps([config_file, language_file(values["lang"])]), values)
+
+    if cache_file is not None:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            entries = dict()
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Written in another file and renamed, so a reader never sees a partial file
+            with open(cache_file + ".tmp", "w", encoding="utf-8") as file:
+                entries[key] = cached
+                json.dump(entries, file)
+            os.replace(cache_file + ".tmp", cache_file)
+        except (OSError, TypeError, AttributeError):
+            pass
+
+    return values
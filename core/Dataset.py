@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Export of training data for move prediction: the states of self-played games as samples of what the player sees and
+the answer, in sharded compressed .npz files. This module requires numpy.
+
+Each shard is written by a worker of a process pool from its own seed, derived from the seed of the run and the
+number of the shard, so the shards do not depend on the quantity of workers and a stopped run is resumed by writing
+only the shards that are missing. A shard is written to a temporary file and renamed, so a shard file is always
+complete, and the settings of the run are kept in MANIFEST.
+
+Arrays of a shard, with one sample before each move of the games:
+- visible: int8 (samples, rows, cols), the board seen by the player (see GameState.visible).
+- mines: bool (samples, rows, cols), the bombs.
+- safe: bool (samples, rows, cols), the hidden fields without a bomb: the moves that do not lose.
+- game: int32 (samples,), the game of each sample in the shard (e.g. to keep the samples of a game in the same split).
+
+A shard has whole games: it is complete when it has at least the requested quantity of samples.
+"""
+
+from typing import Tuple, List, Dict, Iterator
+from random import Random
+from time import perf_counter
+import argparse
+import json
+import os
+
+import numpy as np
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState, HIDDEN_VALUE
+from core.Simulator import STRATEGIES, SolverStrategy, parse_dimensions
+from core.Placement import new_seed, derive_seed
+from core.Workers import run_units
+from core import Metrics
+
+MANIFEST = "manifest.json"
+SHARD_NAME = "shard-{:05d}.npz"
+SAMPLES = 10000  # samples of a shard, about 15 MB in memory for the 16x30 boards
+
+Sample = Tuple[np.ndarray, np.ndarray, np.ndarray]  # (visible, mines, safe)
+
+
+def play_samples(board: MinesweeperBoard, strategy, rng: Random) -> Iterator[Sample]:
+    """
+    Play a game and give the state before each move. The visible board is updated with the fields changed by each
+    move, it is not built again.
+
+    :param board: the generated board.
+    :param strategy: the object that chooses the moves (see core.Simulator).
+    :param rng: the random generator of the strategy.
+    :return: generator of (visible board, bombs, safe fields): new arrays for each move, except the bombs (the same
+             array for the whole game)
+    """
+    state = GameState(board)
+    observe = getattr(strategy, "observe", None)
+
+    mines = np.zeros(board.dimensions, dtype=bool)
+    for row, col in board.bombs:
+        mines[row, col] = True
+
+    visible = np.array(state.visible(), dtype=np.int8).reshape(board.dimensions)
+
+    while not state.finished:
+        yield visible.copy(), mines, (visible == HIDDEN_VALUE) & ~mines
+
+        changed = state.apply(strategy.next_move(state, rng))
+        for coords in changed:
+            visible[coords] = state.visible_value(coords)
+
+        if observe is not None:
+            observe(changed)
+
+
+@Metrics.timed("dataset.shard")
+def write_shard(directory: str, shard: int, dimensions: Tuple[int, int], bomb_percent: float, strategy: str,
+                samples: int, seed: int) -> Tuple[int, int]:
+    """
+    Work unit of the export: play games until there are `samples` samples and write them in the file of the shard.
+
+    :return: (samples, games) of the shard
+    """
+    rng = Random(derive_seed(seed, shard))
+    visible, mines, safe, games = list(), list(), list(), list()
+    game = 0
+
+    while len(visible) < samples:
+        board = MinesweeperBoard(dimensions, bomb_percent)
+        board.generate_board(rng)
+
+        # A new strategy for each game, the strategies can keep state between the moves
+        for sample in play_samples(board, STRATEGIES[strategy](), rng):
+            visible.append(sample[0])
+            mines.append(sample[1])
+            safe.append(sample[2])
+            games.append(game)
+
+        game += 1
+
+    path = os.path.join(directory, SHARD_NAME.format(shard))
+    temporary = path + ".tmp"
+
+    with open(temporary, "wb") as file:
+        np.savez_compressed(file, visible=np.stack(visible), mines=np.stack(mines), safe=np.stack(safe),
+                            game=np.array(games, dtype=np.int32))
+
+    os.replace(temporary, path)
+    return len(visible), game
+
+
+class ExportResult(object):
+    shards: int = 0  # shards written by this run
+    skipped: int = 0  # shards written by a previous run
+    samples: int = 0
+    games: int = 0
+    seconds: float = 0
+
+    def __init__(self, shards: int, skipped: int, samples: int, games: int, seconds: float):
+        self.shards = shards
+        self.skipped = skipped
+        self.samples = samples
+        self.games = games
+        self.seconds = seconds
+
+    @property
+    def samples_per_second(self) -> float:
+        return self.samples / self.seconds if self.seconds else 0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "shards": self.shards,
+            "skipped": self.skipped,
+            "samples": self.samples,
+            "games": self.games,
+            "samples_per_second": self.samples_per_second
+        }
+
+    def __str__(self):
+        return "=== [EXPORT] ===\n" \
+               "- Shards written: {} ({} already written)\n" \
+               "- Samples: {} of {} games\n" \
+               "- Samples per second: {:.1f}\n" \
+            .format(self.shards, self.skipped, self.samples, self.games, self.samples_per_second)
+
+
+def read_manifest(directory: str) -> Dict:
+    """
+    :return: the settings of the run of a directory, or an empty dict if there is no run
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST)) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return dict()
+
+
+def export(directory: str, shards: int, dimensions: Tuple[int, int], bomb_percent: float,
+           strategy: str = SolverStrategy.name, samples: int = SAMPLES, workers: int = None,
+           seed: int = None) -> ExportResult:
+    """
+    Write the shards 0 .. shards - 1 of a run that are not in the directory yet. A run is resumed (or extended with
+    more shards) with the same directory and settings; the seed is read from the manifest.
+
+    :param directory: the directory of the run, created if it does not exist.
+    :param shards: the quantity of shards of the run.
+    :param dimensions: the dimensions of the boards.
+    :param bomb_percent: the bomb percent of the boards.
+    :param strategy: the name of the strategy that plays the games (see core.Simulator.STRATEGIES).
+    :param samples: the minimum quantity of samples of a shard.
+    :param workers: the quantity of processes. If 1, the shards are written in this process.
+    :param seed: the seed of the run. If None, the seed of the manifest or a new one.
+    :return: the statistics of the shards written by this call
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError("Unknown strategy: {}".format(strategy))
+
+    # Validate the settings before starting the workers
+    MinesweeperBoard(dimensions, bomb_percent)
+
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    settings = {"dimensions": list(dimensions), "bomb_percent": bomb_percent, "strategy": strategy,
+                "samples": samples, "seed": manifest.get("seed", new_seed()) if seed is None else seed}
+
+    for name, value in settings.items():
+        if name in manifest and manifest[name] != value:
+            raise ValueError("The directory has a run with other settings ({}: {} instead of {})"
+                             .format(name, manifest[name], value))
+
+    temporary = os.path.join(directory, MANIFEST + ".tmp")
+    with open(temporary, "w") as file:
+        json.dump(dict(settings, shards=max(shards, manifest.get("shards", 0))), file, indent=4)
+    os.replace(temporary, os.path.join(directory, MANIFEST))
+
+    missing = [shard for shard in range(shards)
+               if not os.path.exists(os.path.join(directory, SHARD_NAME.format(shard)))]
+    start = perf_counter()
+    results = run_units(write_shard, ((directory, shard, dimensions, bomb_percent, strategy, samples, settings["seed"])
+                                      for shard in missing), workers)
+
+    return ExportResult(len(missing), shards - len(missing), sum(r[0] for r in results),
+                        sum(r[1] for r in results), perf_counter() - start)
+
+
+def load_shard(path: str) -> Dict[str, np.ndarray]:
+    """
+    :return: the arrays of a shard file
+    """
+    with np.load(path) as shard:
+        return {name: shard[name] for name in shard.files}
+
+
+def iter_shards(directory: str) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Read the shards of a run one at a time, in order. The shards not written yet are skipped.
+    """
+    for shard in range(read_manifest(directory).get("shards", 0)):
+        path = os.path.join(directory, SHARD_NAME.format(shard))
+
+        if os.path.exists(path):
+            yield load_shard(path)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog="minesweeper.py export",
+                                     description="Export the states of self-played games as training data")
+    parser.add_argument("directory")
+    parser.add_argument("--shards", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="samples of a shard")
+    parser.add_argument("-d", "--dimensions", type=parse_dimensions, default=(16, 16), help="ROWSxCOLS")
+    parser.add_argument("-b", "--bomb-percent", type=float, default=15)
+    parser.add_argument("-s", "--strategy", choices=sorted(STRATEGIES), default=SolverStrategy.name)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="default: the quantity of CPUs")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print(export(args.directory, args.shards, args.dimensions, args.bomb_percent, args.strategy, args.samples,
+                 args.workers, args.seed))
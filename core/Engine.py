@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from typing import Tuple, List, NewType
-from random import randint
+from typing import Tuple, List, NewType, Iterator, Callable
+from random import Random
 from core.Time import Time
 from core.Config import GameSettings
+from core.Placement import sample_cells, new_seed
+from core import Metrics
 
 Board = NewType("Board", List[List[int]])
 
+ACCEPT_ATTEMPTS = 10000  # candidates checked by the rejection filter of generate_board
+
 
 class Game(object):
     """
@@ -16,16 +20,15 @@ class Game(object):
     win: bool = None
     exit: bool = False
 
-    time: Time = Time()
-
-    marked_fields: List[Tuple[int, int]] = list()  # List with the marked fields
-    c_marked_fields: int = 0
+    time: Time = None
 
     settings: GameSettings = None
 
-    def __init__(self, player: str, settings: GameSettings):
+    def __init__(self, player: str, settings: GameSettings = None):
         self.player = player
         self.settings = settings
+        # Created per instance, so two games in the same process do not share the time
+        self.time = Time()
 
 
 class MinesweeperBoard(object):
@@ -45,29 +48,47 @@ class MinesweeperBoard(object):
     __total_fields: int
     __total_bombs: int
 
-    def __init__(self, dimensions: Tuple[int, int], bomb_percent: float):
+    __first_click: Tuple[int, int] = None
+    __no_guess: bool = False
+    __seed: int = None  # seed of the random generator of the board, None if the bombs were given
+
+    __compact: bool = False
+    __grid = None  # int8 numpy array with the board, only in the compact mode
+    __bomb_indexes: List[int] = None  # flat indexes of the bombs, only in the compact mode
+
+    def __init__(self, dimensions: Tuple[int, int], bomb_percent: float, compact: bool = False):
         """
         Create the Minesweeper Object. The constructor only test the dimensions of the board and the set the bomb
         percent.
 
         :param dimensions: the dimensions of the board.
         :param bomb_percent: the bomb percent in the table. Can not be less than 5% of the board size.
+        :param compact: store the board in an int8 numpy array (see core.Compact) instead of nested lists.
         """
+        if compact:
+            try:
+                import core.Compact  # noqa: F401
+            except ImportError:
+                raise ImportError("The compact board requires numpy")
+
+        self.__compact = compact
+
         if dimensions[1] < dimensions[0] or (dimensions[0] * dimensions[1] < 6**2):
             raise ValueError("Table dimension is not valid")
         else:
             self.__dimensions = dimensions
             self.__total_fields = dimensions[0] * dimensions[1]
 
-        minimum_bomb_percent = int(self.__total_fields * (MinesweeperBoard.minimum_percentage / 100))
+        minimum_bombs = int(self.__total_fields * (MinesweeperBoard.minimum_percentage / 100))
 
-        if minimum_bomb_percent > bomb_percent:
+        # Compare percent with percent, otherwise boards with more than 100 fields could not be created
+        if MinesweeperBoard.minimum_percentage > bomb_percent:
             raise ValueError("Quantity of bombs can not be less than {}% of the total fields.\n"
                              "- Quantity of fields: {}\n"
-                             "- Minimum percentage of bombs: {}%"
+                             "- Minimum quantity of bombs: {}"
                              .format(MinesweeperBoard.minimum_percentage,
                                      self.__total_fields,
-                                     minimum_bomb_percent))
+                                     minimum_bombs))
 
         elif bomb_percent > 100:
             raise ValueError("Percentage of bombs can not be greater than 100%!")
@@ -77,47 +98,217 @@ class MinesweeperBoard(object):
             # round the number
             self.__total_bombs = int(total_bombs) if total_bombs - int(total_bombs) < 0.5 else int(total_bombs) + 1
 
-    def generate_board(self) -> None:
+    @classmethod
+    def __stored(cls, dimensions: Tuple[int, int], total_bombs: int, compact: bool) -> 'MinesweeperBoard':
+        """
+        Create a board with the settings of a stored board, without the validation of the settings of the
+        constructor: a board that was valid when it was stored (e.g. with less than minimum_percentage bombs) is
+        loaded as it is.
+        """
+        if dimensions[0] < 1 or dimensions[1] < 1:
+            raise ValueError("Table dimension is not valid")
+
+        board = cls.__new__(cls)
+        board.__compact = compact
+        board.__dimensions = (dimensions[0], dimensions[1])
+        board.__total_fields = dimensions[0] * dimensions[1]
+        board.__bomb_percent = total_bombs * 100 / board.__total_fields
+        board.__total_bombs = total_bombs
+        return board
+
+    @classmethod
+    def from_bombs(cls, dimensions: Tuple[int, int], bombs: List[Tuple[int, int]], compact: bool = False,
+                   first_click: Tuple[int, int] = None, no_guess: bool = False) -> 'MinesweeperBoard':
+        """
+        Create a board with the bombs in known positions, e.g. to load a saved board. The settings are not validated
+        as in the constructor, only the positions of the bombs.
+
+        :param dimensions: the dimensions of the board.
+        :param bombs: the (row, col) position of all the bombs.
+        :param compact: see the constructor.
+        :param first_click: the first click the board was generated for, if any.
+        :param no_guess: the board was generated to be solved without guessing from the first click.
+        :return: the generated board
+        """
+        board = cls.__stored(dimensions, len(bombs), compact)
+        board.__first_click = first_click
+        board.__no_guess = no_guess
+
+        columns = dimensions[1]
+        bomb_indexes = sorted(set(row * columns + col for row, col in bombs))
+
+        if len(bomb_indexes) != len(bombs) or \
+                any(not (0 <= row < dimensions[0] and 0 <= col < columns) for row, col in bombs):
+            raise ValueError("The bombs must be distinct fields of the board")
+
+        board.__build(bomb_indexes)
+        return board
+
+    @classmethod
+    def from_grid(cls, grid, first_click: Tuple[int, int] = None) -> 'MinesweeperBoard':
+        """
+        Create a compact board from its int8 grid, e.g. one board of a core.Batch.BoardBatch. The board keeps the
+        array, it is not copied. The settings are not validated as in the constructor.
+
+        :param grid: int8 numpy array (rows, cols) with the quantity of bombs nearby and core.Compact.BOMB in the
+                     bombs.
+        :param first_click: the first click the board was generated for, if any.
+        :return: the board
+        """
+        from core.Compact import BOMB, BoardView
+        import numpy as np
+
+        dimensions = (int(grid.shape[0]), int(grid.shape[1]))
+        bomb_indexes = np.flatnonzero(grid == BOMB).tolist()
+
+        board = cls.__stored(dimensions, len(bomb_indexes), compact=True)
+        board.__first_click = first_click
+        board.__bomb_indexes = bomb_indexes
+        board.__grid = grid
+        board.__board = BoardView(grid)
+        return board
+
+    @classmethod
+    def from_seed(cls, dimensions: Tuple[int, int], bomb_percent: float, seed: int, compact: bool = False,
+                  first_click: Tuple[int, int] = None, no_guess: bool = False) -> 'MinesweeperBoard':
+        """
+        Generate again the board of a seed: the same settings and seed always give the same bombs, so a board can
+        be stored as its seed.
+
+        :param dimensions: the dimensions of the board.
+        :param bomb_percent: the bomb percent of the board.
+        :param seed: the seed property of the board.
+        :param compact: see the constructor.
+        :param first_click: see generate_board.
+        :param no_guess: see generate_board. A no-guess board is only the same if its search ended in the time
+                         budget both times.
+        :return: the generated board
+        """
+        board = cls(dimensions, bomb_percent, compact)
+        board.generate_board(seed=seed, first_click=first_click, no_guess=no_guess)
+        return board
+
+    @Metrics.timed("board.generate")
+    def generate_board(self, rng: Random = None, dense: bool = None, first_click: Tuple[int, int] = None,
+                       no_guess: bool = False, seed: int = None,
+                       accept: Callable[['MinesweeperBoard'], bool] = None, attempts: int = ACCEPT_ATTEMPTS) -> None:
+        """
+        Generate the board with the bombs and all near fields filled. The board owns its random generator, created
+        from the seed property, so the board can be generated again with from_seed.
+
+        :param rng: the random generator that chooses the seed of the board (e.g. to generate many boards from one
+                    seed). If None, the seed parameter is used.
+        :param dense: force (True) or disable (False) the placement of the safe fields instead of the bombs. If None,
+                      it is decided by the percentage of bombs.
+        :param first_click: the (row, col) of the first click of the player. The bombs are placed away from it.
+        :param no_guess: generate a board that can be solved from the first click without guessing (see
+                         core.Generator). If there is no first click, the board is generated for the center of the
+                         board (available in the first_click property). Boards generated in advance are kept by
+                         core.Pool.
+        :param seed: the seed of the board. If None (and there is no rng), a new one is used.
+        :param accept: rejection filter (e.g. core.Analysis.DifficultyFilter): boards are generated until it accepts
+                       one. Each candidate gets its own seed, so from_seed gives the accepted board without the filter.
+        :param attempts: the maximum quantity of candidates checked by the filter.
+        :return: None
+        """
+        if rng is not None:
+            seed = rng.getrandbits(64)
+        elif seed is None:
+            seed = new_seed()
+
+        # The first candidate is the seed itself, the board without a filter
+        candidates = Random(seed)
+
+        for attempt in range(attempts if accept is not None else 1):
+            self.__generate(seed, dense, first_click, no_guess)
+
+            if accept is None or accept(self):
+                return
+
+            Metrics.count("board.rejected")
+            seed = candidates.getrandbits(64)
+
+        raise ValueError("No board was accepted by the filter in {} attempts".format(attempts))
+
+    def __generate(self, seed: int, dense: bool, first_click: Tuple[int, int], no_guess: bool) -> None:
+        """
+        Generate the board of a seed, see generate_board.
+        """
+        self.__first_click = first_click
+        self.__no_guess = False
+        self.__seed = seed
+        rng = Random(seed)
+
+        if no_guess:
+            from core import Generator
+
+            if self.__first_click is None:
+                self.__first_click = Generator.default_click(self.__dimensions)
+
+            bombs, self.__no_guess = Generator.generate_no_guess(self.__dimensions, self.__total_bombs,
+                                                                 self.__first_click, rng)
+            self.__build(bombs)
+        elif first_click is not None:
+            from core.Generator import safe_click_bombs
+
+            self.__build(safe_click_bombs(self.__dimensions, self.__total_bombs, first_click, rng, dense))
+        else:
+            # Sample all the bombs in the grid (without replacement)
+            self.__build(sample_cells(self.__total_fields, self.__total_bombs, rng, dense))
+
+    def __build(self, bomb_indexes: List[int]) -> None:
         """
-        Generate the board with the bombs and all near fields filled
+        Build the board from the sorted flat indexes (row * columns + col) of the bombs.
 
+        :param bomb_indexes: the flat indexes of the bombs.
         :return: None
         """
+        if self.__compact:
+            self.__generate_grid(bomb_indexes)
+            return
+
         # Create the board with zeroes
         self.__board = list()
         for i in range(self.__dimensions[0]):
             self.__board.append([0 for b in range(self.__dimensions[1])])
 
-        self.__place_bombs()
+        self.__place_bombs(bomb_indexes)
 
-    def __place_bombs(self) -> None:
+    @Metrics.timed("board.place_bombs")
+    def __place_bombs(self, bomb_indexes: List[int]) -> None:
         """
-        Rand all the bombs in the grid and place in the list of bombs and sum 1 to the fields nearby.
+        Place all the bombs in the grid and in the list of bombs and sum 1 to the fields nearby.
 
+        :param bomb_indexes: the flat indexes of the bombs.
         :return: None
         """
-        if self.__bombs is None:
-            self.__bombs = list()
-        else:
-            self.__bombs.clear()
+        columns = self.__dimensions[1]
+        self.__bomb_indexes = None
+        # The bombs are sorted by (row, col) because the indexes are sorted
+        self.__bombs = [divmod(index, columns) for index in bomb_indexes]
 
-        # Rand bombs
-        for b in range(self.__total_bombs):
-            bomb = None
+        for bomb in self.__bombs:
+            self.__board[bomb[0]][bomb[1]] = '*'
 
-            try:
-                while True:
-                    # generate a (x, y) point
-                    bomb = (randint(0, self.__dimensions[0] - 1), randint(0, self.__dimensions[1] - 1))
-                    self.__bombs.index(bomb)  # verify if this point is included in solution set
-            except ValueError:
-                # if not, insert it into the list
-                self.__bombs.append(bomb)
-                self.__board[bomb[0]][bomb[1]] = '*'
-                # Adds 1 to all fields nearby the bomb
-                self.__count_fields(bomb)
-
-        self.__bombs.sort()
+        for bomb in self.__bombs:
+            # Adds 1 to all fields nearby the bomb
+            self.__count_fields(bomb)
+
+    @Metrics.timed("board.build_grid")
+    def __generate_grid(self, bomb_indexes: List[int]) -> None:
+        """
+        Generate the board in the compact mode. The neighbour counts are computed in one vectorized pass over the
+        bomb mask and the list of bombs is only built when it is requested.
+
+        :param bomb_indexes: the flat indexes of the bombs.
+        :return: None
+        """
+        from core.Compact import build_grid, BoardView
+
+        self.__bomb_indexes = bomb_indexes
+        self.__bombs = None
+        self.__grid = build_grid(self.__dimensions, self.__bomb_indexes)
+        self.__board = BoardView(self.__grid)
 
     def __count_fields(self, bomb: Tuple[int, int]) -> None:
         """
@@ -151,8 +342,41 @@ class MinesweeperBoard(object):
 
     @property
     def bombs(self):
+        if self.__bombs is None and self.__bomb_indexes is not None:
+            columns = self.__dimensions[1]
+            self.__bombs = [divmod(index, columns) for index in self.__bomb_indexes]
+
         return self.__bombs
 
+    @property
+    def seed(self):
+        """
+        The seed of the generated board (see from_seed), or None if the board was created from its bombs.
+        """
+        return self.__seed
+
+    @property
+    def first_click(self):
+        return self.__first_click
+
+    @property
+    def no_guess(self):
+        """
+        True if the board was generated by the no-guess mode and can be solved from first_click without guessing.
+        """
+        return self.__no_guess
+
+    @property
+    def compact(self):
+        return self.__compact
+
+    @property
+    def grid(self):
+        """
+        The int8 numpy array of the board (core.Compact.BOMB in the bombs), or None if the board is not compact.
+        """
+        return self.__grid
+
     @property
     def bomb_percent(self):
         return self.__bomb_percent
@@ -172,7 +396,7 @@ class MinesweeperBoard(object):
                        self.__total_fields,
                        self.__total_bombs,
                        self.__bomb_percent,
-                       self.__bombs)
+                       self.bombs)
 
     def format_board(self) -> str:
         """
@@ -180,53 +404,30 @@ class MinesweeperBoard(object):
 
         :return: String containing the actual state of the board
         """
-        line = str()
+        return "".join(self.iter_format_board())
 
-        def print_value_line(row: List[int]):
-            """
-            Print the valid row of the board.
+    def iter_format_board(self) -> Iterator[str]:
+        """
+        Format the board line by line, e.g. to write a large board in a file without building the whole string:
+        file.writelines(board.iter_format_board())
 
-            :param row: The row to be printable
-            :return: None
-            """
-            str_line = "║"
+        :return: generator of the lines of format_board, with the line breaks
+        """
+        columns = self.__dimensions[1]
 
-            for j in row:
-                str_line += " {} ║".format(j)
+        def separator(start_line: str, connector: str, end_line: str) -> str:
+            return start_line + "═══{}".format(connector) * (columns - 1) + "═══" + end_line + "\n"
 
-            return str_line + "\n"
+        top = separator("╔", "╦", "╗")  # the line before the first row
+        middle = separator("╠", "╬", "╣")  # the line between the rows
+        bottom = separator("╚", "╩", "╝")  # the line after the last row
 
-        lines = self.__dimensions[0]
-        columns = self.__dimensions[1]
+        yield top
+
+        for i, row in enumerate(self.__board):
+            if i > 0:
+                yield middle
+
+            yield "║" + "║".join(" {} ".format(value) for value in row) + "║\n"
 
-        for i in range(lines + 1):
-            if i == 0:  # Change the charset to print the line before the first row
-                charset = {
-                    "start_line": "╔",
-                    "end_line": "╗",
-                    "connector": "╦"
-                }
-            elif i == lines:  # Change the charset to print the line after the last row
-                charset = {
-                    "start_line": "╚",
-                    "end_line": "╝",
-                    "connector": "╩"
-                }
-            else:  # Change the charset to print the line between the rows
-                charset = {
-                    "start_line": "╠",
-                    "end_line": "╣",
-                    "connector": "╬"
-                }
-
-            # Print the line plus the row
-            line += charset["start_line"]
-            for c in range(columns):
-                line += "═══{}".format(charset["end_line"] if c == columns - 1 else charset["connector"])
-
-            line += "\n"
-
-            if i < lines:
-                line += print_value_line(self.__board[i])
-
-        return line
+        yield bottom
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Generation of boards that can be solved without guessing from the first click.
+"""
+
+from typing import Tuple, List, Optional
+from random import Random
+from collections import deque
+from time import time
+import os
+
+from core.Engine import MinesweeperBoard
+from core.Placement import sample_cells, neighbourhood, new_seed, derive_seed
+from core.State import GameState
+from core.Solver import Solver
+
+TIME_BUDGET = 5.0  # seconds to search a no-guess board before the fallback
+ATTEMPTS = 25  # candidates checked by a worker in each work unit
+
+
+def default_click(dimensions: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    The first click of the boards generated before the player clicks: the center of the board.
+    """
+    return dimensions[0] // 2, dimensions[1] // 2
+
+
+def safe_click_bombs(dimensions: Tuple[int, int], total_bombs: int, first_click: Tuple[int, int],
+                     rng: Random = None, dense: bool = None) -> List[int]:
+    """
+    Place the bombs outside of the first click and its neighbours, so the first click always opens an empty field.
+    If there are too many bombs for that, only the first click is kept safe.
+
+    :return: the sorted flat indexes of the bombs
+    """
+    excluded = neighbourhood(dimensions, first_click)
+
+    if dimensions[0] * dimensions[1] - len(excluded) < total_bombs:
+        excluded = [first_click[0] * dimensions[1] + first_click[1]]
+
+    return sample_cells(dimensions[0] * dimensions[1], total_bombs, rng, dense, excluded)
+
+
+def is_solvable(board: MinesweeperBoard, first_click: Tuple[int, int], solver: Solver = None) -> bool:
+    """
+    Verify if a board can be won from the first click only opening fields that the solver proves safe.
+    """
+    solver = Solver() if solver is None else solver
+    state = GameState(board)
+    state.reveal(first_click)
+
+    while not state.finished:
+        safe = [coords for coords in solver.solve(state).safe if not state.is_revealed(coords)]
+
+        if not safe:
+            return False
+
+        for coords in safe:
+            state.reveal(coords)
+
+    return state.win is True
+
+
+def search(dimensions: Tuple[int, int], total_bombs: int, first_click: Tuple[int, int], seed: int,
+           first: int = 0, attempts: int = ATTEMPTS, deadline: float = None) -> Optional[List[int]]:
+    """
+    Work unit of the generator: check the candidates first, first + 1, ... until one is solvable. The candidate n
+    is placed with its own stream (derived from the seed and n), so the result does not depend on how the
+    candidates are split in work units.
+
+    :param deadline: the time.time() after which no more candidates are checked (the clock of all the processes).
+    :return: the flat indexes of the bombs of the first solvable candidate, or None
+    """
+    solver = Solver()
+    cols = dimensions[1]
+
+    for candidate in range(first, first + attempts):
+        if deadline is not None and time() >= deadline:
+            return None
+
+        bombs = safe_click_bombs(dimensions, total_bombs, first_click, Random(derive_seed(seed, candidate)))
+        board = MinesweeperBoard.from_bombs(dimensions, [divmod(index, cols) for index in bombs])
+
+        if is_solvable(board, first_click, solver):
+            return bombs
+
+    return None
+
+
+def generate_no_guess(dimensions: Tuple[int, int], total_bombs: int, first_click: Tuple[int, int],
+                      rng: Random = None, workers: int = None,
+                      time_budget: float = TIME_BUDGET) -> Tuple[List[int], bool]:
+    """
+    Search a board that can be solved without guessing from the first click. The candidates are checked in
+    parallel by a pool of processes (or in this process if there is only one worker) until the time budget ends.
+
+    The result is the first solvable candidate in order, not the first found, so the same rng gives the same
+    board for any quantity of workers (if the search ends in the time budget).
+
+    :param dimensions: the dimensions of the board.
+    :param total_bombs: the quantity of bombs.
+    :param first_click: the (row, col) of the first click.
+    :param rng: chooses the seed of the search.
+    :param workers: the quantity of processes. If None, the quantity of CPUs, or 1 in a worker process (e.g. of a
+                    pool that generates many boards), so a pool does not start another one in each worker.
+    :param time_budget: the maximum time of the search in seconds.
+    :return: (the flat indexes of the bombs, True if the board is no-guess). If the time budget ends, the board
+             only has a safe first click.
+    """
+    seed = new_seed() if rng is None else rng.getrandbits(64)
+    deadline = time() + time_budget
+
+    if workers is None:
+        from multiprocessing import current_process
+
+        workers = 1 if current_process().name != "MainProcess" else os.cpu_count() or 1
+
+    if workers == 1:
+        candidate = 0
+        while time() < deadline:
+            bombs = search(dimensions, total_bombs, first_click, seed, candidate, attempts=1)
+            if bombs is not None:
+                return bombs, True
+            candidate += 1
+    else:
+        from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+        # The units stop at the deadline and the executor is not waited for, so the search ends in the time budget
+        executor = ProcessPoolExecutor(max_workers=workers)
+        running = deque()  # work units in the order of their candidates, the oldest is always the next result
+
+        try:
+            running.extend(executor.submit(search, dimensions, total_bombs, first_click, seed, unit * ATTEMPTS,
+                                           ATTEMPTS, deadline)
+                           for unit in range(workers))
+            unit = workers
+
+            while time() < deadline:
+                try:
+                    bombs = running[0].result(timeout=max(0.0, deadline - time()))
+                except TimeoutError:
+                    break
+
+                if bombs is not None:
+                    return bombs, True
+
+                running.popleft()
+                running.append(executor.submit(search, dimensions, total_bombs, first_click, seed, unit * ATTEMPTS,
+                                               ATTEMPTS, deadline))
+                unit += 1
+        finally:
+            for other in running:
+                other.cancel()
+            executor.shutdown(wait=False)
+
+    # The fallback has its own stream, it does not depend on the quantity of candidates checked
+    return safe_click_bombs(dimensions, total_bombs, first_click, Random(derive_seed(seed, -1))), False
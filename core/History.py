@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Undo, redo and jump to any move of a game.
+
+Each move keeps only the fields it changed (the fields opened by a reveal or a chord, or the toggled flag) as the
+numbers row * cols + col in an array of uint32, not a copy of the board. Snapshots of the whole state (one byte per
+field) are taken when the moves since the last snapshot changed as many fields as the board has, so they take less
+memory than the moves. A jump goes through the moves from the current position, or restores the nearest snapshot
+when the moves in between changed more fields than the board has (e.g. a flag toggled many times).
+"""
+
+from typing import Tuple, List
+from array import array
+from bisect import bisect_right
+from time import time
+
+from core.State import GameState, Move, Snapshot, UNDO, REDO
+from core.Archive import TimedMove
+from core.Time import Time
+from core import Metrics
+
+# Action of a move, the number of its field and the numbers of the fields it changed
+Delta = Tuple[str, int, array]
+
+
+class History(object):
+    """
+    Moves of a game, applied to its state through apply, that can be undone and redone.
+
+        history = History(state)
+        history.apply((REVEAL, coords))
+        history.undo()
+        history.jump(10)
+
+    A new move after an undo drops the moves that could be redone.
+    """
+    state: GameState = None
+    checkpoint_cells: int = None  # fields changed by the moves between two snapshots
+
+    __cols: int
+    __fields: int  # fields of the board
+    __moves: List[Delta] = None
+    __changed: List[int] = None  # __changed[i]: fields changed by the first i moves
+    __position: int = 0  # quantity of moves applied to the state
+    __checkpoints: List[int] = None  # positions of the snapshots, sorted
+    __snapshots: List[Snapshot] = None
+
+    def __init__(self, state: GameState, checkpoint_cells: int = None):
+        """
+        :param state: the state of the game, at the position 0 of the history.
+        :param checkpoint_cells: the fields changed between two snapshots. If None, the fields of the board.
+        """
+        rows, cols = state.board.dimensions
+        self.state = state
+        self.checkpoint_cells = rows * cols if checkpoint_cells is None else checkpoint_cells
+        self.__cols = cols
+        self.__fields = rows * cols
+        self.__moves = list()
+        self.__changed = [0]
+        self.__checkpoints = [0]
+        self.__snapshots = [state.snapshot()]
+
+    def __len__(self) -> int:
+        return len(self.__moves)
+
+    @property
+    def position(self) -> int:
+        """
+        Quantity of moves applied to the state: the moves from the position on were undone and can be redone.
+        """
+        return self.__position
+
+    def moves(self) -> List[Move]:
+        """
+        :return: all the moves, including the ones that were undone
+        """
+        return [(action, divmod(field, self.__cols)) for action, field, cells in self.__moves]
+
+    def __fields_of(self, position: int) -> List[Tuple[int, int]]:
+        return [divmod(cell, self.__cols) for cell in self.__moves[position][2]]
+
+    def apply(self, move: Move) -> List[Tuple[int, int]]:
+        """
+        Apply a move to the state and keep the fields it changed. A move that changes nothing is not kept.
+
+        :param move: the (action, (row, col)) of the move.
+        :return: the fields changed by the move
+        """
+        changed = self.state.apply(move)
+
+        if not changed:
+            return changed
+
+        position = self.__position
+        del self.__moves[position:]
+        del self.__changed[position + 1:]
+        while self.__checkpoints[-1] > position:
+            self.__checkpoints.pop()
+            self.__snapshots.pop()
+
+        action, (row, col) = move
+        self.__moves.append((action, row * self.__cols + col,
+                             array("I", [r * self.__cols + c for r, c in changed])))
+        self.__changed.append(self.__changed[-1] + len(changed))
+        self.__position = position + 1
+
+        if self.__changed[-1] - self.__changed[self.__checkpoints[-1]] >= self.checkpoint_cells:
+            self.__checkpoints.append(self.__position)
+            self.__snapshots.append(self.state.snapshot())
+
+        return changed
+
+    def undo(self) -> List[Tuple[int, int]]:
+        """
+        Undo the last applied move.
+
+        :return: the fields changed (empty if there is nothing to undo)
+        """
+        if self.__position == 0:
+            return list()
+
+        self.__position -= 1
+        fields = self.__fields_of(self.__position)
+        self.state.revert(self.__moves[self.__position][0], fields)
+        return fields
+
+    def redo(self) -> List[Tuple[int, int]]:
+        """
+        Apply again the last undone move.
+
+        :return: the fields changed (empty if there is nothing to redo)
+        """
+        if self.__position == len(self.__moves):
+            return list()
+
+        fields = self.__fields_of(self.__position)
+        self.state.replay(self.__moves[self.__position][0], fields)
+        self.__position += 1
+        return fields
+
+    @Metrics.timed("history.jump")
+    def jump(self, position: int) -> List[Tuple[int, int]]:
+        """
+        Undo or redo moves until the state is after the first `position` moves.
+
+        :param position: from 0 (no moves) to len(history).
+        :return: the fields changed, without repetitions
+        """
+        if not 0 <= position <= len(self.__moves):
+            raise IndexError("The position {} is out of the history (0..{})".format(position, len(self.__moves)))
+
+        changed = self.__changed
+        cost = abs(changed[position] - changed[self.__position])  # fields changed from the current position
+        snapshot = None
+
+        # The snapshots just before and just after the position: a restore compares all the fields (whole rows at a
+        # time, then the fields of the rows that differ), so it is only cheaper when many moves changed few fields
+        after = bisect_right(self.__checkpoints, position)
+        for i in (after - 1, after):
+            if i < len(self.__checkpoints):
+                checkpoint = self.__checkpoints[i]
+                checkpoint_cost = self.__fields + abs(changed[position] - changed[checkpoint])
+
+                if checkpoint_cost < cost:
+                    cost = checkpoint_cost
+                    snapshot = i
+
+        fields = list()
+
+        if snapshot is not None:
+            fields.extend(self.state.restore(self.__snapshots[snapshot]))
+            self.__position = self.__checkpoints[snapshot]
+
+        while self.__position < position:
+            fields.extend(self.redo())
+        while self.__position > position:
+            fields.extend(self.undo())
+
+        return list(dict.fromkeys(fields))
+
+
+class ReplayRecorder(object):
+    """
+    Moves of the player applied to a history and kept with their time since the start of the game, to verify the
+    score (see core.Verifier). Only the moves that changed the state are kept, undo and redo included: the moves that
+    change nothing (e.g. the repeats of a held key on an opened field) would count in the rate of the moves.
+    """
+    history: History = None
+    replay: List[TimedMove] = None
+
+    __time: Time = None  # time of the game, read at each move: the game can start after the recorder is created
+
+    def __init__(self, history: History, game_time: Time):
+        self.history = history
+        self.replay = list()
+        self.__time = game_time
+
+    def __record(self, move: Move, changed: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        if changed:
+            self.replay.append((int((time() - self.__time.start_time) * 1000), move))
+
+        return changed
+
+    def apply(self, move: Move) -> List[Tuple[int, int]]:
+        """
+        :return: the fields changed by the move (see History.apply)
+        """
+        return self.__record(move, self.history.apply(move))
+
+    def undo(self) -> List[Tuple[int, int]]:
+        return self.__record((UNDO, (0, 0)), self.history.undo())
+
+    def redo(self) -> List[Tuple[int, int]]:
+        return self.__record((REDO, (0, 0)), self.history.redo())
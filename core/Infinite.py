@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Unbounded board split in chunks generated on demand.
+
+The bombs of a chunk only depend on the seed of the world and the coordinates of the chunk, so a chunk can be
+dropped from memory and generated again at any time. Only the fields changed by the player (opened or flagged)
+must be kept, in a ChunkStore.
+"""
+
+from typing import Tuple, List, Dict, Optional
+from collections import OrderedDict, deque
+from random import Random
+import os
+import struct
+import zlib
+
+from core.Placement import sample_cells, derive_seed
+from core.State import HIDDEN, REVEALED, FLAGGED, BOMB
+
+CHUNK_SIZE = 32
+CACHE_SIZE = 256  # chunks kept in memory
+MAX_REVEAL = 100000  # maximum fields opened by one move (an opening of an infinite board can be infinite)
+UNKNOWN = 255  # value of a count not computed yet
+
+
+class Chunk(object):
+    """
+    A square of CHUNK_SIZE x CHUNK_SIZE fields. The counts are only computed when they are requested.
+    """
+    bombs: bytearray = None  # 1 for the bombs
+    counts: bytearray = None  # quantity of bombs nearby (UNKNOWN if not computed)
+    status: bytearray = None  # HIDDEN, REVEALED or FLAGGED
+    changed: bool = False  # the status was changed since the chunk was loaded
+
+    def __init__(self, bombs: bytearray, status: bytearray = None):
+        self.bombs = bombs
+        self.counts = bytearray([UNKNOWN]) * len(bombs)
+        self.status = bytearray(len(bombs)) if status is None else status
+
+
+class ChunkStore(object):
+    """
+    Keep the status of the chunks changed by the player in memory.
+    """
+    __chunks: Dict[Tuple[int, int], bytes] = None
+
+    def __init__(self):
+        self.__chunks = dict()
+
+    def load(self, key: Tuple[int, int]) -> Optional[bytearray]:
+        data = self.__chunks.get(key)
+        return None if data is None else bytearray(data)
+
+    def save(self, key: Tuple[int, int], status: bytearray) -> None:
+        self.__chunks[key] = bytes(status)
+
+
+class FileChunkStore(ChunkStore):
+    """
+    Keep the status of the chunks changed by the player in a directory, one file per chunk. The status of each
+    field takes 2 bits and the packed status is compressed with zlib.
+    """
+    path: str = None
+
+    def __init__(self, path: str):
+        super(FileChunkStore, self).__init__()
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def __file(self, key: Tuple[int, int]) -> str:
+        return os.path.join(self.path, "{}_{}.chunk".format(key[0], key[1]))
+
+    def load(self, key: Tuple[int, int]) -> Optional[bytearray]:
+        try:
+            with open(self.__file(key), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+
+        size, = struct.unpack_from("<I", data)
+        packed = zlib.decompress(data[4:])
+
+        status = bytearray(size)
+        for index in range(size):
+            status[index] = (packed[index >> 2] >> ((index & 3) << 1)) & 3
+
+        return status
+
+    def save(self, key: Tuple[int, int], status: bytearray) -> None:
+        packed = bytearray((len(status) + 3) // 4)
+        for index, value in enumerate(status):
+            packed[index >> 2] |= value << ((index & 3) << 1)
+
+        with open(self.__file(key), "wb") as file:
+            file.write(struct.pack("<I", len(status)) + zlib.compress(bytes(packed)))
+
+
+class InfiniteBoard(object):
+    """
+    Board without limits. The fields are addressed by (row, col), negative values included.
+    """
+    chunk_size: int = CHUNK_SIZE
+    cache_size: int = CACHE_SIZE
+
+    __seed: int
+    __bomb_percent: float
+    __bombs_per_chunk: int
+    __chunks: OrderedDict = None  # LRU cache: (chunk row, chunk col) -> Chunk
+    __store: ChunkStore = None
+    __lost: bool = False
+
+    def __init__(self, seed: int, bomb_percent: float, store: ChunkStore = None, chunk_size: int = CHUNK_SIZE,
+                 cache_size: int = CACHE_SIZE):
+        """
+        :param seed: the seed of the world.
+        :param bomb_percent: the bomb percent of each chunk.
+        :param store: keeps the chunks changed by the player. If None, they are kept in memory.
+        :param chunk_size: the size of the side of the chunks.
+        :param cache_size: the quantity of chunks kept in memory.
+        """
+        if not 0 <= bomb_percent < 100:
+            raise ValueError("Percentage of bombs must be between 0 and 100%")
+        elif cache_size < 9:
+            raise ValueError("The cache must keep at least the 3x3 chunks around a field")
+
+        self.__seed = seed
+        self.__bomb_percent = bomb_percent
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.__bombs_per_chunk = round(chunk_size * chunk_size * bomb_percent / 100)
+        self.__chunks = OrderedDict()
+        self.__store = ChunkStore() if store is None else store
+
+    def chunk_seed(self, key: Tuple[int, int]) -> int:
+        """
+        :return: the seed of a chunk, from a hash of the seed of the world and the coordinates of the chunk
+        """
+        return derive_seed(self.__seed, key[0], key[1])
+
+    def chunk(self, key: Tuple[int, int]) -> Chunk:
+        """
+        Get a chunk from the cache, or generate it (restoring the fields changed by the player).
+
+        :param key: the (chunk row, chunk col).
+        :return: the chunk
+        """
+        chunk = self.__chunks.get(key)
+
+        if chunk is not None:
+            self.__chunks.move_to_end(key)
+            return chunk
+
+        size = self.chunk_size * self.chunk_size
+        bombs = bytearray(size)
+        for index in sample_cells(size, self.__bombs_per_chunk, Random(self.chunk_seed(key))):
+            bombs[index] = 1
+
+        chunk = Chunk(bombs, self.__store.load(key))
+        self.__chunks[key] = chunk
+
+        while len(self.__chunks) > self.cache_size:
+            self.__evict()
+
+        return chunk
+
+    def __evict(self):
+        key, chunk = self.__chunks.popitem(last=False)
+
+        if chunk.changed:
+            self.__store.save(key, chunk.status)
+
+    def flush(self) -> None:
+        """
+        Save all the changed chunks in the store.
+        """
+        for key, chunk in self.__chunks.items():
+            if chunk.changed:
+                self.__store.save(key, chunk.status)
+                chunk.changed = False
+
+    def __locate(self, coords: Tuple[int, int]) -> Tuple[Chunk, int]:
+        size = self.chunk_size
+        chunk_row, row = divmod(coords[0], size)
+        chunk_col, col = divmod(coords[1], size)
+        return self.chunk((chunk_row, chunk_col)), row * size + col
+
+    def is_bomb(self, coords: Tuple[int, int]) -> bool:
+        chunk, index = self.__locate(coords)
+        return chunk.bombs[index] == 1
+
+    def value(self, coords: Tuple[int, int]) -> int:
+        """
+        :return: the quantity of bombs nearby of a field or BOMB. The fields on the edges of the chunk read the
+                 bombs of the neighbour chunks.
+        """
+        chunk, index = self.__locate(coords)
+
+        if chunk.bombs[index]:
+            return BOMB
+
+        if chunk.counts[index] == UNKNOWN:
+            row, col = coords
+            chunk.counts[index] = sum(self.is_bomb((r, c))
+                                      for r in range(row - 1, row + 2)
+                                      for c in range(col - 1, col + 2))
+
+        return chunk.counts[index]
+
+    def status(self, coords: Tuple[int, int]) -> int:
+        chunk, index = self.__locate(coords)
+        return chunk.status[index]
+
+    def __set_status(self, coords: Tuple[int, int], status: int):
+        chunk, index = self.__locate(coords)
+        chunk.status[index] = status
+        chunk.changed = True
+
+    def reveal(self, coords: Tuple[int, int], limit: int = MAX_REVEAL) -> List[Tuple[int, int]]:
+        """
+        Open a field and flood fill the empty fields around it, opening at most `limit` fields. The fields of an
+        opening left hidden by the limit are opened when the player clicks them.
+
+        :param coords: the (row, col) of the field.
+        :param limit: the maximum quantity of fields opened.
+        :return: the list of the opened fields
+        """
+        if self.__lost or self.status(coords) != HIDDEN:
+            return list()
+
+        self.__set_status(coords, REVEALED)
+        opened = [coords]
+
+        value = self.value(coords)
+        if value == BOMB:
+            self.__lost = True
+            return opened
+
+        queue = deque([coords] if value == 0 else [])
+
+        while queue and len(opened) < limit:
+            row, col = queue.popleft()
+
+            for r in range(row - 1, row + 2):
+                for c in range(col - 1, col + 2):
+                    if self.status((r, c)) == HIDDEN and len(opened) < limit:
+                        self.__set_status((r, c), REVEALED)
+                        opened.append((r, c))
+
+                        if self.value((r, c)) == 0:
+                            queue.append((r, c))
+
+        return opened
+
+    def flag(self, coords: Tuple[int, int]) -> bool:
+        """
+        Mark or unmark a hidden field with a flag.
+
+        :return: True if the field is flagged after the move
+        """
+        status = self.status(coords)
+
+        if not self.__lost and status != REVEALED:
+            status = HIDDEN if status == FLAGGED else FLAGGED
+            self.__set_status(coords, status)
+
+        return status == FLAGGED
+
+    @property
+    def seed(self):
+        return self.__seed
+
+    @property
+    def bomb_percent(self):
+        return self.__bomb_percent
+
+    @property
+    def lost(self):
+        return self.__lost
+
+    @property
+    def loaded_chunks(self):
+        return len(self.__chunks)
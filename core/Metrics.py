@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of the hot operations: counters and timing histograms in an in-process registry.
+
+The instrumentation is off by default. The decorated functions only check one module flag before calling the
+original function, so the cost when it is off is one extra call.
+
+    from core import Metrics
+    Metrics.enable()
+    ...
+    print(Metrics.registry.snapshot())
+"""
+
+from typing import Dict, List, Callable, Optional
+from time import perf_counter
+import functools
+import json
+import os
+import threading
+
+BUCKETS = 32  # histogram buckets: bucket i has the durations of less than 2^i microseconds
+
+_enabled = False
+
+
+class Histogram(object):
+    """
+    Durations of an operation, in buckets of powers of 2 of microseconds.
+    """
+    count: int = 0
+    total: float = 0.0
+    minimum: float = None
+    maximum: float = None
+    buckets: List[int] = None
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+        self.buckets[min(BUCKETS - 1, int(seconds * 1000000).bit_length())] += 1
+
+    def percentile(self, percent: float) -> float:
+        """
+        :return: the upper bound of the bucket of the percentile, in seconds
+        """
+        target = self.count * percent / 100
+        seen = 0
+
+        for index, quantity in enumerate(self.buckets):
+            seen += quantity
+            if quantity and seen >= target:
+                return min(self.maximum, (1 << index) / 1000000)
+
+        return 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        if not self.count:
+            return {"count": 0}
+
+        return {"count": self.count,
+                "total_ms": self.total * 1000,
+                "mean_ms": self.total * 1000 / self.count,
+                "min_ms": self.minimum * 1000,
+                "max_ms": self.maximum * 1000,
+                "p50_ms": self.percentile(50) * 1000,
+                "p90_ms": self.percentile(90) * 1000,
+                "p99_ms": self.percentile(99) * 1000}
+
+
+class Registry(object):
+    """
+    Counters and histograms by name. Safe to use from many threads.
+    """
+    __counters: Dict[str, int] = None
+    __histograms: Dict[str, Histogram] = None
+    __lock: threading.Lock = None
+
+    def __init__(self):
+        self.__counters = dict()
+        self.__histograms = dict()
+        self.__lock = threading.Lock()
+
+    def count(self, name: str, quantity: int = 1) -> None:
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + quantity
+
+    def record(self, name: str, seconds: float) -> None:
+        with self.__lock:
+            histogram = self.__histograms.get(name)
+            if histogram is None:
+                histogram = self.__histograms[name] = Histogram()
+            histogram.record(seconds)
+
+    def counter(self, name: str) -> int:
+        return self.__counters.get(name, 0)
+
+    def histogram(self, name: str) -> Optional[Histogram]:
+        return self.__histograms.get(name)
+
+    def snapshot(self) -> dict:
+        """
+        :return: all the counters and the summary of all the histograms, as a JSON serializable dict
+        """
+        with self.__lock:
+            return {"counters": dict(self.__counters),
+                    "timings": {name: histogram.to_dict() for name, histogram in self.__histograms.items()}}
+
+    def reset(self) -> None:
+        with self.__lock:
+            self.__counters.clear()
+            self.__histograms.clear()
+
+    def dump(self, path: str) -> None:
+        """
+        Write the snapshot in a JSON file (in another file first and renamed, so a reader never sees a partial file).
+        """
+        with open(path + ".tmp", "w") as file:
+            json.dump(self.snapshot(), file, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+
+registry = Registry()
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def count(name: str, quantity: int = 1) -> None:
+    if _enabled:
+        registry.count(name, quantity)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator that records the duration of each call of a function in the histogram `name`.
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                registry.record(name, perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class Dumper(object):
+    """
+    Write the snapshot of the registry in a JSON file periodically, from a daemon thread.
+    """
+    path: str = None
+    interval: float = None
+
+    __stop: threading.Event = None
+    __thread: threading.Thread = None
+
+    def __init__(self, path: str, interval: float = 5.0):
+        self.path = path
+        self.interval = interval
+        self.__stop = threading.Event()
+
+    def start(self) -> None:
+        self.__thread = threading.Thread(target=self.__run, name="MetricsDumper", daemon=True)
+        self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the thread and write the last snapshot.
+        """
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+        registry.dump(self.path)
+
+    def __run(self):
+        while not self.__stop.wait(self.interval):
+            registry.dump(self.path)
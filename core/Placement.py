@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from typing import Tuple, List, Iterable
+from random import Random
+from itertools import compress
+from hashlib import blake2b
+import os
+
+from core import Metrics
+
+# Above this percentage of bombs it is cheaper to sample the safe fields and take the complement
+DENSE_THRESHOLD = 50
+
+
+def new_seed() -> int:
+    """
+    :return: a new unpredictable 64 bits seed, from the random source of the operating system
+    """
+    return int.from_bytes(os.urandom(8), "little")
+
+
+def derive_seed(seed: int, *keys: int) -> int:
+    """
+    Derive the seed of an independent stream (e.g. the n-th work unit of a parallel generator) from a seed and keys.
+    The derived seeds are a hash of the seed and the keys, so the streams of different keys do not overlap like
+    consecutive seeds (or draws of one generator shared by the workers) could.
+
+    The seed and the keys can be any integers (e.g. a --seed of the command line): the ones outside the signed 128 bits
+    range are reduced modulo 2^128.
+
+    :return: a 64 bits seed
+    """
+    data = b"".join(((value + (1 << 127)) % (1 << 128) - (1 << 127)).to_bytes(16, "little", signed=True)
+                    for value in (seed,) + keys)
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "little")
+
+
+@Metrics.timed("placement.sample_cells")
+def sample_cells(total_fields: int, quantity: int, rng: Random = None, dense: bool = None,
+                 excluded: Iterable[int] = None) -> List[int]:
+    """
+    Choose `quantity` distinct fields of the board by sampling without replacement over the flat index
+    (row * columns + col) of the fields.
+
+    :param total_fields: the quantity of fields in the board.
+    :param quantity: the quantity of fields to be chosen.
+    :param rng: the random generator used to sample the fields. If None, a new unseeded one is used.
+    :param dense: if True, sample the fields that are NOT chosen and return the complement. If None, the dense
+                  mode is used when more than DENSE_THRESHOLD% of the fields must be chosen.
+    :param excluded: flat indexes that can not be chosen (e.g. the first click of the player).
+    :return: the sorted list of the chosen flat indexes
+    """
+    if excluded:
+        excluded = set(excluded)
+        population = [index for index in range(total_fields) if index not in excluded]
+    else:
+        population = range(total_fields)
+
+    size = len(population)
+
+    if not 0 <= quantity <= size:
+        raise ValueError("Quantity of fields must be between 0 and {}".format(size))
+
+    if rng is None:
+        rng = Random()
+
+    if dense is None:
+        dense = quantity * 100 > size * DENSE_THRESHOLD
+
+    if dense:
+        # Place the safe fields and keep everything else
+        chosen = bytearray(b"\x01") * size
+        for index in rng.sample(range(size), size - quantity):
+            chosen[index] = 0
+
+        return list(compress(population, chosen))
+
+    return sorted(population[index] for index in rng.sample(range(size), quantity))
+
+
+def neighbourhood(dimensions: Tuple[int, int], coords: Tuple[int, int]) -> List[int]:
+    """
+    :return: the flat indexes of a field and its neighbours inside the board
+    """
+    rows, cols = dimensions
+    return [r * cols + c
+            for r in range(max(0, coords[0] - 1), min(rows, coords[0] + 2))
+            for c in range(max(0, coords[1] - 1), min(cols, coords[1] + 2))]
+
+
+def place_bombs(dimensions: Tuple[int, int], total_bombs: int, rng: Random = None,
+                dense: bool = None) -> List[Tuple[int, int]]:
+    """
+    Choose the position of all the bombs of a board.
+
+    :param dimensions: the dimensions of the board.
+    :param total_bombs: the quantity of bombs in the board.
+    :param rng: the random generator used to place the bombs.
+    :param dense: force (True) or disable (False) the dense mode. See sample_cells.
+    :return: the sorted list of the (row, col) position of the bombs
+    """
+    columns = dimensions[1]
+
+    return [divmod(index, columns) for index in sample_cells(dimensions[0] * columns, total_bombs, rng, dense)]
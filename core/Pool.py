@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+Boards generated in advance, so a new game does not wait for the generation.
+"""
+
+from typing import Tuple, List, Optional
+from collections import OrderedDict, deque
+from random import Random
+import os
+import sys
+import threading
+
+from core.Engine import MinesweeperBoard
+from core.Archive import BoardArchive
+from core import Generator
+
+STANDARD = "standard"
+NO_GUESS = "no_guess"
+MODES = (STANDARD, NO_GUESS)
+
+QUEUE_SIZE = 2  # boards kept ready per key
+MAX_KEYS = 8  # keys kept in the pool, the least recently used are removed
+
+Key = Tuple[Tuple[int, int], float, str]  # (dimensions, bomb percent, mode)
+
+
+class BoardPool(object):
+    """
+    Keep a bounded queue of ready boards per (dimensions, bomb percent, mode). A background thread refills the
+    queues, the most recently used first. When a queue is empty the board is generated in the caller.
+
+    With a cache directory, the boards left in the queues are saved by stop() (one core.Archive file per key) and
+    loaded when the pool starts, so the first game after a cold start does not wait either.
+    """
+    size: int = QUEUE_SIZE
+    max_keys: int = MAX_KEYS
+    path: str = None
+    workers: int = 1  # processes of the no-guess search of the background thread
+
+    __queues: OrderedDict = None  # LRU: key -> deque of boards
+    __failed: set = None  # keys not refilled until they are used again (the no-guess search failed)
+    __condition: threading.Condition = None
+    __thread: threading.Thread = None
+    __loaded: bool = False  # the boards of the cache directory were loaded
+    __stopped: bool = False
+    __rng: Random = None
+
+    def __init__(self, size: int = QUEUE_SIZE, max_keys: int = MAX_KEYS, path: str = None, workers: int = 1,
+                 rng: Random = None):
+        """
+        :param size: the quantity of boards kept ready per key.
+        :param max_keys: the quantity of keys kept in the pool.
+        :param path: the cache directory. If None, the boards are only kept in memory.
+        :param workers: the processes used by the background thread to search no-guess boards.
+        :param rng: the random generator of the background thread.
+        """
+        self.size = size
+        self.max_keys = max_keys
+        self.path = path
+        self.workers = workers
+        self.__rng = Random() if rng is None else rng
+        self.__queues = OrderedDict()
+        self.__failed = set()
+        self.__condition = threading.Condition()
+        self.__loaded = path is None
+
+    def start(self) -> None:
+        """
+        Start the background thread.
+        """
+        if self.__thread is None:
+            self.__stopped = False
+            self.__thread = threading.Thread(target=self.__run, name="BoardPool", daemon=True)
+            self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread (after the board in generation) and save the ready boards in the cache directory.
+        """
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+        self.save()
+
+    def take(self, dimensions: Tuple[int, int], bomb_percent: float, mode: str = STANDARD) -> MinesweeperBoard:
+        """
+        Remove a ready board of the pool, or generate one if there is none. In both cases the key is marked as
+        recently used and its queue is refilled in background.
+
+        :param dimensions: the dimensions of the board.
+        :param bomb_percent: the bomb percent of the board.
+        :param mode: STANDARD or NO_GUESS.
+        :return: the board
+        """
+        key = self.__key(dimensions, bomb_percent, mode)
+
+        with self.__condition:
+            # After a cold start, wait for the boards of the cache directory instead of generating one
+            while not self.__loaded and self.__thread is not None:
+                self.__condition.wait()
+
+            queue = self.__use(key)
+            board = queue.popleft() if queue else None
+            self.__condition.notify_all()
+
+        if board is None:
+            board = MinesweeperBoard(dimensions, bomb_percent)
+            board.generate_board(no_guess=mode == NO_GUESS)
+
+        return board
+
+    def request(self, dimensions: Tuple[int, int], bomb_percent: float, mode: str = STANDARD) -> None:
+        """
+        Mark a key as recently used (e.g. the settings selected in a menu), so its queue is filled in background
+        before the first board is taken.
+        """
+        key = self.__key(dimensions, bomb_percent, mode)
+
+        with self.__condition:
+            self.__use(key)
+            self.__condition.notify_all()
+
+    def ready(self, dimensions: Tuple[int, int], bomb_percent: float, mode: str = STANDARD) -> int:
+        """
+        :return: the quantity of ready boards of a key
+        """
+        with self.__condition:
+            return len(self.__queues.get(self.__key(dimensions, bomb_percent, mode), ()))
+
+    def __len__(self) -> int:
+        with self.__condition:
+            return sum(len(queue) for queue in self.__queues.values())
+
+    @staticmethod
+    def __key(dimensions: Tuple[int, int], bomb_percent: float, mode: str) -> Key:
+        if mode not in MODES:
+            raise ValueError("Unknown mode: {}".format(mode))
+
+        # Validate the settings before they are generated in background
+        MinesweeperBoard(dimensions, bomb_percent)
+        return (dimensions[0], dimensions[1]), float(bomb_percent), mode
+
+    def __use(self, key: Key) -> deque:
+        """
+        Mark a key as the most recently used, removing the least recently used keys if there are too many.
+        Must be called with the condition held.
+        """
+        queue = self.__queues.get(key)
+        self.__failed.discard(key)
+
+        if queue is None:
+            queue = self.__queues[key] = deque()
+        else:
+            self.__queues.move_to_end(key)
+
+        while len(self.__queues) > self.max_keys:
+            self.__failed.discard(self.__queues.popitem(last=False)[0])
+
+        return queue
+
+    def __next_key(self) -> Optional[Key]:
+        """
+        :return: the most recently used key with a queue that is not full
+        """
+        for key in reversed(self.__queues):
+            if len(self.__queues[key]) < self.size and key not in self.__failed:
+                return key
+
+        return None
+
+    def __run(self):
+        if not self.__loaded:
+            try:
+                self.load()
+            except Exception as e:
+                # load marks the pool as loaded in any case, the pool goes on without the saved boards
+                print("The boards of {} could not be loaded: {}".format(self.path, e), file=sys.stderr)
+
+        while True:
+            with self.__condition:
+                key = self.__next_key()
+
+                while key is None and not self.__stopped:
+                    self.__condition.wait()
+                    key = self.__next_key()
+
+                if self.__stopped:
+                    return
+
+                seed = self.__rng.getrandbits(64)
+
+            try:
+                board = self.__generate(key, Random(seed))
+            except Exception as e:
+                # The thread goes on with the other keys, take() generates the boards of this one
+                print("The boards {} could not be generated: {}".format(key, e), file=sys.stderr)
+                board = None
+
+            with self.__condition:
+                queue = self.__queues.get(key)
+
+                if board is None:
+                    self.__failed.add(key)
+                elif queue is not None and len(queue) < self.size:  # the key may be evicted during the generation
+                    queue.append(board)
+                    self.__condition.notify_all()
+
+    def __generate(self, key: Key, rng: Random) -> Optional[MinesweeperBoard]:
+        dimensions, bomb_percent, mode = key
+        board = MinesweeperBoard(dimensions, bomb_percent)
+
+        if mode == STANDARD:
+            board.generate_board(rng)
+            return board
+
+        bombs, no_guess = Generator.generate_no_guess(dimensions, board.total_bombs,
+                                                      Generator.default_click(dimensions), rng, self.workers)
+
+        # The fallback boards are not kept: the caller can generate them as fast
+        if not no_guess:
+            return None
+
+        return MinesweeperBoard.from_bombs(dimensions, [divmod(index, dimensions[1]) for index in bombs],
+                                           first_click=Generator.default_click(dimensions), no_guess=True)
+
+    def __file(self, key: Key) -> str:
+        (rows, cols), bomb_percent, mode = key
+        return os.path.join(self.path, "{}x{}_{}_{}.boards".format(rows, cols, bomb_percent, mode))
+
+    def load(self) -> None:
+        """
+        Load the boards saved in the cache directory (the files are removed, so a board is never played twice).
+        """
+        loaded: List[Tuple[Key, List[MinesweeperBoard]]] = list()
+
+        try:
+            self.__load_files(loaded)
+        finally:
+            # take() waits for the load, even if it failed
+            with self.__condition:
+                for key, boards in loaded:
+                    queue = self.__queues.get(key)
+
+                    if queue is None and len(self.__queues) < self.max_keys:
+                        # Loaded as the least recently used, the keys used since the start are refilled first
+                        queue = self.__queues[key] = deque()
+                        self.__queues.move_to_end(key, last=False)
+
+                    if queue is not None:
+                        queue.extend(boards[:self.size - len(queue)])
+
+                self.__loaded = True
+                self.__condition.notify_all()
+
+    def __load_files(self, loaded: List[Tuple[Key, List[MinesweeperBoard]]]) -> None:
+        """
+        Read and remove the files of the cache directory, adding the boards of each key to `loaded`.
+        """
+        try:
+            names = sorted(os.listdir(self.path)) if self.path is not None else list()
+        except OSError:
+            names = list()  # e.g. the directory does not exist or can not be read
+
+        for name in names:
+            if not name.endswith(".boards"):
+                continue
+
+            file = os.path.join(self.path, name)
+
+            try:
+                dimensions, bomb_percent, mode = name[:-len(".boards")].split("_", 2)
+                rows, cols = (int(value) for value in dimensions.split("x"))
+                key = self.__key((rows, cols), float(bomb_percent), mode)
+
+                with BoardArchive(file, readonly=True) as archive:
+                    boards = [archive.load(position) for position in range(min(len(archive), self.size))]
+            except (ValueError, OSError):
+                boards = None  # invalid file, it is only removed
+
+            for path in (file, file + ".idx"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    boards = None  # the file stays, its boards would be loaded again by the next start
+
+            if boards and mode == NO_GUESS:
+                click = Generator.default_click((rows, cols))
+                boards = [MinesweeperBoard.from_bombs(board.dimensions, board.bombs, first_click=click, no_guess=True)
+                          for board in boards]
+
+            if boards:
+                loaded.append((key, boards))
+
+    def save(self) -> None:
+        """
+        Save the ready boards in the cache directory.
+        """
+        if self.path is None:
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+
+        with self.__condition:
+            queues = [(key, list(queue)) for key, queue in self.__queues.items() if queue]
+
+        for key, boards in queues:
+            file = self.__file(key)
+
+            for path in (file, file + ".idx"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            with BoardArchive(file) as archive:
+                for board in boards:
+                    # The standard boards are generated again from their seed when they are loaded
+                    archive.append(board, seed_only=key[2] == STANDARD)
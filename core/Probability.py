@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+Exact probability of a mine in every unopened field of a game, given the opened numbers and the total of bombs.
+
+The frontier is split in independent components and each one is enumerated with the backtracking of core.Solver.
+The components are combined with the fields off the frontier: if the components hold K mines, the U unconstrained
+fields hold the other L - K mines in C(U, L - K) ways, so every assignment of the components is weighted by it.
+
+The result of each component is cached by its constraints. A move only changes the constraints of the numbers
+around the fields it changed, so only the components touched by the move are enumerated again.
+"""
+
+from typing import List, Dict, Set, Iterable, FrozenSet, Optional
+
+from core.State import GameState
+from core.Solver import Solver, Solution, Component, Cell, Constraint, reduce_constraints, split_components
+from core import Metrics
+
+
+class Part(object):
+    """
+    Result of a component of the frontier: the fields solved by the reduction rules, the enumerated sub components
+    and the estimated probabilities of the sub components too big to enumerate.
+    """
+    cells: Set[Cell] = None
+    safe: Set[Cell] = None
+    mines: Set[Cell] = None
+    components: List[Component] = None
+    estimated: Dict[Cell, float] = None
+
+    def __init__(self):
+        self.cells = set()
+        self.safe = set()
+        self.mines = set()
+        self.components = list()
+        self.estimated = dict()
+
+
+def binomial_weights(unconstrained: int, low: int, high: int) -> List[int]:
+    """
+    Integers proportional to C(unconstrained, m) for m in [low, high], without computing the binomials themselves:
+    C(U, m) / C(U, a) is the product of (U - j + 1) / j for j in a + 1..m, and all the values are multiplied by the
+    product of the denominators.
+
+    :return: the weight of each m (0 when m is not in 0..unconstrained)
+    """
+    weights = [0] * (high - low + 1)
+    first = max(low, 0)
+    last = min(high, unconstrained)
+
+    if first > last:
+        return weights
+
+    # numerators[i]: product of (U - j + 1) for j in first + 1..first + i
+    numerators = [1]
+    for j in range(first + 1, last + 1):
+        numerators.append(numerators[-1] * (unconstrained - j + 1))
+
+    # denominators[i]: product of j for j in first + i + 1..last
+    denominators = [1]
+    for j in range(last, first, -1):
+        denominators.append(denominators[-1] * j)
+    denominators.reverse()
+
+    for i in range(last - first + 1):
+        weights[first + i - low] = numerators[i] * denominators[i]
+
+    return weights
+
+
+class ProbabilityEngine(object):
+    """
+    Probability of a mine in every unopened field of a game, updated incrementally after the moves.
+
+        engine = ProbabilityEngine(state)
+        engine.update(state.reveal(coords))
+        engine.solve().heat_map()
+        engine.best_guess()
+
+    The engine keeps the components of the last solve. A move marks as dirty the components that share a field with
+    a constraint it changed, and only the dirty components are split and solved again. The fields proven safe or
+    mines are removed from the constraints (a mine decrements the count), so the known mines do not join the
+    components around them in one big component.
+
+    Like core.Solver, the flags of the player are not trusted: flagged fields are unknown like the hidden ones.
+    """
+    max_component = Solver.max_component  # sub components with more fields are estimated, not enumerated
+
+    state: GameState = None
+
+    __solver: Solver = None  # enumerates the components, with its cache of the component shapes
+    __unopened: Set[Cell] = None
+    __safe: Set[Cell] = None  # unopened fields proven safe
+    __mines: Set[Cell] = None  # fields proven mines
+    __constraints: Dict[Cell, Constraint] = None  # constraint of each opened number, without the known fields
+    __uses: Dict[Constraint, int] = None  # quantity of numbers with each constraint
+    __parts: Dict[FrozenSet[Constraint], Part] = None  # solved components, by their constraints
+    __owners: Dict[Cell, FrozenSet[Constraint]] = None  # component of each field of the constraints
+    __dirty: Set[FrozenSet[Constraint]] = None  # components to solve again
+    __added: Set[Constraint] = None  # constraints added since the last solve
+    __solution: Optional[Solution] = None  # result of the last solve, None after a change
+
+    def __init__(self, state: GameState):
+        self.state = state
+        self.__solver = Solver()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Read the whole state again and forget the known fields (e.g. after the state was changed without update).
+        """
+        self.__unopened = set(self.state.hidden_fields())
+        self.__unopened.update(self.state.flagged_fields())
+        self.__safe = set()
+        self.__mines = set()
+        self.__constraints = dict()
+        self.__uses = dict()
+        self.__parts = dict()
+        self.__owners = dict()
+        self.__dirty = set()
+        self.__added = set()
+        self.update(list(self.__unopened))
+
+    def update(self, fields: Iterable[Cell]) -> None:
+        """
+        Update the constraints of the numbers around the fields changed by a move.
+
+        :param fields: the fields opened, closed or flagged by the move (e.g. the result of GameState.apply).
+        """
+        state = self.state
+        touched = set()
+
+        for coords in fields:
+            touched.add(coords)
+            touched.update(state.neighbours(coords))
+
+            if state.is_revealed(coords):
+                self.__unopened.discard(coords)
+                self.__safe.discard(coords)
+            elif coords not in self.__unopened:
+                # A field was closed (undo): what was proven may not hold anymore
+                self.reset()
+                return
+
+        for coords in touched:
+            self.__read(coords)
+
+        self.__solution = None
+
+    def __read(self, coords: Cell) -> None:
+        """
+        Read the constraint of a field of the state, without the known fields.
+        """
+        state = self.state
+        value = state.value(coords)
+        constraint = None
+
+        # The empty fields count too: the flood fill does not open their flagged neighbours
+        if value is not None and value >= 0:
+            cells = [cell for cell in state.unopened_neighbours(coords) if cell not in self.__safe]
+            unknown = frozenset(cell for cell in cells if cell not in self.__mines)
+
+            if unknown:
+                constraint = (unknown, value - (len(cells) - len(unknown)))
+
+        previous = self.__constraints.get(coords)
+        if constraint == previous:
+            return
+
+        for changed in (previous, constraint):
+            if changed is not None:
+                for cell in changed[0]:
+                    owner = self.__owners.get(cell)
+                    if owner is not None:
+                        self.__dirty.add(owner)
+
+        if previous is not None:
+            del self.__constraints[coords]
+            self.__uses[previous] -= 1
+            if not self.__uses[previous]:
+                del self.__uses[previous]
+
+        if constraint is not None:
+            self.__constraints[coords] = constraint
+            self.__uses[constraint] = self.__uses.get(constraint, 0) + 1
+            self.__added.add(constraint)
+
+    def __learn(self, safe: Set[Cell], mines: Set[Cell]) -> None:
+        """
+        Keep the fields proven safe or mines, and remove them from the constraints of the numbers around them.
+        """
+        safe = safe - self.__safe
+        mines = mines - self.__mines
+
+        if not safe and not mines:
+            return
+
+        self.__safe.update(safe)
+        self.__mines.update(mines)
+
+        numbers = set()
+        for coords in safe | mines:
+            numbers.update(self.state.neighbours(coords))
+
+        for coords in numbers:
+            self.__read(coords)
+
+    def __part(self, group: List[Constraint]) -> Part:
+        """
+        Solve a component of the frontier: the reduction rules first, then the enumeration of what is left.
+        """
+        part = Part()
+
+        for cells, count in group:
+            part.cells.update(cells)
+
+        for constraints in split_components(reduce_constraints(group, part.safe, part.mines)):
+            cells = set()
+            for constraint_cells, count in constraints:
+                cells.update(constraint_cells)
+
+            if len(cells) > self.max_component:
+                # Too big to enumerate: use the density of the constraints of each field
+                for cell in cells:
+                    densities = [count / len(c) for c, count in constraints if cell in c]
+                    part.estimated[cell] = sum(densities) / len(densities)
+            else:
+                part.components.append(self.__solver.component(constraints))
+
+        Metrics.count("probability.enumerated")
+        return part
+
+    def __refresh(self) -> None:
+        """
+        Split and solve again the constraints of the dirty components and the added constraints.
+        """
+        constraints = self.__added
+
+        for key in self.__dirty:
+            part = self.__parts.pop(key, None)
+            if part is None:
+                continue
+
+            constraints.update(key)
+            for cell in part.cells:
+                if self.__owners.get(cell) is key:
+                    del self.__owners[cell]
+
+        for group in split_components([constraint for constraint in constraints if constraint in self.__uses]):
+            key = frozenset(group)
+            part = self.__parts[key] = self.__part(group)
+
+            for cell in part.cells:
+                self.__owners[cell] = key
+
+        self.__dirty = set()
+        self.__added = set()
+
+    @Metrics.timed("probability.solve")
+    def solve(self) -> Solution:
+        """
+        :return: the safe fields, the mines and the probability of a mine in every other unopened field
+        """
+        if self.__solution is not None:
+            return self.__solution
+
+        self.__refresh()
+
+        solution = Solution()
+        solution.safe.update(self.__safe)
+        solution.mines.update(self.__mines)
+        components: List[Component] = list()
+        estimated_mines = 0.0
+
+        for part in self.__parts.values():
+            solution.safe.update(part.safe)
+            solution.mines.update(part.mines)
+            solution.probabilities.update(part.estimated)
+            components.extend(part.components)
+            estimated_mines += sum(part.estimated.values())
+
+        solution.exact = not solution.probabilities
+        solution.unconstrained = sorted(self.__unopened.difference(self.__owners, self.__safe, self.__mines))
+        left = self.state.board.total_bombs - len(solution.mines) - int(round(estimated_mines))
+
+        if self.__combine(solution, components, left) and solution.exact:
+            self.__learn(solution.safe, solution.mines)
+
+        self.__solution = solution
+        return solution
+
+    @staticmethod
+    def __combine(solution: Solution, components: List[Component], left: int) -> bool:
+        """
+        Weight the assignments of the components with the ways to place the other mines in the unconstrained fields.
+
+        With prefix[i] the convolution of the totals of the components before i, and after[i](x) the weight of all
+        the assignments of the components from i on when the components before them have x mines, the weight of k
+        mines in the component i is totals[k] * sum(prefix[i][a] * after[i + 1](a + k) for all a).
+
+        :return: False if the constraints or the mine count are contradictory (the probabilities are estimated)
+        """
+        unconstrained = len(solution.unconstrained)
+        most = sum(max(component.totals, default=0) for component in components)
+        weights = binomial_weights(unconstrained, left - most, left)  # weights[m - left + most] ~ C(U, m)
+
+        prefix: List[List[int]] = [[1]]
+        for component in components:
+            previous = prefix[-1]
+            current = [0] * (len(previous) + max(component.totals, default=0))
+            for a, weight in enumerate(previous):
+                if weight:
+                    for k, total in component.totals.items():
+                        current[a + k] += weight * total
+            prefix.append(current)
+
+        after: List[List[int]] = [list()] * len(components) + [[weights[most - x] for x in range(most + 1)]]
+        for i in range(len(components) - 1, -1, -1):
+            following = after[i + 1]
+            after[i] = [sum(total * following[x + k] for k, total in components[i].totals.items())
+                        for x in range(len(prefix[i]))]
+
+        total_weight = after[0][0]
+
+        if total_weight == 0:
+            # Contradictory constraints or mine count: the probabilities of each component alone
+            for component in components:
+                solution.probabilities.update(component.probabilities())
+            solution.exact = False
+            if unconstrained:
+                solution.other = min(1.0, max(0.0, left / unconstrained))
+            return False
+
+        # The divisions of the ints are correctly rounded, even when they do not fit in a float
+        for i, component in enumerate(components):
+            mines = [0] * len(component.cells)
+
+            for k, counts in component.counts.items():
+                weight = sum(w * after[i + 1][a + k] for a, w in enumerate(prefix[i]) if w)
+                if weight:
+                    for j, count in enumerate(counts):
+                        mines[j] += count * weight
+
+            for cell, numerator in zip(component.cells, mines):
+                if numerator == 0:
+                    solution.safe.add(cell)
+                elif numerator == total_weight:
+                    solution.mines.add(cell)
+                else:
+                    solution.probabilities[cell] = numerator / total_weight
+
+        if unconstrained:
+            # Expected quantity of mines in the unconstrained fields, divided by their quantity
+            numerator = sum(w * weights[most - x] * (left - x) for x, w in enumerate(prefix[-1]) if w)
+            solution.other = numerator / (total_weight * unconstrained)
+
+            if numerator == 0:
+                solution.safe.update(solution.unconstrained)
+            elif numerator == total_weight * unconstrained:
+                solution.mines.update(solution.unconstrained)
+
+        return True
+
+    def best_guess(self) -> Optional[Cell]:
+        """
+        :return: a safe field if there is one, or else the unopened field less likely to have a mine
+        """
+        return self.solve().best_guess()
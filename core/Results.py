@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Local store of the results of the games, in SQLite (WAL mode), with the leaderboards of each board size and bomb
+percent.
+
+The results are written by a background thread in batches, one transaction per batch, so recording a result never
+waits for the disk. The leaderboards are kept in memory: each one is read once from the database and then updated
+with every recorded result, so a leaderboard query does not touch the database.
+"""
+
+from typing import Tuple, List, Dict, Optional
+from bisect import insort
+from time import time
+import os
+import queue
+import sys
+import threading
+
+from core.Time import Time
+from core import Metrics
+
+FILE_NAME = "results.db"
+BATCH_SIZE = 512  # results written in one transaction, at most
+LEADERBOARD_SIZE = 10
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY,
+        player TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        cols INTEGER NOT NULL,
+        bomb_percent REAL NOT NULL,
+        win INTEGER NOT NULL,
+        seconds REAL NOT NULL,
+        moves INTEGER NOT NULL,
+        finished REAL NOT NULL
+    )""",
+    # Top N of the settings and rank of a time: the wins of the settings sorted by time
+    "CREATE INDEX IF NOT EXISTS results_settings ON results (rows, cols, bomb_percent, win, seconds)",
+    # Statistics and percentiles of a player in the settings
+    "CREATE INDEX IF NOT EXISTS results_player ON results (player, rows, cols, bomb_percent, win, seconds)"
+]
+
+INSERT = "INSERT INTO results (player, rows, cols, bomb_percent, win, seconds, moves, finished) " \
+         "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+Settings = Tuple[int, int, float]  # (rows, cols, bomb percent)
+Entry = Tuple[float, str, float]  # line of a leaderboard: (seconds, player, finished)
+
+
+class Result(object):
+    """
+    Result of a finished game.
+    """
+    player: str = None
+    dimensions: Tuple[int, int] = None
+    bomb_percent: float = None
+    win: bool = False
+    seconds: float = 0.0
+    moves: int = 0
+    finished: float = None  # time.time() of the end of the game
+
+    def __init__(self, player: str, dimensions: Tuple[int, int], bomb_percent: float, win: bool, seconds: float,
+                 moves: int = 0, finished: float = None):
+        self.player = player
+        self.dimensions = tuple(dimensions)
+        self.bomb_percent = float(bomb_percent)
+        self.win = bool(win)
+        self.seconds = seconds
+        self.moves = moves
+        self.finished = time() if finished is None else finished
+
+    @property
+    def settings(self) -> Settings:
+        return self.dimensions[0], self.dimensions[1], self.bomb_percent
+
+    def to_row(self) -> tuple:
+        return (self.player, self.dimensions[0], self.dimensions[1], self.bomb_percent, int(self.win), self.seconds,
+                self.moves, self.finished)
+
+
+class ResultStore(object):
+    """
+    Record the results of the games and query the leaderboards and the statistics of the players.
+
+        store = ResultStore(path)
+        store.start()
+        store.record(Result(player, (16, 30), 20.6, True, 95.2))
+        store.leaderboard((16, 30), 20.6)
+        store.stop()
+
+    The queries that read the database (rank, percentile, statistics) do not see the results recorded but not
+    written yet; flush() waits for them. If the database can not be opened, the results are dropped and the
+    leaderboards are empty, so the game goes on without them.
+    """
+    path: str = None
+    batch_size: int = BATCH_SIZE
+    leaderboard_size: int = LEADERBOARD_SIZE
+
+    __queue: queue.Queue = None  # results to write, None stops the writer
+    __thread: threading.Thread = None
+    __ready: threading.Event = None  # the schema exists
+    __readers: threading.local = None  # connection of each thread that reads
+    __leaderboards: Dict[Settings, List[Entry]] = None  # best times of the settings, sorted
+    __recorded: Dict[Settings, List[Entry]] = None  # best times recorded for the settings not in __leaderboards yet
+    __failed: bool = False  # the database could not be opened
+    __lock: threading.Lock = None
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE, leaderboard_size: int = LEADERBOARD_SIZE):
+        """
+        :param path: the database file, created with its directory if it does not exist.
+        :param batch_size: the maximum quantity of results written in one transaction.
+        :param leaderboard_size: the quantity of times of a leaderboard.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.leaderboard_size = leaderboard_size
+        self.__queue = queue.Queue()
+        self.__ready = threading.Event()
+        self.__readers = threading.local()
+        self.__leaderboards = dict()
+        self.__recorded = dict()
+        self.__lock = threading.Lock()
+
+    def __connect(self):
+        import sqlite3
+
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")  # the readers do not wait for the writer
+        connection.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, no sync on each transaction
+        return connection
+
+    def __reader(self):
+        import sqlite3
+
+        if self.__thread is None:
+            raise RuntimeError("The result store is not started")
+
+        self.__ready.wait()
+        if self.__failed:
+            raise sqlite3.OperationalError("The database {} could not be opened".format(self.path))
+
+        connection = getattr(self.__readers, "connection", None)
+
+        if connection is None:
+            connection = self.__readers.connection = self.__connect()
+
+        return connection
+
+    def start(self) -> None:
+        """
+        Start the writer thread, that also creates the database.
+        """
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.__run, name="ResultStore", daemon=True)
+            self.__thread.start()
+
+    def stop(self) -> None:
+        """
+        Write the results left and stop the writer thread.
+        """
+        if self.__thread is not None:
+            self.__queue.put(None)
+            self.__thread.join()
+            self.__thread = None
+
+        connection = getattr(self.__readers, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.__readers.connection = None
+
+    def flush(self) -> None:
+        """
+        Wait until all the recorded results are written.
+        """
+        if self.__thread is None:
+            raise RuntimeError("The result store is not started")
+
+        self.__queue.join()
+
+    def __run(self):
+        import sqlite3
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = self.__connect()
+
+            with connection:
+                for statement in SCHEMA:
+                    connection.execute(statement)
+        except (OSError, sqlite3.Error) as e:
+            print("The results can not be kept in {}: {}".format(self.path, e), file=sys.stderr)
+            self.__failed = True
+        finally:
+            self.__ready.set()
+
+        if self.__failed:
+            # The results are dropped, so flush() does not wait for them
+            while True:
+                result = self.__queue.get()
+                self.__queue.task_done()
+
+                if result is None:
+                    return
+
+        stopped = False
+
+        while not stopped:
+            batch = [self.__queue.get()]
+
+            # Everything that is waiting goes in the same transaction
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.__queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            results = [result for result in batch if result is not None]
+            stopped = len(results) < len(batch)
+
+            try:
+                if results:
+                    with connection:
+                        connection.executemany(INSERT, [result.to_row() for result in results])
+
+                    Metrics.count("results.written", len(results))
+                    Metrics.count("results.batches")
+            except sqlite3.Error as e:
+                # The game goes on without the results (e.g. the disk is full)
+                print("The results could not be written: {}".format(e), file=sys.stderr)
+                Metrics.count("results.failed", len(results))
+            finally:
+                for item in batch:
+                    self.__queue.task_done()
+
+        connection.close()
+
+    def record(self, result: Result) -> None:
+        """
+        Queue a result to be written and add it to the leaderboard of its settings. Does not wait for the disk.
+        """
+        self.__queue.put(result)
+
+        if result.win:
+            with self.__lock:
+                # Before the first query of the settings the best times are kept apart, to be added to the ones read
+                leaderboard = self.__leaderboards.get(result.settings)
+                if leaderboard is None:
+                    leaderboard = self.__recorded.setdefault(result.settings, list())
+
+                insort(leaderboard, (result.seconds, result.player, result.finished))
+                del leaderboard[self.leaderboard_size:]
+
+    @Metrics.timed("results.leaderboard")
+    def leaderboard(self, dimensions: Tuple[int, int], bomb_percent: float) -> List[Entry]:
+        """
+        :return: the best times of the settings, as (seconds, player, finished), from memory after the first query.
+                 Empty if the database can not be opened.
+        """
+        import sqlite3
+
+        settings = (dimensions[0], dimensions[1], float(bomb_percent))
+
+        with self.__lock:
+            leaderboard = self.__leaderboards.get(settings)
+
+        if leaderboard is not None:
+            return list(leaderboard)
+
+        # The database is read without the lock and without waiting for the writer: the results not written yet are
+        # the ones kept by record
+        try:
+            rows = [tuple(row) for row in self.__reader().execute(
+                "SELECT seconds, player, finished FROM results "
+                "WHERE rows = ? AND cols = ? AND bomb_percent = ? AND win = 1 ORDER BY seconds LIMIT ?",
+                settings + (self.leaderboard_size,))]
+        except sqlite3.Error as e:
+            if not self.__failed:
+                print("The leaderboard could not be read: {}".format(e), file=sys.stderr)
+            return list()
+
+        with self.__lock:
+            leaderboard = self.__leaderboards.get(settings)
+
+            if leaderboard is None:
+                # A result written between the query and now is in both, once
+                entries = set(rows).union(self.__recorded.pop(settings, list()))
+                leaderboard = self.__leaderboards[settings] = sorted(entries)[:self.leaderboard_size]
+
+            return list(leaderboard)
+
+    def rank(self, dimensions: Tuple[int, int], bomb_percent: float, seconds: float) -> float:
+        """
+        :return: the fraction of the wins of the settings faster than a time (0 is the best time)
+        """
+        settings = (dimensions[0], dimensions[1], float(bomb_percent))
+        reader = self.__reader()
+        where = "WHERE rows = ? AND cols = ? AND bomb_percent = ? AND win = 1"
+
+        total = reader.execute("SELECT COUNT(*) FROM results " + where, settings).fetchone()[0]
+        if not total:
+            return 0.0
+
+        faster = reader.execute("SELECT COUNT(*) FROM results " + where + " AND seconds < ?",
+                                settings + (seconds,)).fetchone()[0]
+        return faster / total
+
+    def percentile(self, player: str, dimensions: Tuple[int, int], bomb_percent: float,
+                   percent: float) -> Optional[float]:
+        """
+        :return: the time of the wins of a player in the settings at a percentile (50 is the median), or None if the
+                 player has no wins
+        """
+        settings = (player, dimensions[0], dimensions[1], float(bomb_percent))
+        reader = self.__reader()
+        where = "WHERE player = ? AND rows = ? AND cols = ? AND bomb_percent = ? AND win = 1"
+
+        wins = reader.execute("SELECT COUNT(*) FROM results " + where, settings).fetchone()[0]
+        if not wins:
+            return None
+
+        offset = min(wins - 1, int(wins * percent / 100))
+        return reader.execute("SELECT seconds FROM results " + where + " ORDER BY seconds LIMIT 1 OFFSET ?",
+                              settings + (offset,)).fetchone()[0]
+
+    def statistics(self, player: str, dimensions: Tuple[int, int], bomb_percent: float) -> Dict[str, float]:
+        """
+        :return: the games, wins, win rate and best time of a player in the settings
+        """
+        games, wins, best = self.__reader().execute(
+            "SELECT COUNT(*), SUM(win), MIN(CASE WHEN win THEN seconds END) FROM results "
+            "WHERE player = ? AND rows = ? AND cols = ? AND bomb_percent = ?",
+            (player, dimensions[0], dimensions[1], float(bomb_percent))).fetchone()
+
+        return {"games": games, "wins": wins or 0, "win_rate": (wins or 0) / games if games else 0.0, "best": best}
+
+
+def format_leaderboard(entries: List[Entry]) -> List[str]:
+    """
+    :param entries: a leaderboard (see ResultStore.leaderboard).
+    :return: the lines shown to the player: position, player and time in MM:SS
+    """
+    return ["{}. {} {}".format(position + 1, player, Time.format_time(Time.calculate_time(0, seconds)))
+            for position, (seconds, player, finished) in enumerate(entries)]
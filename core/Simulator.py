@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Headless self-play of many games, spread across a pool of processes.
+"""
+
+from typing import Tuple, List, Dict
+from random import Random
+from time import perf_counter
+import argparse
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState, Move, REVEAL, FLAG, CHORD
+from core.Solver import Solver
+from core.Probability import ProbabilityEngine
+from core.Placement import new_seed, derive_seed
+from core.Workers import run_units
+
+
+class RandomStrategy(object):
+    """
+    Open a random hidden field on every move.
+    """
+    name = "random"
+
+    def next_move(self, state: GameState, rng: Random) -> Move:
+        return REVEAL, rng.choice(state.hidden_fields())
+
+
+class SolverStrategy(object):
+    """
+    Simple deterministic solver: for each opened number, if all its bombs are flagged open the other neighbours
+    (chord), if all its hidden neighbours must be bombs flag them. Opens a random field when nothing is certain.
+    """
+    name = "solver"
+
+    def next_move(self, state: GameState, rng: Random) -> Move:
+        for coords in state.frontier():
+            hidden, flagged = state.around(coords)
+            value = state.value(coords)
+
+            if flagged == value:
+                return CHORD, coords
+            elif value - flagged == len(hidden):
+                return FLAG, hidden[0]
+
+        return REVEAL, rng.choice(state.hidden_fields())
+
+
+class ConstraintStrategy(object):
+    """
+    Open the safe fields found by the constraint solver (core.Solver), or the field less likely to have a mine.
+    The safe fields of a solution stay safe after other moves, so the solver only runs when they are all opened.
+    """
+    name = "constraint"
+
+    __solver: Solver = None
+    __safe: List[Tuple[int, int]] = None
+
+    def __init__(self):
+        self.__solver = Solver()
+        self.__safe = list()
+
+    def next_move(self, state: GameState, rng: Random) -> Move:
+        while self.__safe:
+            coords = self.__safe.pop()
+            if not state.is_revealed(coords) and not state.is_flagged(coords):
+                return REVEAL, coords
+
+        solution = self.__solver.solve(state)
+        self.__safe = sorted(solution.safe, reverse=True)
+
+        guess = solution.best_guess()
+        if guess is None or state.is_revealed(guess) or state.is_flagged(guess):
+            return REVEAL, rng.choice(state.hidden_fields())
+
+        return REVEAL, guess
+
+
+class ProbabilityStrategy(object):
+    """
+    Open the safe fields, or the field less likely to have a mine with the exact probabilities of core.Probability.
+    The engine is updated with the fields changed by each move (see observe), it is not solved from scratch.
+    """
+    name = "probability"
+
+    __engine: ProbabilityEngine = None
+
+    def next_move(self, state: GameState, rng: Random) -> Move:
+        if self.__engine is None:
+            self.__engine = ProbabilityEngine(state)
+
+        return REVEAL, self.__engine.best_guess()
+
+    def observe(self, fields: List[Tuple[int, int]]) -> None:
+        self.__engine.update(fields)
+
+
+STRATEGIES = {
+    RandomStrategy.name: RandomStrategy,
+    SolverStrategy.name: SolverStrategy,
+    ConstraintStrategy.name: ConstraintStrategy,
+    ProbabilityStrategy.name: ProbabilityStrategy
+}
+
+
+def play_game(board: MinesweeperBoard, strategy, rng: Random) -> Tuple[bool, int]:
+    """
+    Play a game until the end.
+
+    :param board: the generated board.
+    :param strategy: the object that chooses the moves.
+    :param rng: the random generator of the strategy.
+    :return: (True if the game was won, quantity of moves)
+    """
+    state = GameState(board)
+    moves = 0
+    observe = getattr(strategy, "observe", None)  # strategies that follow the changes of the moves
+
+    while not state.finished:
+        changed = state.apply(strategy.next_move(state, rng))
+        moves += 1
+
+        if observe is not None:
+            observe(changed)
+
+    return state.win, moves
+
+
+def play_chunk(dimensions: Tuple[int, int], bomb_percent: float, strategy: str, games: int,
+               seed: int) -> Tuple[int, int, int]:
+    """
+    Work unit of the pool: generate and play a chunk of games with its own random generator.
+
+    :return: (games, wins, moves)
+    """
+    rng = Random(seed)
+    wins = moves = 0
+
+    for g in range(games):
+        board = MinesweeperBoard(dimensions, bomb_percent)
+        board.generate_board(rng)
+
+        # A new strategy for each game, the strategies can keep state between the moves
+        win, m = play_game(board, STRATEGIES[strategy](), rng)
+        wins += win
+        moves += m
+
+    return games, wins, moves
+
+
+class SimulationResult(object):
+    games: int = 0
+    wins: int = 0
+    moves: int = 0
+    seconds: float = 0
+
+    def __init__(self, games: int, wins: int, moves: int, seconds: float):
+        self.games = games
+        self.wins = wins
+        self.moves = moves
+        self.seconds = seconds
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0
+
+    @property
+    def moves_per_game(self) -> float:
+        return self.moves / self.games if self.games else 0
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "win_rate": self.win_rate,
+            "moves_per_game": self.moves_per_game,
+            "games_per_second": self.games_per_second
+        }
+
+    def __str__(self):
+        return "=== [SIMULATION] ===\n" \
+               "- Games: {}\n" \
+               "- Win rate: {:.2f}%\n" \
+               "- Moves per game: {:.1f}\n" \
+               "- Games per second: {:.1f}\n" \
+            .format(self.games, self.win_rate * 100, self.moves_per_game, self.games_per_second)
+
+
+def simulate(games: int, dimensions: Tuple[int, int], bomb_percent: float, strategy: str = SolverStrategy.name,
+             workers: int = None, chunk_size: int = 100, seed: int = None) -> SimulationResult:
+    """
+    Play many games in a process pool. The games are split in chunks and every chunk gets its own seed, taken from
+    the master seed and the index of the chunk, so a run with the same seed and chunk size is reproducible for any
+    quantity of workers.
+
+    :param games: the quantity of games.
+    :param dimensions: the dimensions of the boards.
+    :param bomb_percent: the bomb percent of the boards.
+    :param strategy: the name of the strategy (see STRATEGIES).
+    :param workers: the quantity of processes. If 1, the games are played in this process.
+    :param chunk_size: the quantity of games of each work unit.
+    :param seed: the master seed. If None, a new one is used.
+    :return: the statistics of the games
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError("Unknown strategy: {}".format(strategy))
+
+    # Validate the settings before starting the workers
+    MinesweeperBoard(dimensions, bomb_percent)
+
+    seed = new_seed() if seed is None else seed
+    chunks: List[Tuple[int, int]] = list()
+    for start in range(0, games, chunk_size):
+        chunks.append((min(chunk_size, games - start), derive_seed(seed, start // chunk_size)))
+
+    start = perf_counter()
+
+    results = run_units(play_chunk, ((dimensions, bomb_percent, strategy, n, s) for n, s in chunks), workers)
+
+    seconds = perf_counter() - start
+
+    return SimulationResult(sum(r[0] for r in results),
+                            sum(r[1] for r in results),
+                            sum(r[2] for r in results),
+                            seconds)
+
+
+def parse_dimensions(value: str) -> Tuple[int, int]:
+    rows, cols = value.lower().split("x")
+    return int(rows), int(cols)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog="minesweeper.py simulate", description="Play many games headless")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("-d", "--dimensions", type=parse_dimensions, default=(16, 16), help="ROWSxCOLS")
+    parser.add_argument("-b", "--bomb-percent", type=float, default=15)
+    parser.add_argument("-s", "--strategy", choices=sorted(STRATEGIES), default=SolverStrategy.name)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="default: the quantity of CPUs")
+    parser.add_argument("-c", "--chunk-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print(simulate(args.games, args.dimensions, args.bomb_percent, args.strategy,
+                   args.workers, args.chunk_size, args.seed))
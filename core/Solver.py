@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+"""
+Constraint solver over the player-visible state of a game.
+
+Every opened number gives a constraint "the sum of the mines in these unopened fields is N". The flags of the
+player are not trusted: flagged fields are unknown like the hidden ones.
+"""
+
+from typing import Tuple, List, Dict, Set, Optional, FrozenSet
+from collections import OrderedDict, defaultdict, deque
+
+from core.State import GameState
+
+Cell = Tuple[int, int]
+Constraint = Tuple[FrozenSet[Cell], int]
+
+
+class Component(object):
+    """
+    All the valid mine assignments of a connected group of frontier fields.
+
+    totals[k] is the quantity of assignments with k mines and counts[k][i] is how many of them have a mine in
+    cells[i].
+    """
+    cells: List[Cell] = None
+    totals: Dict[int, int] = None
+    counts: Dict[int, List[int]] = None
+
+    def __init__(self, cells: List[Cell], totals: Dict[int, int], counts: Dict[int, List[int]]):
+        self.cells = cells
+        self.totals = totals
+        self.counts = counts
+
+    def translate(self, row: int, col: int) -> 'Component':
+        return Component([(r + row, c + col) for r, c in self.cells], self.totals, self.counts)
+
+    def probabilities(self) -> Dict[Cell, float]:
+        """
+        :return: the probability of a mine in each cell, considering all the assignments equally likely
+        """
+        total = sum(self.totals.values())
+        mines = [0] * len(self.cells)
+
+        if total == 0:  # contradictory constraints
+            return dict()
+
+        for k, counts in self.counts.items():
+            for i, count in enumerate(counts):
+                mines[i] += count
+
+        return {cell: mines[i] / total for i, cell in enumerate(self.cells)}
+
+
+class Solution(object):
+    """
+    Result of the solver.
+    """
+    safe: Set[Cell] = None  # fields that certainly have no mine
+    mines: Set[Cell] = None  # fields that certainly have a mine
+    probabilities: Dict[Cell, float] = None  # probability of a mine in the unknown fields of the frontier
+    unconstrained: List[Cell] = None  # unknown fields without any opened number around
+    other: float = 0  # estimated probability of a mine in each unconstrained field
+    exact: bool = False  # True if the probabilities are exact (see core.Probability)
+
+    def __init__(self):
+        self.safe = set()
+        self.mines = set()
+        self.probabilities = dict()
+        self.unconstrained = list()
+
+    def heat_map(self) -> Dict[Cell, float]:
+        """
+        :return: the probability of a mine in every unknown field
+        """
+        heat_map = dict.fromkeys(self.unconstrained, self.other)
+        heat_map.update(self.probabilities)
+        heat_map.update(dict.fromkeys(self.safe, 0.0))
+        heat_map.update(dict.fromkeys(self.mines, 1.0))
+        return heat_map
+
+    def best_guess(self) -> Optional[Cell]:
+        """
+        :return: a safe field if there is one, or else the unknown field less likely to have a mine
+        """
+        if self.safe:
+            return min(self.safe)
+
+        guess = min(self.probabilities.items(), key=lambda item: item[1], default=None)
+
+        if self.unconstrained and (guess is None or self.other < guess[1]):
+            return self.unconstrained[0]
+
+        return guess[0] if guess is not None else None
+
+
+def reduce_constraints(constraints: List[Constraint], safe: Set[Cell], mines: Set[Cell]) -> List[Constraint]:
+    """
+    Apply the single field rules (no mines left or all fields are mines) and the subset rule (if A is a subset of B,
+    then B - A has count(B) - count(A) mines) until nothing changes.
+
+    :param constraints: the constraints of the opened numbers.
+    :param safe: receives the fields found safe.
+    :param mines: receives the fields found with a mine.
+    :return: the constraints left, without any known field
+    """
+    constraints = list(set(constraints))
+
+    while True:
+        changed = False
+        reduced = set()
+
+        for cells, count in constraints:
+            if not cells.isdisjoint(safe) or not cells.isdisjoint(mines):
+                count -= len(cells & mines)
+                cells = cells - safe - mines
+
+            if not cells:
+                continue
+            elif count == 0:
+                safe.update(cells)
+                changed = True
+            elif count == len(cells):
+                mines.update(cells)
+                changed = True
+            else:
+                reduced.add((cells, count))
+
+        constraints = list(reduced)
+
+        if changed:
+            continue
+
+        # Subset rule, only between constraints that share a field
+        by_cell: Dict[Cell, List[int]] = defaultdict(list)
+        for i, (cells, count) in enumerate(constraints):
+            for cell in cells:
+                by_cell[cell].append(i)
+
+        for i, (cells, count) in enumerate(constraints):
+            others = set()
+            for cell in cells:
+                others.update(by_cell[cell])
+
+            for j in others:
+                other_cells, other_count = constraints[j]
+
+                if i != j and cells < other_cells:
+                    derived = (other_cells - cells, other_count - count)
+
+                    if derived not in reduced:
+                        reduced.add(derived)
+                        changed = True
+
+        if not changed:
+            return constraints
+
+        constraints = list(reduced)
+
+
+def split_components(constraints: List[Constraint]) -> List[List[Constraint]]:
+    """
+    Split the constraints in groups that do not share any field.
+    """
+    parent: Dict[Cell, Cell] = dict()
+
+    def find(cell: Cell) -> Cell:
+        root = cell
+        while parent[root] != root:
+            root = parent[root]
+        while parent[cell] != root:
+            parent[cell], cell = root, parent[cell]
+        return root
+
+    for cells, count in constraints:
+        first = None
+        for cell in cells:
+            parent.setdefault(cell, cell)
+            if first is None:
+                first = find(cell)
+            else:
+                parent[find(cell)] = first
+
+    groups: Dict[Cell, List[Constraint]] = defaultdict(list)
+    for constraint in constraints:
+        groups[find(next(iter(constraint[0])))].append(constraint)
+
+    return list(groups.values())
+
+
+def enumerate_component(constraints: List[Constraint]) -> Component:
+    """
+    Enumerate all the mine assignments of a component that satisfy its constraints, with backtracking. The fields
+    are assigned in breadth first order over the constraints, so a constraint is checked as soon as possible.
+    """
+    by_cell: Dict[Cell, List[int]] = defaultdict(list)
+    for i, (cells, count) in enumerate(constraints):
+        for cell in cells:
+            by_cell[cell].append(i)
+
+    # Breadth first order of the fields
+    cells: List[Cell] = list()
+    seen: Set[Cell] = set()
+    for start in sorted(by_cell):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            cells.append(cell)
+            for i in by_cell[cell]:
+                for other in sorted(constraints[i][0]):
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+
+    size = len(cells)
+    cell_constraints = [by_cell[cell] for cell in cells]
+    remaining = [count for cells_, count in constraints]  # mines still needed by each constraint
+    unassigned = [len(cells_) for cells_, count in constraints]  # fields not assigned of each constraint
+    assignment = [0] * size
+
+    totals: Dict[int, int] = defaultdict(int)
+    counts: Dict[int, List[int]] = dict()
+
+    def backtrack(i: int, mines: int):
+        if i == size:
+            totals[mines] += 1
+            mine_counts = counts.setdefault(mines, [0] * size)
+            for j in range(size):
+                mine_counts[j] += assignment[j]
+            return
+
+        for value in (0, 1):
+            valid = True
+            for c in cell_constraints[i]:
+                unassigned[c] -= 1
+                remaining[c] -= value
+                if remaining[c] < 0 or remaining[c] > unassigned[c]:
+                    valid = False
+
+            if valid:
+                assignment[i] = value
+                backtrack(i + 1, mines + value)
+
+            for c in cell_constraints[i]:
+                unassigned[c] += 1
+                remaining[c] += value
+
+        assignment[i] = 0
+
+    backtrack(0, 0)
+    return Component(cells, dict(totals), counts)
+
+
+class Solver(object):
+    """
+    Find the safe fields and the mines of a game, and estimate the probability of a mine in the unknown fields.
+
+    The components are cached by their signature (the constraints translated to the top left corner of the
+    component), so the components not touched by a move are not enumerated again.
+    """
+    max_component = 32  # components with more fields are not enumerated
+    cache_size = 4096
+
+    __cache: OrderedDict = None
+
+    def __init__(self):
+        self.__cache = OrderedDict()
+
+    @staticmethod
+    def constraints(state: GameState) -> List[Constraint]:
+        """
+        :return: the constraints of all the opened numbers of the game
+        """
+        constraints = list()
+
+        for coords in state.frontier(flagged=True):
+            constraints.append((frozenset(state.unopened_neighbours(coords)), state.value(coords)))
+
+        return constraints
+
+    def component(self, constraints: List[Constraint]) -> Component:
+        """
+        Enumerate a component, using the cache.
+        """
+        row = min(r for cells, count in constraints for r, c in cells)
+        col = min(c for cells, count in constraints for r, c in cells)
+        signature = frozenset((frozenset((r - row, c - col) for r, c in cells), count) for cells, count in constraints)
+
+        component = self.__cache.get(signature)
+        if component is None:
+            translated = [([(r - row, c - col) for r, c in cells], count) for cells, count in constraints]
+            component = enumerate_component([(frozenset(cells), count) for cells, count in translated])
+            self.__cache[signature] = component
+
+            if len(self.__cache) > self.cache_size:
+                self.__cache.popitem(last=False)
+        else:
+            self.__cache.move_to_end(signature)
+
+        return component.translate(row, col)
+
+    def solve(self, state: GameState) -> Solution:
+        """
+        Solve the visible state of a game.
+
+        :param state: the state of the game.
+        :return: the safe fields, the mines and the probabilities
+        """
+        solution = Solution()
+        constraints = reduce_constraints(self.constraints(state), solution.safe, solution.mines)
+        expected_mines = 0.0
+
+        for group in split_components(constraints):
+            cells = set()
+            for constraint_cells, count in group:
+                cells.update(constraint_cells)
+
+            if len(cells) > self.max_component:
+                # Too big to enumerate: use the density of the constraints of each field
+                for cell in cells:
+                    densities = [count / len(c) for c, count in group if cell in c]
+                    solution.probabilities[cell] = sum(densities) / len(densities)
+            else:
+                for cell, probability in self.component(group).probabilities().items():
+                    if probability == 0:
+                        solution.safe.add(cell)
+                    elif probability == 1:
+                        solution.mines.add(cell)
+                    else:
+                        solution.probabilities[cell] = probability
+
+            expected_mines += sum(solution.probabilities.get(cell, 0) for cell in cells)
+
+        known = solution.safe | solution.mines | set(solution.probabilities)
+        solution.unconstrained = [cell for cell in state.hidden_fields() + state.flagged_fields() if cell not in known]
+        solution.unconstrained.sort()
+
+        if solution.unconstrained:
+            left = state.board.total_bombs - len(solution.mines) - expected_mines
+            solution.other = min(1.0, max(0.0, left / len(solution.unconstrained)))
+
+        return solution
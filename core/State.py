@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+
+from typing import Tuple, List, Optional
+from collections import deque
+
+from core.Engine import MinesweeperBoard
+from core import Metrics
+
+BOMB = -1  # Value of the bombs in the flat board of the state
+
+# Status of the fields
+HIDDEN = 0
+REVEALED = 1
+FLAGGED = 2
+
+# Values of the fields that are not opened in the board seen by the player (see GameState.visible)
+HIDDEN_VALUE = -2
+FLAGGED_VALUE = -3
+
+# Actions of a move: (action, (row, col))
+REVEAL = "reveal"
+FLAG = "flag"
+CHORD = "chord"
+
+# Actions of the replays of the games (see core.Verifier), applied by core.History and not by the state
+UNDO = "undo"
+REDO = "redo"
+
+Move = Tuple[str, Tuple[int, int]]
+
+# Status of all the fields and the counters of a state: (status, correct flags, wrong flags, unrevealed safe, exploded)
+Snapshot = Tuple[bytes, int, int, int, int]
+
+
+class GameState(object):
+    """
+    State of a game over a MinesweeperBoard, independent of the UI.
+
+    The fields are stored in flat arrays with a border of one field around the board, so the 8 neighbours of any
+    field of the board are always at the same offsets and the border is never opened (it is marked as revealed).
+
+    All the counters are updated on each move, so the end of the game is known in constant time. The player wins
+    by flagging exactly all the bombs or by opening all the safe fields, and loses by opening a bomb.
+
+    A move can be undone and redone with the fields it changed (revert and replay, see core.History), and the whole
+    state can be saved and restored (snapshot and restore).
+    """
+    board: MinesweeperBoard = None
+
+    __rows: int
+    __cols: int
+    __width: int  # columns + 2 (the border)
+    __offsets: Tuple[int, ...]  # offsets of the 8 neighbours in the flat arrays
+    __values: List[int] = None  # quantity of bombs nearby of each field, BOMB for the bombs
+    __status: bytearray = None  # HIDDEN, REVEALED or FLAGGED for each field (the border is REVEALED)
+
+    __correct_flags: int = 0
+    __wrong_flags: int = 0
+    __unrevealed_safe: int = 0
+    __exploded: int = 0  # opened bombs
+    __win: Optional[bool] = None
+
+    def __init__(self, board: MinesweeperBoard):
+        self.board = board
+
+        rows, cols = board.dimensions
+        width = cols + 2
+        self.__rows = rows
+        self.__cols = cols
+        self.__width = width
+        self.__offsets = (-width - 1, -width, -width + 1, -1, 1, width - 1, width, width + 1)
+
+        if board.grid is not None:
+            # Compact board: core.Compact.BOMB is the same sentinel
+            import numpy as np
+            self.__values = np.pad(board.grid, 1).ravel().tolist()
+        else:
+            self.__values = [0] * width
+            for row in board.board:
+                self.__values.append(0)
+                self.__values.extend(BOMB if value == '*' else value for value in row)
+                self.__values.append(0)
+            self.__values.extend([0] * width)
+
+        self.__status = bytearray([REVEALED]) * width
+        border = bytes([REVEALED]) + bytes([HIDDEN]) * cols + bytes([REVEALED])
+        for row in range(rows):
+            self.__status += border
+        self.__status += bytes([REVEALED]) * width
+
+        self.__unrevealed_safe = rows * cols - board.total_bombs
+
+    def __index(self, coords: Tuple[int, int]) -> int:
+        if not (0 <= coords[0] < self.__rows and 0 <= coords[1] < self.__cols):
+            raise ValueError("The field {} is out of the board".format(coords))
+
+        return (coords[0] + 1) * self.__width + coords[1] + 1
+
+    def __coords(self, index: int) -> Tuple[int, int]:
+        row, col = divmod(index, self.__width)
+        return row - 1, col - 1
+
+    def is_revealed(self, coords: Tuple[int, int]) -> bool:
+        return self.__status[self.__index(coords)] == REVEALED
+
+    def is_flagged(self, coords: Tuple[int, int]) -> bool:
+        return self.__status[self.__index(coords)] == FLAGGED
+
+    def value(self, coords: Tuple[int, int]) -> Optional[int]:
+        """
+        :return: the quantity of bombs nearby of an opened field (BOMB for an opened bomb) or None if it is not opened
+        """
+        index = self.__index(coords)
+        return self.__values[index] if self.__status[index] == REVEALED else None
+
+    def neighbours(self, coords: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        :return: the neighbours of a field inside the board
+        """
+        index = self.__index(coords)
+        return [self.__coords(index + offset) for offset in self.__offsets
+                if 0 <= (index + offset) // self.__width - 1 < self.__rows
+                and 0 <= (index + offset) % self.__width - 1 < self.__cols]
+
+    def visible_value(self, coords: Tuple[int, int]) -> int:
+        """
+        :return: the value of a field seen by the player, see visible
+        """
+        index = self.__index(coords)
+        status = self.__status[index]
+
+        if status == REVEALED:
+            return self.__values[index]
+
+        return HIDDEN_VALUE if status == HIDDEN else FLAGGED_VALUE
+
+    def visible(self) -> List[int]:
+        """
+        The board seen by the player, without the answer: the quantity of bombs nearby of the opened fields, BOMB for
+        an opened bomb, HIDDEN_VALUE for the hidden fields and FLAGGED_VALUE for the flagged ones.
+
+        :return: the values of all the fields, row by row (row * cols + col)
+        """
+        status = self.__status
+        values = self.__values
+        hidden = {HIDDEN: HIDDEN_VALUE, FLAGGED: FLAGGED_VALUE}
+        visible = list()
+
+        for start in range(self.__width + 1, len(status) - self.__width, self.__width):
+            visible.extend(values[index] if status[index] == REVEALED else hidden[status[index]]
+                           for index in range(start, start + self.__cols))
+
+        return visible
+
+    def hidden_fields(self) -> List[Tuple[int, int]]:
+        """
+        :return: the sorted list of the fields not opened and not flagged
+        """
+        return [self.__coords(index) for index, status in enumerate(self.__status) if status == HIDDEN]
+
+    def frontier(self, flagged: bool = False) -> List[Tuple[int, int]]:
+        """
+        :param flagged: if True, the flagged neighbours count as hidden.
+        :return: the opened numbers with at least one hidden neighbour
+        """
+        status = self.__status
+        values = self.__values
+        offsets = self.__offsets
+        frontier = list()
+        closed = (REVEALED,) if flagged else (REVEALED, FLAGGED)
+
+        for index in range(self.__width, len(status) - self.__width):
+            if status[index] == REVEALED and values[index] > 0:
+                for offset in offsets:
+                    if status[index + offset] not in closed:
+                        frontier.append(self.__coords(index))
+                        break
+
+        return frontier
+
+    def around(self, coords: Tuple[int, int]) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        :return: the hidden neighbours of a field and the quantity of flagged neighbours
+        """
+        index = self.__index(coords)
+        status = self.__status
+        hidden = list()
+        flagged = 0
+
+        for offset in self.__offsets:
+            if status[index + offset] == HIDDEN:
+                hidden.append(self.__coords(index + offset))
+            elif status[index + offset] == FLAGGED:
+                flagged += 1
+
+        return hidden, flagged
+
+    def unopened_neighbours(self, coords: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        :return: the hidden and flagged neighbours of a field
+        """
+        index = self.__index(coords)
+        status = self.__status
+
+        return [self.__coords(index + offset) for offset in self.__offsets if status[index + offset] != REVEALED]
+
+    def flagged_fields(self) -> List[Tuple[int, int]]:
+        """
+        :return: the sorted list of all the flagged fields
+        """
+        return [self.__coords(index) for index, status in enumerate(self.__status) if status == FLAGGED]
+
+    @Metrics.timed("state.reveal")
+    def reveal(self, coords: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Open a field. If the field has no bombs nearby, all the connected empty fields and their neighbours (in the
+        8 directions) are opened too, using an explicit queue instead of recursion. Flagged fields are never opened.
+
+        :param coords: the (row, col) of the field.
+        :return: the list of the fields opened by this move, in the order they were opened
+        """
+        start = self.__index(coords)
+
+        if self.__win is not None or self.__status[start] != HIDDEN:
+            return list()
+
+        return [self.__coords(index) for index in self.__open([start])]
+
+    @Metrics.timed("state.chord")
+    def chord(self, coords: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Open all the hidden neighbours of an opened number whose bombs are already flagged around it.
+
+        :param coords: the (row, col) of the number.
+        :return: the list of the fields opened by this move
+        """
+        index = self.__index(coords)
+        status = self.__status
+
+        if self.__win is not None or status[index] != REVEALED or self.__values[index] <= 0:
+            return list()
+
+        neighbours = [index + offset for offset in self.__offsets]
+
+        if sum(1 for neighbour in neighbours if status[neighbour] == FLAGGED) != self.__values[index]:
+            return list()
+
+        return [self.__coords(i) for i in self.__open([n for n in neighbours if status[n] == HIDDEN])]
+
+    def apply(self, move: Move) -> List[Tuple[int, int]]:
+        """
+        Apply a move (REVEAL, FLAG or CHORD) on a field.
+
+        :param move: the (action, (row, col)) of the move.
+        :return: the fields changed by the move
+        """
+        action, coords = move
+
+        if action == REVEAL:
+            return self.reveal(coords)
+        elif action == CHORD:
+            return self.chord(coords)
+        elif action == FLAG:
+            was_flagged = self.is_flagged(coords)
+            return [coords] if self.flag(coords) != was_flagged else list()
+
+        raise ValueError("Unknown action: {}".format(action))
+
+    def __open(self, indexes: List[int]) -> List[int]:
+        """
+        Open the hidden fields and flood fill from the empty ones, updating the counters.
+
+        :param indexes: flat indexes of hidden fields.
+        :return: the flat indexes of all the opened fields
+        """
+        status = self.__status
+        values = self.__values
+        offsets = self.__offsets
+
+        opened = list()
+        queue = deque()
+        bombs = 0  # only the fields in indexes can be bombs, the flood fill never reaches a bomb
+
+        for index in indexes:
+            status[index] = REVEALED
+            opened.append(index)
+
+            if values[index] == BOMB:
+                bombs += 1
+                self.__win = False
+            elif values[index] == 0:
+                queue.append(index)
+
+        while queue:
+            index = queue.popleft()
+
+            for offset in offsets:
+                neighbour = index + offset
+
+                if not status[neighbour]:  # HIDDEN
+                    status[neighbour] = REVEALED
+                    opened.append(neighbour)
+
+                    if values[neighbour] == 0:
+                        queue.append(neighbour)
+
+        self.__unrevealed_safe -= len(opened) - bombs
+        self.__exploded += bombs
+        Metrics.count("state.opened", len(opened))
+
+        if self.__unrevealed_safe == 0 and self.__win is None:
+            self.__win = True
+
+        return opened
+
+    @Metrics.timed("state.flag")
+    def flag(self, coords: Tuple[int, int]) -> bool:
+        """
+        Mark or unmark a hidden field with a flag.
+
+        :param coords: the (row, col) of the field.
+        :return: True if the field is flagged after the move
+        """
+        index = self.__index(coords)
+        status = self.__status
+
+        if self.__win is not None or status[index] == REVEALED:
+            return status[index] == FLAGGED
+
+        self.__toggle(index)
+
+        if self.__correct_flags == self.board.total_bombs and self.__wrong_flags == 0:
+            self.__win = True
+
+        return status[index] == FLAGGED
+
+    def __toggle(self, index: int) -> None:
+        """
+        Flag a hidden field or unflag a flagged field, updating the counters.
+        """
+        status = self.__status
+        correct = 1 if self.__values[index] == BOMB else 0
+
+        if status[index] == FLAGGED:
+            status[index] = HIDDEN
+            self.__correct_flags -= correct
+            self.__wrong_flags -= 1 - correct
+        else:
+            status[index] = FLAGGED
+            self.__correct_flags += correct
+            self.__wrong_flags += 1 - correct
+
+    def __settle(self) -> None:
+        """
+        Find the end of the game from the counters, after a move was undone, redone or restored.
+        """
+        if self.__exploded:
+            self.__win = False
+        elif self.__unrevealed_safe == 0 or (self.__correct_flags == self.board.total_bombs and
+                                             self.__wrong_flags == 0):
+            self.__win = True
+        else:
+            self.__win = None
+
+    def revert(self, action: str, fields: List[Tuple[int, int]]) -> None:
+        """
+        Undo a move: close the fields opened by a REVEAL or a CHORD, or toggle back the flag of a FLAG. The moves
+        made after it must be reverted first.
+
+        :param action: the action of the move.
+        :param fields: the fields changed by the move (the result of apply).
+        """
+        status = self.__status
+        values = self.__values
+
+        for index in map(self.__index, fields):
+            if action == FLAG:
+                self.__toggle(index)
+            elif status[index] == REVEALED:
+                status[index] = HIDDEN
+                if values[index] == BOMB:
+                    self.__exploded -= 1
+                else:
+                    self.__unrevealed_safe += 1
+
+        self.__settle()
+
+    def replay(self, action: str, fields: List[Tuple[int, int]]) -> None:
+        """
+        Redo a move that was reverted: the fields are opened (or toggled) as they are, without the flood fill.
+
+        :param action: the action of the move.
+        :param fields: the fields changed by the move (the result of apply).
+        """
+        status = self.__status
+        values = self.__values
+
+        for index in map(self.__index, fields):
+            if action == FLAG:
+                self.__toggle(index)
+            elif status[index] == HIDDEN:
+                status[index] = REVEALED
+                if values[index] == BOMB:
+                    self.__exploded += 1
+                else:
+                    self.__unrevealed_safe -= 1
+
+        self.__settle()
+
+    def snapshot(self) -> Snapshot:
+        """
+        :return: a copy of the status of all the fields and of the counters
+        """
+        return (bytes(self.__status), self.__correct_flags, self.__wrong_flags, self.__unrevealed_safe,
+                self.__exploded)
+
+    def restore(self, snapshot: Snapshot) -> List[Tuple[int, int]]:
+        """
+        Go back (or forward) to a snapshot of this state.
+
+        :return: the fields whose status changed
+        """
+        status, self.__correct_flags, self.__wrong_flags, self.__unrevealed_safe, self.__exploded = snapshot
+        current = self.__status
+        width = self.__width
+        changed = list()
+
+        # Compare whole rows first: only the rows that differ are compared field by field
+        for start in range(width, len(current) - width, width):
+            if current[start:start + width] != status[start:start + width]:
+                changed.extend(self.__coords(index) for index in range(start, start + width)
+                               if current[index] != status[index])
+
+        self.__status = bytearray(status)
+        self.__settle()
+        return changed
+
+    @property
+    def win(self) -> Optional[bool]:
+        """
+        None while the game is running, True if the player won and False if the player lost.
+        """
+        return self.__win
+
+    @property
+    def finished(self) -> bool:
+        return self.__win is not None
+
+    @property
+    def flags(self) -> int:
+        return self.__correct_flags + self.__wrong_flags
+
+    @property
+    def correct_flags(self) -> int:
+        return self.__correct_flags
+
+    @property
+    def wrong_flags(self) -> int:
+        return self.__wrong_flags
+
+    @property
+    def unrevealed_safe(self) -> int:
+        return self.__unrevealed_safe
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+Headless verification of the submitted scores. The timed moves of a game are replayed against the engine, without the
+UI, to check that every move is legal, that the game was won and that the times of the moves are plausible for a
+person. The time of a verified game is the time of its last move, not the wall clock of the machine of the player.
+
+The games are submitted as a board archive and a replay log in the same directory (see submit): the game id of each
+replay is the position of its board in the archive. Many submissions are verified in a process pool, in work units
+of CHUNK_SIZE submissions; for a replay log only the paths and the range of the replays are sent to the workers, that
+open the files themselves.
+"""
+
+from typing import Tuple, List, Dict, Iterable, Optional
+from collections import Counter
+from itertools import islice
+from time import perf_counter
+import argparse
+import os
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState, UNDO, REDO
+from core.History import History
+from core.Archive import BoardArchive, ReplayLog, TimedMove
+from core.Workers import run_units
+from core import Metrics
+
+BOARDS_NAME = "submitted.boards"
+REPLAYS_NAME = "submitted.replays"
+CHUNK_SIZE = 256  # submissions of a work unit of the pool
+
+# Limits of a person: the shortest time between two moves, and the highest rate of moves in any RATE_WINDOW moves
+MIN_INTERVAL_MS = 20
+MAX_RATE = 15.0
+RATE_WINDOW = 20
+TIME_TOLERANCE = 2.0  # seconds between the time claimed by the player and the time of the last move
+
+# Reasons of the verdicts
+VALID = "valid"
+INVALID_BOARD = "invalid board"
+ILLEGAL_MOVE = "illegal move"
+MOVE_AFTER_END = "move after the end"
+UNDO_USED = "undo used"
+IMPLAUSIBLE_TIMING = "implausible timing"
+NOT_WON = "not won"
+TIME_MISMATCH = "time mismatch"
+
+
+class Rules(object):
+    """
+    Limits of the verification, the same for all the submissions of a run.
+    """
+    allow_undo: bool = False
+    min_interval_ms: int = MIN_INTERVAL_MS
+    max_rate: float = MAX_RATE  # moves per second
+    rate_window: int = RATE_WINDOW
+    time_tolerance: float = TIME_TOLERANCE
+
+    def __init__(self, allow_undo: bool = False, min_interval_ms: int = MIN_INTERVAL_MS, max_rate: float = MAX_RATE,
+                 rate_window: int = RATE_WINDOW, time_tolerance: float = TIME_TOLERANCE):
+        self.allow_undo = allow_undo
+        self.min_interval_ms = min_interval_ms
+        self.max_rate = max_rate
+        self.rate_window = rate_window
+        self.time_tolerance = time_tolerance
+
+
+class Submission(object):
+    """
+    A game to verify: the board, the timed moves of its replay and the time claimed by the player.
+    """
+    board: MinesweeperBoard = None
+    moves: List[TimedMove] = None
+    seconds: float = None  # claimed time, None if only the replay is verified
+    player: str = None
+    game: int = None  # id of the game, e.g. the position of its board in the archive
+
+    def __init__(self, board: MinesweeperBoard, moves: List[TimedMove], seconds: float = None, player: str = None,
+                 game: int = None):
+        self.board = board
+        self.moves = moves
+        self.seconds = seconds
+        self.player = player
+        self.game = game
+
+    @classmethod
+    def from_seed(cls, dimensions: Tuple[int, int], bomb_percent: float, seed: int, moves: List[TimedMove],
+                  seconds: float = None, player: str = None, game: int = None,
+                  first_click: Tuple[int, int] = None) -> 'Submission':
+        """
+        Submission of a board generated from a seed (see MinesweeperBoard.from_seed).
+        """
+        board = MinesweeperBoard.from_seed(dimensions, bomb_percent, seed, compact=True, first_click=first_click)
+        return cls(board, moves, seconds, player, game)
+
+
+class Verdict(object):
+    """
+    Result of the verification of a submission. An invalid submission has the reason and the index of the first move
+    that is not valid (None if the whole replay is the reason, e.g. a game that was not won).
+    """
+    valid: bool = False
+    reason: str = None
+    detail: str = None
+    move: int = None
+    seconds: float = None  # time of the last move of the replay
+    moves: int = 0
+    player: str = None
+    game: int = None
+
+    def __init__(self, reason: str, detail: str = None, move: int = None, seconds: float = None, moves: int = 0,
+                 player: str = None, game: int = None):
+        self.valid = reason == VALID
+        self.reason = reason
+        self.detail = detail
+        self.move = move
+        self.seconds = seconds
+        self.moves = moves
+        self.player = player
+        self.game = game
+
+    def to_dict(self) -> Dict:
+        return {
+            "valid": self.valid,
+            "reason": self.reason,
+            "detail": self.detail,
+            "move": self.move,
+            "seconds": self.seconds,
+            "moves": self.moves,
+            "player": self.player,
+            "game": self.game
+        }
+
+    def __str__(self):
+        name = "submission" if self.game is None else "game {}".format(self.game)
+        if self.player is not None:
+            name = "{} ({})".format(self.player, name)
+
+        if self.valid:
+            return "{}: valid, {:.3f} s in {} moves".format(name, self.seconds, self.moves)
+
+        where = "" if self.move is None else " at move {}".format(self.move)
+        return "{}: {}{}{}".format(name, self.reason, where, "" if self.detail is None else ": " + self.detail)
+
+
+@Metrics.timed("verifier.verify")
+def verify(submission: Submission, rules: Rules = None) -> Verdict:
+    """
+    Replay the moves of a submission against the engine. The checks stop at the first move that is not valid.
+
+    :param submission: the board and the timed moves of the game.
+    :param rules: the limits of the verification. If None, the default ones.
+    :return: the verdict of the submission
+    """
+    rules = Rules() if rules is None else rules
+    moves = submission.moves
+    seconds = moves[-1][0] / 1000 if moves else 0.0
+
+    def verdict(reason: str, detail: str = None, move: int = None) -> Verdict:
+        return Verdict(reason, detail, move, seconds, len(moves), submission.player, submission.game)
+
+    state = GameState(submission.board)
+    # The history is only needed to undo: without undo the moves are applied to the state (about a third faster)
+    history = History(state) if rules.allow_undo else None
+    apply = state.apply if history is None else history.apply
+    minimum_window_ms = rules.rate_window * 1000 / rules.max_rate
+    previous = 0
+
+    for index, (time_ms, (action, coords)) in enumerate(moves):
+        if time_ms < previous:
+            return verdict(IMPLAUSIBLE_TIMING, "the time goes back ({} ms after {} ms)".format(time_ms, previous),
+                           index)
+        if index and time_ms - previous < rules.min_interval_ms:
+            return verdict(IMPLAUSIBLE_TIMING, "{} ms after the previous move".format(time_ms - previous), index)
+        if index >= rules.rate_window and time_ms - moves[index - rules.rate_window][0] < minimum_window_ms:
+            return verdict(IMPLAUSIBLE_TIMING, "{} moves in {} ms".format(
+                rules.rate_window, time_ms - moves[index - rules.rate_window][0]), index)
+
+        previous = time_ms
+
+        if action in (UNDO, REDO):
+            if not rules.allow_undo:
+                return verdict(UNDO_USED, None, index)
+
+            if action == UNDO:
+                history.undo()
+            else:
+                history.redo()
+            continue
+
+        if state.finished:
+            return verdict(MOVE_AFTER_END, None, index)
+
+        try:
+            apply((action, coords))
+        except ValueError as error:
+            return verdict(ILLEGAL_MOVE, str(error), index)
+
+    if state.win is not True:
+        return verdict(NOT_WON, "the game was lost" if state.win is False else "the game is not finished")
+
+    if submission.seconds is not None and abs(submission.seconds - seconds) > rules.time_tolerance:
+        return verdict(TIME_MISMATCH, "{:.3f} s claimed, {:.3f} s in the replay".format(submission.seconds, seconds))
+
+    return verdict(VALID)
+
+
+def _verify_chunk(submissions: List[Submission], rules: Rules) -> List[Verdict]:
+    return [verify(submission, rules) for submission in submissions]
+
+
+def _verify_log(directory: str, start: int, stop: int, rules: Rules) -> List[Verdict]:
+    verdicts = list()
+
+    with BoardArchive(os.path.join(directory, BOARDS_NAME), readonly=True) as boards, \
+            ReplayLog(os.path.join(directory, REPLAYS_NAME), readonly=True) as replays:
+        for position in range(start, stop):
+            game, moves, seconds, player = replays.load(position)
+
+            try:
+                board = boards.load(game, compact=True)
+            except (IndexError, ValueError) as error:
+                verdicts.append(Verdict(INVALID_BOARD, str(error) or None, player=player, game=game))
+                continue
+
+            verdicts.append(verify(Submission(board, moves, seconds, player, game), rules))
+
+    return verdicts
+
+
+def verify_all(submissions: Iterable[Submission], rules: Rules = None, workers: int = None,
+               chunk_size: int = CHUNK_SIZE) -> List[Verdict]:
+    """
+    Verify many submissions in a process pool. The submissions are read from the iterable only when a worker is
+    free, so it can be a generator of a large quantity of them.
+
+    :param submissions: the submissions.
+    :param rules: the limits of the verification. If None, the default ones.
+    :param workers: the quantity of processes. If 1, the submissions are verified in this process.
+    :param chunk_size: the quantity of submissions of each work unit.
+    :return: the verdict of each submission, in order
+    """
+    rules = Rules() if rules is None else rules
+
+    if workers == 1:
+        return [verify(submission, rules) for submission in submissions]
+
+    iterator = iter(submissions)
+    chunks = iter(lambda: list(islice(iterator, chunk_size)), [])
+    return [verdict for verdicts in run_units(_verify_chunk, ((chunk, rules) for chunk in chunks), workers)
+            for verdict in verdicts]
+
+
+def verify_log(directory: str, rules: Rules = None, workers: int = None, chunk_size: int = CHUNK_SIZE,
+               start: int = 0, stop: int = None) -> List[Verdict]:
+    """
+    Verify the games submitted to a directory (see submit).
+
+    :param directory: the directory with the board archive and the replay log.
+    :param rules: the limits of the verification. If None, the default ones.
+    :param workers: the quantity of processes. If 1, the games are verified in this process.
+    :param chunk_size: the quantity of games of each work unit.
+    :param start: the position of the first replay to verify.
+    :param stop: the position after the last replay to verify. If None, the end of the log.
+    :return: the verdict of each replay, in order
+    """
+    rules = Rules() if rules is None else rules
+
+    if stop is None:
+        with ReplayLog(os.path.join(directory, REPLAYS_NAME), readonly=True) as replays:
+            stop = len(replays)
+
+    if workers == 1:
+        return _verify_log(directory, start, stop, rules)
+
+    units = ((directory, unit, min(stop, unit + chunk_size), rules) for unit in range(start, stop, chunk_size))
+    return [verdict for verdicts in run_units(_verify_log, units, workers) for verdict in verdicts]
+
+
+def submit(directory: str, board: MinesweeperBoard, moves: List[TimedMove], seconds: float = None,
+           player: str = None) -> int:
+    """
+    Keep a game to be verified: the board is appended to the archive of the directory and the moves to its replay
+    log, with the position of the board as the game id, the time claimed by the player and the name of the player.
+
+    :param directory: the directory of the submissions, created if it does not exist.
+    :param board: the board of the game.
+    :param moves: the timed moves of the game (e.g. the replay of ui.PlayableBoard).
+    :param seconds: the time of the game in the results of the player (see core.Results.Result), checked against the
+                    time of the replay.
+    :param player: the name of the player in the results.
+    :return: the position of the game in the replay log
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    with BoardArchive(os.path.join(directory, BOARDS_NAME)) as boards, \
+            ReplayLog(os.path.join(directory, REPLAYS_NAME)) as replays:
+        return replays.append(boards.append(board), moves, seconds, player)
+
+
+class VerifyResult(object):
+    verdicts: List[Verdict] = None
+    seconds: float = 0
+
+    def __init__(self, verdicts: List[Verdict], seconds: float):
+        self.verdicts = verdicts
+        self.seconds = seconds
+
+    @property
+    def reasons(self) -> Dict[str, int]:
+        """
+        Quantity of submissions of each reason.
+        """
+        return dict(Counter(verdict.reason for verdict in self.verdicts))
+
+    @property
+    def submissions_per_second(self) -> float:
+        return len(self.verdicts) / self.seconds if self.seconds else 0
+
+    def best(self) -> Optional[Verdict]:
+        """
+        :return: the valid verdict with the shortest time, or None if there is none
+        """
+        return min((verdict for verdict in self.verdicts if verdict.valid), key=lambda verdict: verdict.seconds,
+                   default=None)
+
+    def to_dict(self) -> Dict:
+        return {
+            "submissions": len(self.verdicts),
+            "reasons": self.reasons,
+            "submissions_per_second": self.submissions_per_second
+        }
+
+    def __str__(self):
+        reasons = "".join("- {}: {}\n".format(reason.capitalize(), count)
+                          for reason, count in sorted(self.reasons.items()))
+
+        return "=== [VERIFY] ===\n" \
+               "- Submissions: {}\n" \
+               "{}" \
+               "- Submissions per second: {:.1f}\n" \
+            .format(len(self.verdicts), reasons, self.submissions_per_second)
+
+
+def main(argv: List[str] = None):
+    from core.Config import DATA_DIR
+
+    parser = argparse.ArgumentParser(prog="minesweeper.py verify",
+                                     description="Replay the submitted games and verify their scores")
+    parser.add_argument("directory", nargs="?", default=DATA_DIR, help="default: the data directory of the game")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="default: the quantity of CPUs")
+    parser.add_argument("--allow-undo", action="store_true")
+    parser.add_argument("--min-interval", type=int, default=MIN_INTERVAL_MS, help="milliseconds between two moves")
+    parser.add_argument("--max-rate", type=float, default=MAX_RATE, help="moves per second")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the valid games too")
+    args = parser.parse_args(argv)
+
+    rules = Rules(allow_undo=args.allow_undo, min_interval_ms=args.min_interval, max_rate=args.max_rate)
+    start = perf_counter()
+    result = VerifyResult(verify_log(args.directory, rules, args.workers), perf_counter() - start)
+
+    for verdict in result.verdicts:
+        if args.verbose or not verdict.valid:
+            print(verdict)
+
+    print(result)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Work units of the headless tools (simulator, dataset export, batches of boards, verifier) run in a process pool.
+"""
+
+from typing import Callable, Iterable, Tuple, List, Any
+from collections import deque
+import os
+
+
+def run_units(function: Callable[..., Any], units: Iterable[Tuple], workers: int = None) -> List[Any]:
+    """
+    Run function(*unit) for each unit in a process pool. The units are read from the iterable only when a worker is
+    free, with at most two units per worker waiting, so it can be a generator of a large quantity of them.
+
+    :param function: function of the module level (it is pickled).
+    :param units: the arguments of each call.
+    :param workers: the quantity of processes. If None, the quantity of CPUs. If 1, the units run in this process.
+    :return: the results of the units, in order
+    """
+    if workers == 1:
+        return [function(*unit) for unit in units]
+
+    # Imported only here: multiprocessing is a large part of the startup time
+    from concurrent.futures import ProcessPoolExecutor
+
+    results = list()
+    workers = (os.cpu_count() or 1) if workers is None else workers
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = deque()
+        for unit in units:
+            if len(running) >= 2 * workers:
+                results.append(running.popleft().result())
+
+            running.append(executor.submit(function, *unit))
+
+        results.extend(future.result() for future in running)
+
+    return results
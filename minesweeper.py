@@ -2,19 +2,18 @@
 
 # -*- coding: utf-8 -*-
 
-from core.Engine import MinesweeperBoard
-from ui.PlayableBoard import PlayableBoard
-from tkinter import Tk
-from ui.PlayableBoard import UIProperties, Game
-import subprocess
-from re import sub
-from core.Config import GameSettings
+# Only the modules of the selected mode are imported (e.g. the headless modes never load Tk), see
+# benchmarks/bench_startup.py
+import sys
 
 
 def load_config():
-    # Load user info
-    username: str = subprocess.Popen(["id", "-un"], stdout=subprocess.PIPE).communicate()[0]
-    username = sub(r"[b\'\\n]", "", str(username))
+    from getpass import getuser
+    from ui.PlayableBoard import UIProperties, Game
+    from core.Config import GameSettings
+
+    # Load user info (from the environment or the password database, without starting a process)
+    username: str = getuser()
 
     properties = UIProperties()
     settings = GameSettings()
@@ -25,17 +24,109 @@ def load_config():
 
 
 def main():
-    board = MinesweeperBoard(dimensions=(10, 10), bomb_percent=25)
-    board.generate_board()
-    print(str(board))
-    print(board.format_board())
+    from tkinter import Tk
+    from ui.PlayableBoard import PlayableBoard
+    from core.Pool import BoardPool
+    from core.Results import ResultStore, FILE_NAME
+    from core.Config import CACHE_DIR, DATA_DIR
+    import os
+
+    # The boards left in the pool are saved at the exit, so the next start does not wait for the generation
+    pool = BoardPool(path=CACHE_DIR)
+    pool.start()
+
+    # The results are written by the thread of the store, stop() writes the ones left
+    results = ResultStore(os.path.join(DATA_DIR, FILE_NAME))
+    results.start()
+
+    # The store and the pool are stopped even if the game fails, so the recorded results are written
+    try:
+        board = pool.take(dimensions=(10, 10), bomb_percent=25)
+        info, properties = load_config()
+
+        app = PlayableBoard(properties, info, board, Tk(className="Minesweeper"), results)
+        app.master.protocol("WM_DELETE_WINDOW", app.exit_app)
+        app.mainloop()
+
+        if app.game_info.win is True:
+            from core.Verifier import submit
+
+            # The board and the replay of the win are kept, so the score can be verified
+            submit(DATA_DIR, board, app.recorder.replay, app.game_info.time.end_time - app.game_info.time.start_time,
+                   app.game_info.player)
+    finally:
+        results.stop()
+        pool.stop()
+
+
+def parse_options(argv):
+    """
+    Separate the options of all the modes (instrumentation and profiling) from the arguments of the mode.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--profile", action="store_true", help="run the session in cProfile")
+    parser.add_argument("--profile-output", metavar="FILE", help="write the cProfile stats to a file")
+    parser.add_argument("--metrics", metavar="FILE", help="enable the instrumentation and dump it to a JSON file")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, metavar="SECONDS")
+    return parser.parse_known_args(argv)
+
 
-    info, properties = load_config()
+def run(argv):
+    if argv and argv[0] == "simulate":
+        from core.Simulator import main as simulate
 
-    app = PlayableBoard(properties, info, board, Tk(className="Minesweeper"))
-    app.master.protocol("WM_DELETE_WINDOW", app.exit_app)
-    app.mainloop()
+        simulate(argv[1:])
+    elif argv and argv[0] == "terminal":
+        from ui.Terminal import main as terminal
+
+        terminal(argv[1:])
+    elif argv and argv[0] == "analyze":
+        from core.Analysis import main as analyze
+
+        analyze(argv[1:])
+    elif argv and argv[0] == "export":
+        from core.Dataset import main as export
+
+        export(argv[1:])
+    elif argv and argv[0] == "verify":
+        from core.Verifier import main as verify
+
+        verify(argv[1:])
+    elif argv and argv[0] == "serve":
+        from server.Server import main as serve
+
+        serve(argv[1:])
+    else:
+        main()
 
 
 if __name__ == "__main__":
-    main()
+    options, arguments = parse_options(sys.argv[1:])
+    dumper = None
+
+    if options.metrics:
+        from core import Metrics
+
+        Metrics.enable()
+        dumper = Metrics.Dumper(options.metrics, options.metrics_interval)
+        dumper.start()
+
+    try:
+        if options.profile or options.profile_output:
+            import cProfile
+            import pstats
+
+            profiler = cProfile.Profile()
+            profiler.runcall(run, arguments)
+
+            if options.profile_output:
+                profiler.dump_stats(options.profile_output)
+            else:
+                pstats.Stats(profiler).sort_stats("cumulative").print_stats(30)
+        else:
+            run(arguments)
+    finally:
+        if dumper is not None:
+            dumper.stop()
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Line-delimited JSON protocol of the game server: each message is one JSON object ending with a newline.
+
+Client -> server:
+    {"type": "join", "room": str, "player": str, "dimensions": [rows, cols], "bomb_percent": float}
+        (dimensions and bomb_percent are only used when the room does not exist yet, and must be in the limits of
+         the config file)
+    {"type": "move", "action": "reveal" | "flag" | "chord", "coords": [row, col]}
+    {"type": "restart"}  (start a new board in the room, only after the end of the game)
+    {"type": "leave"}
+
+Server -> client:
+    {"type": "joined", "room": str, "player": str, "dimensions": [rows, cols], "total_bombs": int,
+     "players": [str], "cells": [cell], "win": null | bool}
+        (cells has all the fields that are not hidden)
+    {"type": "delta", "player": str, "cells": [cell], "win": null | bool}
+        (only the fields changed by the move of a player)
+    {"type": "player", "player": str, "joined": bool}
+    {"type": "error", "message": str}
+
+A cell is [row, col, status, value], with the status of core.State (HIDDEN, REVEALED or FLAGGED) and the value of an
+opened field (the quantity of bombs nearby or BOMB), or null if it is not opened.
+"""
+
+from typing import Tuple, List, Dict, Any, Optional
+import json
+
+from core.State import GameState, Move, HIDDEN, REVEALED, FLAGGED, REVEAL, FLAG, CHORD
+
+MAX_LINE = 64 * 1024  # maximum size of a message, in bytes
+
+ACTIONS = (REVEAL, FLAG, CHORD)
+
+Message = Dict[str, Any]
+Cell = List[Optional[int]]
+
+
+class ProtocolError(ValueError):
+    """
+    Invalid message sent by a client.
+    """
+    pass
+
+
+def encode(message: Message) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def decode(line: bytes) -> Message:
+    try:
+        message = json.loads(line.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        raise ProtocolError("Invalid JSON")
+
+    if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+        raise ProtocolError("The message must be an object with a type")
+
+    return message
+
+
+def coords(value: Any, dimensions: Tuple[int, int]) -> Tuple[int, int]:
+    """
+    :return: the (row, col) of a message, if it is inside the board
+    """
+    if not isinstance(value, list) or len(value) != 2 or not all(type(v) is int for v in value):
+        raise ProtocolError("The coords must be [row, col]")
+    elif not (0 <= value[0] < dimensions[0] and 0 <= value[1] < dimensions[1]):
+        raise ProtocolError("The coords are outside of the board")
+
+    return value[0], value[1]
+
+
+def move(message: Message, dimensions: Tuple[int, int]) -> Move:
+    action = message.get("action")
+
+    if action not in ACTIONS:
+        raise ProtocolError("The action must be one of {}".format(", ".join(ACTIONS)))
+
+    return action, coords(message.get("coords"), dimensions)
+
+
+def cell(state: GameState, field: Tuple[int, int]) -> Cell:
+    if state.is_revealed(field):
+        return [field[0], field[1], REVEALED, state.value(field)]
+
+    return [field[0], field[1], FLAGGED if state.is_flagged(field) else HIDDEN, None]
+
+
+def error(text: str) -> bytes:
+    return encode({"type": "error", "message": text})
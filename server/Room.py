@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Cooperative room: many players on one board.
+"""
+
+from typing import Tuple, List, Dict
+from time import time
+import asyncio
+
+from core.Engine import MinesweeperBoard, Game
+from core.State import GameState, Move, REVEAL
+from core.Time import Time
+from server import Protocol
+
+MAX_BUFFER = 1024 * 1024  # clients with more bytes waiting to be sent are disconnected
+
+
+class Room(object):
+    """
+    The moves of a room are applied one at a time (under the lock of the room) and only the fields changed by each
+    move are sent to the players. The bombs are placed on the first reveal, away from the opened field.
+    """
+    name: str = None
+    board: MinesweeperBoard = None
+    state: GameState = None  # None until the first reveal
+    game: Game = None
+
+    __players: Dict[str, asyncio.StreamWriter] = None
+    __joining: int = 0  # players waiting for the lock to join
+    __lock: asyncio.Lock = None
+
+    def __init__(self, name: str, dimensions: Tuple[int, int], bomb_percent: float):
+        self.name = name
+        self.board = MinesweeperBoard(dimensions, bomb_percent)
+        self.game = Game(name)
+        self.__players = dict()
+        self.__lock = asyncio.Lock()
+
+    @property
+    def players(self) -> List[str]:
+        return list(self.__players)
+
+    @property
+    def empty(self) -> bool:
+        return not self.__players and not self.__joining
+
+    def snapshot(self) -> List[Protocol.Cell]:
+        """
+        :return: all the fields that are not hidden
+        """
+        if self.state is None:
+            return list()
+
+        state = self.state
+        rows, cols = self.board.dimensions
+
+        return [Protocol.cell(state, (row, col)) for row in range(rows) for col in range(cols)
+                if state.is_revealed((row, col)) or state.is_flagged((row, col))]
+
+    async def join(self, player: str, writer: asyncio.StreamWriter) -> None:
+        # Counted before waiting for the lock, so the room is not removed from the lobby meanwhile
+        self.__joining += 1
+
+        try:
+            async with self.__lock:
+                if player in self.__players:
+                    raise Protocol.ProtocolError("There is already a player {} in the room".format(player))
+
+                self.__broadcast(Protocol.encode({"type": "player", "player": player, "joined": True}))
+                self.__players[player] = writer
+                writer.write(self.__joined(player))
+        finally:
+            self.__joining -= 1
+
+    async def leave(self, player: str) -> None:
+        async with self.__lock:
+            if self.__players.pop(player, None) is not None:
+                self.__broadcast(Protocol.encode({"type": "player", "player": player, "joined": False}))
+
+    async def move(self, player: str, move: Move) -> None:
+        async with self.__lock:
+            if self.game.win is not None:
+                raise Protocol.ProtocolError("The game is over")
+
+            if self.state is None:
+                if move[0] != REVEAL:
+                    raise Protocol.ProtocolError("The first move must be a reveal")
+
+                # Generating a large board takes a while, so it runs outside of the event loop
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, lambda: self.board.generate_board(first_click=move[1]))
+                self.state = GameState(self.board)
+                self.game.time.start_time = time()
+
+            changed = self.state.apply(move)
+
+            if self.state.win is not None:
+                self.game.win = self.state.win
+                self.game.time.end_time = time()
+                self.game.time.all_time = Time.calculate_time(self.game.time.start_time, self.game.time.end_time)
+
+            if changed or self.game.win is not None:
+                state = self.state
+                self.__broadcast(Protocol.encode({"type": "delta", "player": player,
+                                                  "cells": [Protocol.cell(state, c) for c in changed],
+                                                  "win": self.game.win}))
+
+    async def restart(self) -> None:
+        async with self.__lock:
+            if self.game.win is None:
+                raise Protocol.ProtocolError("The game is not over")
+
+            self.board = MinesweeperBoard(self.board.dimensions, self.board.bomb_percent)
+            self.state = None
+            self.game = Game(self.name)
+
+            for player, writer in list(self.__players.items()):
+                writer.write(self.__joined(player))
+
+    def __joined(self, player: str) -> bytes:
+        return Protocol.encode({"type": "joined", "room": self.name, "player": player,
+                                "dimensions": list(self.board.dimensions), "total_bombs": self.board.total_bombs,
+                                "players": self.players, "cells": self.snapshot(), "win": self.game.win})
+
+    def __broadcast(self, data: bytes):
+        """
+        Send a message (encoded only once) to all the players. The room does not wait for the clients to receive it:
+        the clients that do not read their messages are disconnected.
+        """
+        for player, writer in list(self.__players.items()):
+            if writer.transport.is_closing():
+                continue
+
+            if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+                writer.transport.abort()
+                continue
+
+            writer.write(data)
+
+
+class Lobby(object):
+    """
+    All the rooms of the server. A room is created by its first player and removed when the last one leaves.
+    """
+    __rooms: Dict[str, Room] = None
+
+    def __init__(self):
+        self.__rooms = dict()
+
+    def get(self, name: str, dimensions: Tuple[int, int], bomb_percent: float) -> Room:
+        room = self.__rooms.get(name)
+
+        if room is None:
+            try:
+                room = Room(name, dimensions, bomb_percent)
+            except ValueError as e:
+                raise Protocol.ProtocolError(str(e))
+
+            self.__rooms[name] = room
+
+        return room
+
+    def discard(self, room: Room) -> None:
+        if room.empty and self.__rooms.get(room.name) is room:
+            del self.__rooms[room.name]
+
+    def __len__(self) -> int:
+        return len(self.__rooms)
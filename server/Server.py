@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Game server: hosts the rooms of many concurrent games on one asyncio event loop, over TCP (see server.Protocol).
+"""
+
+from typing import Tuple, List
+import argparse
+import asyncio
+
+from core.Config import GameSettings
+from server import Protocol
+from server.Room import Room, Lobby
+
+DEFAULT_DIMENSIONS = (16, 30)
+DEFAULT_BOMB_PERCENT = 20.0
+PORT = 8765
+BACKLOG = 4096  # connections waiting to be accepted (many clients connect at once)
+
+
+class GameServer(object):
+    host: str = None
+    port: int = None
+    lobby: Lobby = None
+    settings: GameSettings = None  # limits of the boards of the rooms
+    clients: int = 0  # connected clients
+
+    __server: asyncio.AbstractServer = None
+
+    def __init__(self, host: str = "127.0.0.1", port: int = PORT, settings: GameSettings = None):
+        """
+        :param host: the address to listen.
+        :param port: the port to listen. If 0, a free port is chosen (and available in the port field after start).
+        :param settings: the minimum and maximum size and bomb percent of the boards. If None, the ones of the
+                         config file.
+        """
+        self.host = host
+        self.port = port
+        self.settings = GameSettings() if settings is None else settings
+        self.lobby = Lobby()
+
+    async def start(self) -> None:
+        self.__server = await asyncio.start_server(self.__handle, self.host, self.port, limit=Protocol.MAX_LINE,
+                                                   backlog=BACKLOG)
+        self.port = self.__server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.__server.close()
+        await self.__server.wait_closed()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print("Listening on {}:{}".format(self.host, self.port))
+
+        async with self.__server:
+            await self.__server.serve_forever()
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        room: Room = None
+        player: str = None
+        self.clients += 1
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):  # line longer than the limit, or connection reset
+                    break
+
+                if not line:
+                    break
+
+                try:
+                    message = Protocol.decode(line)
+                    kind = message["type"]
+
+                    if kind == "join" and room is None:
+                        room, player = await self.__join(message, writer)
+                    elif room is None:
+                        raise Protocol.ProtocolError("Join a room first")
+                    elif kind == "move":
+                        await room.move(player, Protocol.move(message, room.board.dimensions))
+                    elif kind == "restart":
+                        await room.restart()
+                    elif kind == "leave":
+                        break
+                    else:
+                        raise Protocol.ProtocolError("Unexpected message: {}".format(kind))
+                except Protocol.ProtocolError as e:
+                    writer.write(Protocol.error(str(e)))
+        finally:
+            self.clients -= 1
+
+            if room is not None:
+                await room.leave(player)
+                self.lobby.discard(room)
+
+            writer.close()
+
+    async def __join(self, message: Protocol.Message, writer: asyncio.StreamWriter) -> Tuple[Room, str]:
+        name = message.get("room")
+        player = message.get("player")
+
+        if not isinstance(name, str) or not isinstance(player, str) or not name or not player:
+            raise Protocol.ProtocolError("The room and the player must be strings")
+
+        dimensions = message.get("dimensions", DEFAULT_DIMENSIONS)
+        if not isinstance(dimensions, (list, tuple)) or len(dimensions) != 2 or \
+                not all(type(v) is int for v in dimensions):
+            raise Protocol.ProtocolError("The dimensions must be [rows, cols]")
+
+        bomb_percent = message.get("bomb_percent", DEFAULT_BOMB_PERCENT)
+        if type(bomb_percent) not in (int, float):
+            raise Protocol.ProtocolError("The bomb percent must be a number")
+
+        # The limits of the config file, before a board is generated: a huge board would take the memory of all rooms
+        min_width, min_height = self.settings.minimum["board_size"]
+        max_width, max_height = self.settings.maximum["board_size"]
+        if not (min_height <= dimensions[0] <= max_height and min_width <= dimensions[1] <= max_width):
+            raise Protocol.ProtocolError("The dimensions must be between {}x{} and {}x{}"
+                                         .format(min_height, min_width, max_height, max_width))
+
+        if not self.settings.minimum["bomb_percent"] <= bomb_percent <= self.settings.maximum["bomb_percent"]:
+            raise Protocol.ProtocolError("The bomb percent must be between {} and {}"
+                                         .format(self.settings.minimum["bomb_percent"],
+                                                 self.settings.maximum["bomb_percent"]))
+
+        room = self.lobby.get(name, (dimensions[0], dimensions[1]), bomb_percent)
+
+        try:
+            await room.join(player, writer)
+        except Protocol.ProtocolError:
+            self.lobby.discard(room)
+            raise
+
+        return room, player
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(prog="minesweeper.py serve", description="Host multiplayer games")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=PORT)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(GameServer(args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+The metrics of core/Analysis.py against a flood fill of each board.
+"""
+
+from random import Random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.Engine import MinesweeperBoard
+from core.Analysis import analyze, analyze_grids, board_grid
+from core.Placement import neighbourhood
+
+BOARDS = 400
+
+
+def flood_fill(board: MinesweeperBoard):
+    """
+    :return: the 3BV, the sorted sizes of the openings (with their numbers) and the isolated numbers of a board
+    """
+    grid = board_grid(board)
+    rows, cols = board.dimensions
+    opened = set()
+    sizes = list()
+
+    for start in range(rows * cols):
+        if grid.flat[start] != 0 or start in opened:
+            continue
+
+        opening = {start}
+        stack = [start]
+        while stack:
+            field = stack.pop()
+            for neighbour in neighbourhood(board.dimensions, divmod(field, cols)):
+                if neighbour not in opening:
+                    opening.add(neighbour)
+                    if grid.flat[neighbour] == 0:
+                        stack.append(neighbour)
+
+        opened |= opening
+        sizes.append(len(opening))
+
+    isolated = sum(1 for field in range(rows * cols) if grid.flat[field] > 0 and field not in opened)
+    return len(sizes) + isolated, sorted(sizes), isolated
+
+
+def random_boards(count: int, seed: int = 1):
+    rng = Random(seed)
+
+    for i in range(count):
+        rows = rng.randint(6, 16)
+        dimensions = (rows, rng.randint(rows, 30))
+        yield MinesweeperBoard.from_seed(dimensions, rng.uniform(5, 30), rng.getrandbits(64), compact=True)
+
+
+@pytest.mark.parametrize("board", list(random_boards(BOARDS)) +
+                         [MinesweeperBoard.from_seed((10, 13), 10, 12829240714947297412)])
+def test_analyze_matches_flood_fill(board):
+    bbbv, sizes, isolated = flood_fill(board)
+    difficulty = analyze(board)
+
+    assert difficulty.bbbv == bbbv
+    assert difficulty.openings == len(sizes)
+    assert sorted(difficulty.opening_sizes) == sizes
+    assert difficulty.isolated == isolated
+
+
+@pytest.mark.parametrize("copies", [1, 2, 3, 50])
+def test_analyze_grids_batch(copies):
+    # A board whose labels needed more than one pointer jump after the edges agreed
+    bad = board_grid(MinesweeperBoard.from_seed((10, 13), 10, 12829240714947297412))
+    boards = [MinesweeperBoard.from_seed((10, 13), 10, seed, compact=True) for seed in range(20)]
+    grids = np.stack([board_grid(board) for board in boards] + [bad] * copies)
+
+    metrics = analyze_grids(grids)
+    expected = [flood_fill(board)[0] for board in boards]
+    expected += [flood_fill(MinesweeperBoard.from_seed((10, 13), 10, 12829240714947297412))[0]] * copies
+
+    assert metrics["bbbv"].tolist() == expected
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+The shared memory batches of core/Batch.py, attached from other processes.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.Batch import BoardBatch, map_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ATTACH = "from core.Batch import BoardBatch\n" \
+         "batch = BoardBatch.attach({!r})\n" \
+         "print(len(batch), int((batch.grids == -1).sum()))\n" \
+         "batch.close()\n"
+
+
+def bombs(grids) -> int:
+    return int((grids == -1).sum())
+
+
+def bomb_counts(grids, start):
+    return [int((grid == -1).sum()) for grid in grids]
+
+
+def test_attach_from_another_process():
+    with BoardBatch.generate(20, (9, 9), 12.5, seed=7) as batch:
+        for attempt in range(2):
+            # The buffer outlives a process that attaches and exits
+            process = subprocess.run([sys.executable, "-c", ATTACH.format(batch.name)], cwd=ROOT,
+                                     capture_output=True, text=True, timeout=60)
+
+            assert process.returncode == 0, process.stderr
+            assert process.stdout.split() == [str(len(batch)), str(bombs(batch.grids))]
+            assert "leaked" not in process.stderr
+
+        other = BoardBatch.attach(batch.name)
+        assert np.array_equal(other.grids, batch.grids)
+        other.close()
+
+    with pytest.raises(FileNotFoundError):
+        BoardBatch.attach(batch.name)
+
+
+def test_map_batch_in_workers():
+    with BoardBatch.generate(40, (9, 9), 12.5, seed=7) as batch:
+        counts = [count for chunk in map_batch(bomb_counts, batch, workers=2, chunk_size=7) for count in chunk]
+
+        assert counts == bomb_counts(batch.grids, 0)
+
+
+@pytest.mark.parametrize("seed, first_click", [(-1, None), (1 << 64, None), (1, (9, 0)), (1, (0, -1))])
+def test_invalid_header(seed, first_click):
+    with pytest.raises(ValueError):
+        BoardBatch.generate(5, (9, 9), 12.5, seed=seed, first_click=first_click, name="test_invalid_header")
+
+    # The buffer was not created
+    with pytest.raises(FileNotFoundError):
+        BoardBatch.attach("test_invalid_header")
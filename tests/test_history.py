@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+The undo, redo and jump of core/History.py against the same moves replayed on a new state.
+"""
+
+from random import Random
+
+import pytest
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState, REVEAL, FLAG, CHORD
+from core.History import History
+
+GAMES = 40
+STEPS = 60
+
+
+def replayed(board: MinesweeperBoard, history: History) -> GameState:
+    """
+    :return: a new state with the first history.position moves of the history
+    """
+    state = GameState(board)
+
+    for move in history.moves()[:history.position]:
+        state.apply(move)
+
+    return state
+
+
+@pytest.mark.parametrize("game", range(GAMES))
+@pytest.mark.parametrize("checkpoint_cells", [None, 3])
+def test_history_matches_replay(game, checkpoint_cells):
+    rng = Random(game)
+    board = MinesweeperBoard.from_seed((8, 10), 15, rng.getrandbits(64))
+    state = GameState(board)
+    history = History(state, checkpoint_cells)
+    fields = [(row, col) for row in range(8) for col in range(10)]
+
+    for step in range(STEPS):
+        operation = rng.random()
+
+        if operation < 0.5:
+            history.apply((rng.choice((REVEAL, REVEAL, FLAG, CHORD)), rng.choice(fields)))
+        elif operation < 0.7:
+            history.undo()
+        elif operation < 0.85:
+            history.redo()
+        else:
+            history.jump(rng.randint(0, len(history)))
+            assert history.jump(history.position) == list()
+
+        expected = replayed(board, history)
+        assert state.snapshot() == expected.snapshot()
+        assert state.win == expected.win
+        assert state.visible() == expected.visible()
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+The derived seeds of core/Placement.py.
+"""
+
+import pytest
+
+from core.Engine import MinesweeperBoard
+from core.Placement import derive_seed
+
+
+def test_derived_seeds_are_stable():
+    # The seeds of the stored boards and of the runs of the tools must not change
+    assert derive_seed(1, 2, 3) == 13679276310326868851
+    assert derive_seed(-5) == 6606607067896106516
+    assert derive_seed((1 << 127) - 1, -(1 << 127)) == 13706882092004639074
+
+
+@pytest.mark.parametrize("seed", [1 << 127, -(1 << 127) - 1, 1 << 200, -(1 << 200)])
+def test_seeds_of_any_size(seed):
+    assert 0 <= derive_seed(seed, 1) < 1 << 64
+    assert derive_seed(seed, 1) == derive_seed(seed % (1 << 128), 1)
+    assert derive_seed(1, seed) == derive_seed(1, seed % (1 << 128))
+    assert MinesweeperBoard.from_seed((9, 9), 12.5, seed).bombs == MinesweeperBoard.from_seed((9, 9), 12.5, seed).bombs
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+The probabilities of core/Probability.py against the enumeration of every placement of the bombs.
+"""
+
+from fractions import Fraction
+from itertools import combinations
+from random import Random
+
+import pytest
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState, REVEAL, FLAG
+from core.History import History
+from core.Probability import ProbabilityEngine
+
+DIMENSIONS = (6, 7)
+PERCENT = 14  # 6 bombs
+SCENARIOS = 30
+MAX_PLACEMENTS = 30000
+
+
+def brute_force(state: GameState):
+    """
+    :return: the probability of a bomb in every unopened field (hidden or flagged), from all the placements of the
+             bombs that agree with the opened numbers, or None if there are too many placements
+    """
+    rows, cols = state.board.dimensions
+    fields = [(row, col) for row in range(rows) for col in range(cols)]
+    unopened = [coords for coords in fields if not state.is_revealed(coords)]
+    numbers = [(set(state.neighbours(coords)).intersection(unopened), state.value(coords))
+               for coords in fields if state.is_revealed(coords)]
+
+    placements = 0
+    mines = dict.fromkeys(unopened, 0)
+
+    for count, placement in enumerate(combinations(unopened, state.board.total_bombs)):
+        if count > MAX_PLACEMENTS:
+            return None
+
+        placement = set(placement)
+        if all(len(around & placement) == value for around, value in numbers):
+            placements += 1
+            for coords in placement:
+                mines[coords] += 1
+
+    return {coords: Fraction(count, placements) for coords, count in mines.items()}
+
+
+def assert_exact(engine: ProbabilityEngine, state: GameState):
+    expected = brute_force(state)
+    if expected is None:
+        return
+
+    solution = engine.solve()
+    assert solution.exact
+    heat_map = solution.heat_map()
+
+    assert set(heat_map) == set(expected)
+    for coords, probability in expected.items():
+        assert heat_map[coords] == pytest.approx(float(probability), abs=1e-9), coords
+
+
+@pytest.mark.parametrize("scenario", range(SCENARIOS))
+def test_probabilities_match_enumeration(scenario):
+    rng = Random(scenario)
+    board = MinesweeperBoard.from_seed(DIMENSIONS, PERCENT, rng.getrandbits(64), first_click=(2, 3))
+    state = GameState(board)
+    history = History(state)
+    engine = ProbabilityEngine(state)
+    safe = [(row, col) for row in range(DIMENSIONS[0]) for col in range(DIMENSIONS[1])
+            if (row, col) not in set(board.bombs)]
+
+    engine.update(history.apply((REVEAL, (2, 3))))
+    assert_exact(engine, state)
+
+    for step in range(4):
+        hidden = [coords for coords in safe if not state.is_revealed(coords)]
+        if not hidden or state.finished:
+            break
+
+        # A flag (right or wrong, the engine does not trust them) and an opened field
+        engine.update(history.apply((FLAG, rng.choice(state.hidden_fields()))))
+        assert_exact(engine, state)
+
+        engine.update(history.apply((REVEAL, rng.choice(hidden))))
+        assert_exact(engine, state)
+
+    # The undone moves close fields again
+    for step in range(3):
+        engine.update(history.undo())
+        assert_exact(engine, state)
+
+    engine.update(history.redo())
+    assert_exact(engine, state)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+The submissions of core/Verifier.py, verified from the files of a directory.
+"""
+
+from random import Random
+from time import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from core.Engine import MinesweeperBoard
+from core.State import GameState, REVEAL, FLAG, UNDO, REDO
+from core.History import History, ReplayRecorder
+from core.Archive import ReplayLog
+from core.Time import Time
+from core.Verifier import Submission, Rules, verify, submit, verify_log, VALID, TIME_MISMATCH, REPLAYS_NAME
+
+
+def won_game(seed: int):
+    """
+    :return: a board and the timed moves that win it, 300 ms apart
+    """
+    rng = Random(seed)
+    board = MinesweeperBoard((9, 9), 12.5, compact=True)
+    board.generate_board(rng)
+    state = GameState(board)
+    bombs = set(board.bombs)
+    moves = list()
+
+    for coords in ((row, col) for row in range(9) for col in range(9) if (row, col) not in bombs):
+        if not state.is_revealed(coords):
+            moves.append((300 * (len(moves) + 1), (REVEAL, coords)))
+            state.apply((REVEAL, coords))
+
+    return board, moves
+
+
+def test_claimed_time_and_player(tmp_path):
+    board, moves = won_game(1)
+    seconds = moves[-1][0] / 1000
+
+    submit(str(tmp_path), board, moves, seconds + 0.4, "ada")
+    submit(str(tmp_path), board, moves, seconds + 60, "grace")
+    submit(str(tmp_path), board, moves)
+
+    with ReplayLog(str(tmp_path / REPLAYS_NAME), readonly=True) as replays:
+        assert replays.load(0) == (0, moves, pytest.approx(seconds + 0.4), "ada")
+        assert replays.load(2) == (2, moves, None, None)
+
+    verdicts = verify_log(str(tmp_path), workers=1)
+
+    assert [verdict.reason for verdict in verdicts] == [VALID, TIME_MISMATCH, VALID]
+    assert [verdict.player for verdict in verdicts] == ["ada", "grace", None]
+
+
+def test_recorder_keeps_only_the_changes():
+    board, moves = won_game(2)
+    game_time = Time()
+    game_time.start_time = time()
+    recorder = ReplayRecorder(History(GameState(board)), game_time)
+    first = moves[0][1][1]
+
+    def later(seconds: float):
+        game_time.start_time -= seconds
+
+    for action in (lambda: recorder.apply((FLAG, first)), recorder.undo, recorder.undo, recorder.redo,
+                   lambda: recorder.apply((FLAG, first))):
+        later(0.3)
+        action()
+
+    for time_ms, move in moves:
+        later(0.3)
+        recorder.apply(move)
+
+        # The repeats of a held key on the opened field, 30 ms apart
+        for repeat in range(5):
+            later(0.03)
+            recorder.apply(move)
+
+    # The second undo had nothing to undo
+    assert [move for time_ms, move in recorder.replay] == \
+        [(FLAG, first), (UNDO, (0, 0)), (REDO, (0, 0)), (FLAG, first)] + [move for time_ms, move in moves]
+    assert verify(Submission(board, recorder.replay), Rules(allow_undo=True)).valid
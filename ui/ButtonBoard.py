@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+import tkinter as tk
+
+from typing import Tuple, List, Dict, Callable, Optional
+
+# Called with the mouse button ("left", "right" or "middle") and the (row, col) of the field
+ClickHandler = Callable[[str, Tuple[int, int]], None]
+
+FIELD_SIZE = 32  # size of the images of the fields, in pixels
+
+
+class ButtonBoard(tk.Frame):
+    """
+    Board drawn with one tk.Button per field. Used for the small boards.
+    """
+    __fields: List[List[tk.Button]] = None  # List of the fields and his associated buttons
+    __images: Dict[str, tk.PhotoImage] = None
+    __on_click: ClickHandler = None
+    __default_bg: str = None
+    __shades: Dict[Tuple[int, int], str] = None  # background color of the shaded fields
+
+    def __init__(self, master, dimensions: Tuple[int, int], images: Dict[str, tk.PhotoImage], on_click: ClickHandler):
+        super(ButtonBoard, self).__init__(master)
+        self.__images = images
+        self.__on_click = on_click
+        self.__fields = list()
+        self.__shades = dict()
+
+        for row in range(dimensions[0]):
+            r = list()
+
+            for col in range(dimensions[1]):
+                btn = tk.Button(self,
+                                image=images["field"],
+                                width=FIELD_SIZE, height=FIELD_SIZE)
+
+                # Bind mouse events to the button
+                # https://stackoverflow.com/questions/3296893/how-to-pass-an-argument-to-event-handler-in-tkinter
+                btn.bind("<Button-1>", lambda event, arg=(row, col): self.__on_click("left", arg))
+                btn.bind("<Button-3>", lambda event, arg=(row, col): self.__on_click("right", arg))
+                btn.bind("<Button-2>", lambda event, arg=(row, col): self.__on_click("middle", arg))
+
+                btn.grid(row=row, column=col)
+                r.append(btn)
+
+                self.__default_bg = btn["bg"]
+
+            self.__fields.append(r)
+
+    def paint(self, coords: Tuple[int, int], image: str, text: Optional[int] = None) -> None:
+        """
+        Change the look of a field.
+
+        :param coords: the (row, col) of the field.
+        :param image: the name of the image in UIProperties.images.
+        :param text: the number shown over the image.
+        :return: None
+        """
+        btn: tk.Button = self.__fields[coords[0]][coords[1]]
+        btn["image"] = self.__images[image]
+        # A field can be closed again (undo): the state and the text are always set
+        btn["state"] = tk.DISABLED if image == "field_open" else tk.NORMAL
+
+        if text is not None:
+            # Configure the button to show the number in a centralized position
+            btn["compound"] = tk.CENTER
+            btn["padx"] = 0
+            btn["pady"] = 0
+            btn["text"] = text
+        elif btn["text"]:
+            btn["text"] = ""
+
+    def highlight(self, coords: Tuple[int, int], color: Optional[str]) -> None:
+        """
+        Highlight a field with a color, or remove the highlight if the color is None.
+        """
+        btn: tk.Button = self.__fields[coords[0]][coords[1]]
+
+        btn["bg"] = self.__shades.get(coords, self.__default_bg) if color is None else color
+
+    def shade(self, colors: Dict[Tuple[int, int], str]) -> None:
+        """
+        Replace the background colors of the shaded fields (e.g. a heat map); an empty dict removes them all.
+        Only the buttons whose color changes are configured.
+        """
+        for coords in self.__shades:
+            if coords not in colors:
+                self.__fields[coords[0]][coords[1]]["bg"] = self.__default_bg
+
+        for coords, color in colors.items():
+            if self.__shades.get(coords) != color:
+                self.__fields[coords[0]][coords[1]]["bg"] = color
+
+        self.__shades = dict(colors)
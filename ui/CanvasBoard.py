@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+import tkinter as tk
+
+from typing import Tuple, Dict, Optional
+
+from ui.ButtonBoard import ClickHandler, FIELD_SIZE
+
+VIEWPORT = (800, 600)  # maximum size of the visible area, in pixels
+
+
+class CanvasBoard(tk.Frame):
+    """
+    Board drawn in a single scrollable tk.Canvas, for the large boards.
+
+    All the fields share the same PhotoImage tiles and the clicks are mapped to the fields by arithmetic. Only the
+    fields in the visible area have canvas items; the look of the other fields is kept in a dict (only for the
+    fields that are not hidden) and they are drawn when they are scrolled into view. The shades (e.g. a heat map)
+    are stippled rectangles over the fields, also created only for the visible fields.
+    """
+    __dimensions: Tuple[int, int] = None
+    __images: Dict[str, tk.PhotoImage] = None
+    __on_click: ClickHandler = None
+
+    __canvas: tk.Canvas = None
+    __looks: Dict[Tuple[int, int], Tuple[str, Optional[int]]] = None  # fields that are not hidden
+    __items: Dict[Tuple[int, int], Tuple[int, Optional[int]]] = None  # canvas items (image, text) of the visible fields
+    __visible: Tuple[int, int, int, int] = (0, 0, 0, 0)  # first row, last row, first col, last col (exclusive)
+    __highlight: Tuple[Tuple[int, int], int] = None  # highlighted field and its rectangle item
+    __shades: Dict[Tuple[int, int], str] = None  # color of the shaded fields
+    __shade_items: Dict[Tuple[int, int], int] = None  # rectangle items of the visible shaded fields
+
+    def __init__(self, master, dimensions: Tuple[int, int], images: Dict[str, tk.PhotoImage], on_click: ClickHandler):
+        super(CanvasBoard, self).__init__(master)
+        self.__dimensions = dimensions
+        self.__images = images
+        self.__on_click = on_click
+        self.__looks = dict()
+        self.__items = dict()
+        self.__shades = dict()
+        self.__shade_items = dict()
+
+        width = dimensions[1] * FIELD_SIZE
+        height = dimensions[0] * FIELD_SIZE
+
+        self.__canvas = tk.Canvas(self, width=min(width, VIEWPORT[0]), height=min(height, VIEWPORT[1]),
+                                  scrollregion=(0, 0, width, height), highlightthickness=0)
+        x_scroll = tk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.__xview)
+        y_scroll = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.__yview)
+        self.__canvas.configure(xscrollcommand=x_scroll.set, yscrollcommand=y_scroll.set)
+
+        self.__canvas.grid(row=0, column=0)
+        y_scroll.grid(row=0, column=1, sticky=tk.NS)
+        x_scroll.grid(row=1, column=0, sticky=tk.EW)
+
+        self.__canvas.bind("<Button-1>", lambda event: self.__click("left", event))
+        self.__canvas.bind("<Button-3>", lambda event: self.__click("right", event))
+        self.__canvas.bind("<Button-2>", lambda event: self.__click("middle", event))
+        self.__canvas.bind("<MouseWheel>", self.__wheel)
+        self.__canvas.bind("<Button-4>", lambda event: self.__yview("scroll", -1, "units"))
+        self.__canvas.bind("<Button-5>", lambda event: self.__yview("scroll", 1, "units"))
+        self.__canvas.bind("<Configure>", lambda event: self.__update_viewport())
+
+    def __xview(self, *args):
+        self.__canvas.xview(*args)
+        self.__update_viewport()
+
+    def __yview(self, *args):
+        self.__canvas.yview(*args)
+        self.__update_viewport()
+
+    def __wheel(self, event):
+        self.__yview("scroll", -1 if event.delta > 0 else 1, "units")
+
+    def __click(self, button: str, event):
+        row = int(self.__canvas.canvasy(event.y)) // FIELD_SIZE
+        col = int(self.__canvas.canvasx(event.x)) // FIELD_SIZE
+
+        if 0 <= row < self.__dimensions[0] and 0 <= col < self.__dimensions[1]:
+            self.__on_click(button, (row, col))
+
+    def __update_viewport(self):
+        """
+        Create the items of the fields that became visible and delete the items of the fields that are not visible
+        anymore.
+        """
+        canvas = self.__canvas
+        left = int(canvas.canvasx(0))
+        top = int(canvas.canvasy(0))
+
+        visible = (max(0, top // FIELD_SIZE),
+                   min(self.__dimensions[0], (top + canvas.winfo_height()) // FIELD_SIZE + 1),
+                   max(0, left // FIELD_SIZE),
+                   min(self.__dimensions[1], (left + canvas.winfo_width()) // FIELD_SIZE + 1))
+
+        if visible == self.__visible:
+            return
+
+        first_row, last_row, first_col, last_col = visible
+
+        for coords in [c for c in self.__items
+                       if not (first_row <= c[0] < last_row and first_col <= c[1] < last_col)]:
+            for item in self.__items.pop(coords):
+                if item is not None:
+                    canvas.delete(item)
+            if coords in self.__shade_items:
+                canvas.delete(self.__shade_items.pop(coords))
+
+        for row in range(first_row, last_row):
+            for col in range(first_col, last_col):
+                if (row, col) not in self.__items:
+                    self.__draw((row, col))
+
+        self.__visible = visible
+
+        if self.__highlight is not None:
+            canvas.tag_raise(self.__highlight[1])
+
+    def __draw(self, coords: Tuple[int, int]):
+        image, text = self.__looks.get(coords, ("field", None))
+        x = coords[1] * FIELD_SIZE
+        y = coords[0] * FIELD_SIZE
+
+        image_item = self.__canvas.create_image(x, y, image=self.__images[image], anchor=tk.NW)
+        text_item = None
+        if text is not None:
+            text_item = self.__canvas.create_text(x + FIELD_SIZE // 2, y + FIELD_SIZE // 2, text=str(text))
+
+        self.__items[coords] = (image_item, text_item)
+
+        if coords in self.__shades:
+            self.__draw_shade(coords)
+
+    def __draw_shade(self, coords: Tuple[int, int]):
+        x = coords[1] * FIELD_SIZE
+        y = coords[0] * FIELD_SIZE
+        self.__shade_items[coords] = self.__canvas.create_rectangle(x, y, x + FIELD_SIZE, y + FIELD_SIZE,
+                                                                    fill=self.__shades[coords], outline="",
+                                                                    stipple="gray50")
+
+    def paint(self, coords: Tuple[int, int], image: str, text: Optional[int] = None) -> None:
+        """
+        Change the look of a field. Only the items of the field are changed, and only if it is visible.
+
+        :param coords: the (row, col) of the field.
+        :param image: the name of the image in UIProperties.images.
+        :param text: the number shown over the image.
+        :return: None
+        """
+        if self.__looks.get(coords, ("field", None)) == (image, text):
+            return
+
+        self.__looks[coords] = (image, text)
+        items = self.__items.get(coords)
+
+        if items is not None:
+            image_item, text_item = items
+            self.__canvas.itemconfigure(image_item, image=self.__images[image])
+
+            if text_item is not None:
+                self.__canvas.delete(text_item)
+            if text is not None:
+                text_item = self.__canvas.create_text(coords[1] * FIELD_SIZE + FIELD_SIZE // 2,
+                                                      coords[0] * FIELD_SIZE + FIELD_SIZE // 2, text=str(text))
+            else:
+                text_item = None
+
+            self.__items[coords] = (image_item, text_item)
+
+    def highlight(self, coords: Tuple[int, int], color: Optional[str]) -> None:
+        """
+        Highlight a field with a color, or remove the highlight if the color is None.
+        """
+        if self.__highlight is not None:
+            self.__canvas.delete(self.__highlight[1])
+            self.__highlight = None
+
+        if color is not None:
+            x = coords[1] * FIELD_SIZE
+            y = coords[0] * FIELD_SIZE
+            item = self.__canvas.create_rectangle(x + 1, y + 1, x + FIELD_SIZE - 1, y + FIELD_SIZE - 1,
+                                                  outline=color, width=3)
+            self.__highlight = (coords, item)
+
+    def shade(self, colors: Dict[Tuple[int, int], str]) -> None:
+        """
+        Replace the colors of the shaded fields (e.g. a heat map); an empty dict removes them all. Only the items of
+        the visible fields whose color changes are replaced.
+        """
+        previous = self.__shades
+        self.__shades = dict(colors)
+
+        for coords in [c for c in self.__shade_items if previous[c] != colors.get(c)]:
+            self.__canvas.delete(self.__shade_items.pop(coords))
+
+        for coords in colors:
+            if coords in self.__items and coords not in self.__shade_items:
+                self.__draw_shade(coords)
+
+        if self.__highlight is not None:
+            self.__canvas.tag_raise(self.__highlight[1])
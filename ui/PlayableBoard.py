@@ -3,56 +3,112 @@
 import tkinter as tk
 import tkinter.messagebox as messagebox
 
-from typing import Tuple, Optional, List
+from typing import Tuple, Optional, List, Dict
 
-from time import time, sleep
-from threading import Thread
-from ui.utils import Threading
+from time import time
+from ui.utils.Scheduler import Scheduler, LiveLabel
+from ui.ButtonBoard import ButtonBoard
+from ui.CanvasBoard import CanvasBoard
 from core.Time import Time
 
 from core.Engine import MinesweeperBoard, Game
+from core.State import GameState, REVEAL, FLAG, CHORD
+from core.History import History, ReplayRecorder
+from core.Probability import ProbabilityEngine
+from core.Results import ResultStore, Result, format_leaderboard
+from core import Metrics
+
+
+class Images(dict):
+    """
+    Images decoded on the first use: the PNG files are only read when a field needs them.
+    """
+    files: Dict[str, str] = None
+
+    def __init__(self):
+        super(Images, self).__init__()
+        self.files = dict()
+
+    def __missing__(self, name: str) -> tk.PhotoImage:
+        image = self[name] = tk.PhotoImage(file=self.files[name])
+        return image
+
+
+def heat_color(probability: float) -> str:
+    """
+    :return: the color of a probability of a mine in the heat map, from green (safe) to yellow to red (mine)
+    """
+    red = int(min(1.0, 2 * probability) * 255)
+    green = int(min(1.0, 2 * (1 - probability)) * 255)
+    return "#{:02x}{:02x}00".format(red, green)
 
 
 class UIProperties(object):
     charset: dict = None
     paths: dict = None
-    images: dict = None
+    images: Images = None
 
     def __init__(self):
         # TODO: LOAD PROPERTIES FROM FILE
         self.paths = {"icons": "ui/icons/png/"}
-        self.images = dict()
+        self.images = Images()
 
     def load_images(self):
-        self.images["bomb"] = tk.PhotoImage(file=self.paths["icons"] + 'bomb_32.png')
-        self.images["red_flag"] = tk.PhotoImage(file=self.paths["icons"] + 'red_flag_32.png')
-        self.images["white_flag"] = tk.PhotoImage(file=self.paths["icons"] + 'white_flag_32.png')
-        self.images["explosion"] = tk.PhotoImage(file=self.paths["icons"] + 'explosion_32.png')
-        self.images["field"] = tk.PhotoImage(file=self.paths["icons"] + 'bg/field.png')
-        self.images["field_open"] = tk.PhotoImage(file=self.paths["icons"] + 'bg/field_open.png')
+        self.images.files["bomb"] = self.paths["icons"] + 'bomb_32.png'
+        self.images.files["red_flag"] = self.paths["icons"] + 'red_flag_32.png'
+        self.images.files["white_flag"] = self.paths["icons"] + 'white_flag_32.png'
+        self.images.files["explosion"] = self.paths["icons"] + 'explosion_32.png'
+        self.images.files["field"] = self.paths["icons"] + 'bg/field.png'
+        self.images.files["field_open"] = self.paths["icons"] + 'bg/field_open.png'
 
 
 class PlayableBoard(tk.Frame):
     """
     UI Implementation of the minesweeper game.
+
+    The fields are drawn by a ButtonBoard (one button per field) or, for boards with more than button_limit fields,
+    by a CanvasBoard (one scrollable canvas).
     """
+    button_limit = 1024
+
     board: MinesweeperBoard = None
     properties: UIProperties = None
     game_info: Game = None
-
-    __threads: List[Thread] = list()  # list of threads
-    __fields = list()  # List of the fields and his associated buttons
-
-    def __init__(self, properties: UIProperties, info: Game, board: MinesweeperBoard, master=None):
+    state: GameState = None
+    history: History = None
+    recorder: ReplayRecorder = None  # the moves of the player with their time, to verify the score
+    probabilities: ProbabilityEngine = None
+    results: ResultStore = None  # the results are not kept if None
+
+    scheduler: Scheduler = None
+
+    __hint: Tuple[int, int] = None  # highlighted field of the hint
+    __heat_map: bool = False  # the fields are shaded with the probability of a mine
+    __fields = None  # ButtonBoard or CanvasBoard with the fields
+    __time_label: LiveLabel = None
+    __bombs_label: LiveLabel = None
+
+    def __init__(self, properties: UIProperties, info: Game, board: MinesweeperBoard, master=None,
+                 results: ResultStore = None):
         super(PlayableBoard, self).__init__(master)
         self.master = master
         self.game_info = info
         self.properties = properties
         self.board = board
+        self.results = results
+        self.state = GameState(board)
+        self.history = History(self.state)
+        self.recorder = ReplayRecorder(self.history, info.time)
+        self.probabilities = ProbabilityEngine(self.state)
+        self.scheduler = Scheduler(self)
         self.grid()
         self.__configure()
         self.__build_window()
 
+        if self.results is not None:
+            # Read the leaderboard of the settings now, so at the end of the game it comes from memory
+            self.results.leaderboard(self.board.dimensions, self.board.bomb_percent)
+
     def __configure(self):
         self.master.resizable(False, False)
         self.properties.load_images()
@@ -62,36 +118,17 @@ class PlayableBoard(tk.Frame):
         self.tk.call('wm', 'iconphoto', self.master._w,
                      self.properties.images["bomb"])  # Define the menubar icon of the application
 
-    @Threading.thread
-    def __show_time(self, parent: tk.Frame, interval):
-        while True:
-            sleep(interval)
-
-            t = Time.calculate_time(self.game_info.time.start_time, time())
-
-            if not self.game_info.exit and self.game_info.win is None:
-                tk.Label(parent, text=Time.format_time(t)) \
-                    .grid(row=0, column=1)
-            else:
-                return
-
-    @Threading.thread
-    def __update_game_info(self, parent: tk.Frame):
-        qtd = self.game_info.c_marked_fields - 1
+    def __show_time(self) -> bool:
+        if self.game_info.exit or self.game_info.win is not None:
+            return False  # stop the job
 
-        while True:
-            sleep(0.25)
+        self.__time_label.set(Time.format_time(Time.calculate_time(self.game_info.time.start_time, time())))
+        return True
 
-            if not self.game_info.exit:
-                if qtd != self.game_info.c_marked_fields or qtd == -1:
-                    qtd = self.game_info.c_marked_fields
-
-                    tk.Label(parent, text="{}: {}/{}".format(self.game_info.settings.language.general["BOMBS"],
-                                                             qtd,
-                                                             self.board.total_bombs)) \
-                        .grid(row=0, column=2)
-            else:
-                return
+    def __update_game_info(self):
+        self.__bombs_label.set("{}: {}/{}".format(self.game_info.settings.language.general["BOMBS"],
+                                                  self.state.flags,
+                                                  self.board.total_bombs))
 
     def __build_window(self):
         """
@@ -102,15 +139,27 @@ class PlayableBoard(tk.Frame):
         menu_frame = tk.Frame(self.master)
         menu_frame.grid(row=0)
 
-        # TODO: build menu interface
+        tk.Button(menu_frame, text=self.game_info.settings.language.general["HINT"],
+                  command=self.__show_hint).grid(row=0, column=0)
+        tk.Button(menu_frame, text=self.game_info.settings.language.general["HEAT_MAP"],
+                  command=self.__toggle_heat_map).grid(row=0, column=1)
+        tk.Button(menu_frame, text=self.game_info.settings.language.general["UNDO"],
+                  command=self.__undo).grid(row=0, column=2)
+        tk.Button(menu_frame, text=self.game_info.settings.language.general["REDO"],
+                  command=self.__redo).grid(row=0, column=3)
+        self.master.bind("<Control-z>", lambda event: self.__undo())
+        self.master.bind("<Control-y>", lambda event: self.__redo())
 
         # Frame that contain the specify values of the current game
         top_frame = tk.Frame(self.master)
         top_frame.grid(row=1)
 
         tk.Label(top_frame, text="{}: ".format(self.game_info.settings.language.general["TIME"])).grid(row=0, column=0)
-        self.__threads.append(self.__show_time(top_frame, 0.5))
-        self.__threads.append(self.__update_game_info(top_frame))
+        self.__time_label = LiveLabel(top_frame)
+        self.__time_label.grid(row=0, column=1)
+        self.__bombs_label = LiveLabel(top_frame)
+        self.__bombs_label.grid(row=0, column=2)
+        self.__update_game_info()
 
         # Frame that contains the table of the game
         game_frame = tk.Frame(self.master)
@@ -118,133 +167,204 @@ class PlayableBoard(tk.Frame):
 
         self.__create_tk_board(game_frame)
         self.game_info.time.start_time = time()
+        self.__show_time()
+        self.scheduler.every("time", 250, self.__show_time)
 
     def __create_tk_board(self, parent: Optional[tk.Frame]):
-        rows = self.board.dimensions[0]
-        cols = self.board.dimensions[1]
-
-        for row in range(rows):
-            r = list()
-
-            for col in range(cols):
-                btn = tk.Button(parent,
-                                image=self.properties.images["field"],
-                                width=32, height=32)
-
-                # Bind mouse events to the button
-                # https://stackoverflow.com/questions/3296893/how-to-pass-an-argument-to-event-handler-in-tkinter
-                btn.bind("<Button-1>", lambda event, arg=(row, col): self.__left_click(event, arg))
-                btn.bind("<Button-3>", lambda event, arg=(row, col): self.__right_click(event, arg))
+        rows, cols = self.board.dimensions
+        renderer = ButtonBoard if rows * cols <= self.button_limit else CanvasBoard
 
-                btn.grid(row=row, column=col)
-                r.append(btn)
+        self.__fields = renderer(parent, self.board.dimensions, self.properties.images, self.__click)
+        self.__fields.grid(row=0, column=0)
 
-            self.__fields.append(r)
+    def __click(self, button: str, coords: Tuple[int, int]):
+        if button == "left":
+            self.__left_click(None, coords)
+        elif button == "right":
+            self.__right_click(None, coords)
+        else:
+            self.__middle_click(None, coords)
 
+    @Metrics.timed("ui.right_click")
     def __right_click(self, event, coords: Tuple[int, int]):
-        btn: tk.Button = self.__fields[coords[0]][coords[1]]
-
-        if event is None or btn["text"] == str():
-            if btn["image"] == str(self.properties.images["field"]):
-                # Mark a position with a flag
-                btn["image"] = self.properties.images["white_flag"]
-                self.game_info.marked_fields.append(coords)
-            elif btn["image"] == str(self.properties.images["white_flag"]):
-                # Unmark that position
-                btn["image"] = self.properties.images["field"]
-                self.game_info.marked_fields.remove(coords)
-
-            self.game_info.c_marked_fields += 1
+        if not self.state.is_revealed(coords):
+            self.__clear_hint()
+            # Mark or unmark the position with a flag
+            self.recorder.apply((FLAG, coords))
+            self.__fields.paint(coords, "white_flag" if self.state.is_flagged(coords) else "field")
+            Metrics.count("ui.paint")
+            self.__update_game_info()
             self.__is_win()
 
+    @Metrics.timed("ui.middle_click")
+    def __middle_click(self, event, coords: Tuple[int, int]):
+        # Open the neighbours of a number with all its bombs flagged
+        self.__open_fields(self.recorder.apply((CHORD, coords)))
+
+    @Metrics.timed("ui.left_click")
     def __left_click(self, event, coords: Tuple[int, int]):
-        btn: tk.Button = self.__fields[coords[0]][coords[1]]
-        value = self.board.board[coords[0]][coords[1]]
+        # Open the field (and all adjacent empty fields) and repaint only the opened fields
+        self.__open_fields(self.recorder.apply((REVEAL, coords)))
 
-        if btn["image"] != str(self.properties.images["white_flag"]):
-            if value == '*':
-                btn["image"] = self.properties.images["explosion"]
-
-                if event is not None:
-                    self.__show_bombs()
-
-                    self.game_info.win = False
-                    self.exit_app()
-            elif value != 0:
-                # Configure the button to show the number in a centralized position
-                btn["compound"] = tk.CENTER
-                btn["padx"] = 0
-                btn["pady"] = 0
-                btn["text"] = value
-            elif value == 0:
-                # Open all adjacent empty fields
-                self.__open_empty_fields(coords)
-            else:
-                raise RuntimeError(self.game_info.settings.language.error["RUNTIME"])
+    @Metrics.timed("ui.open_fields")
+    def __open_fields(self, fields: List[Tuple[int, int]]):
+        if fields:
+            self.__clear_hint()
+            self.probabilities.update(fields)
+
+        for field in fields:
+            self.__paint_field(field)
+        Metrics.count("ui.paint", len(fields))
+
+        if self.state.win is False:
+            self.__show_bombs()
 
+            self.game_info.win = False
+            self.exit_app()
+        else:
             self.__is_win()
 
-    def __show_bombs(self):
+        if fields and self.__heat_map and not self.state.finished:
+            self.__show_heat_map()
+
+    @Metrics.timed("ui.hint")
+    def __show_hint(self):
         """
-        Show all the items on table
+        Highlight a safe field, or the field less likely to have a bomb if there is no safe field.
 
         :return: ---
         """
-        for b in self.board.bombs:
-            self.__left_click(None, b)
+        self.__clear_hint()
+        coords = self.probabilities.best_guess()
 
-            try:
-                self.game_info.marked_fields.remove(b)
-            except ValueError:
-                pass
+        if coords is not None and not self.state.finished:
+            self.__hint = coords
+            self.__fields.highlight(coords, "green")
 
-        # Mark all wrong fields with the red flag
-        for b in self.game_info.marked_fields:
-            btn: tk.Button = self.__fields[b[0]][b[1]]
-            btn["image"] = self.properties.images["red_flag"]
+    def __undo(self):
+        self.__travel(self.recorder.undo())
+
+    def __redo(self):
+        self.__travel(self.recorder.redo())
 
-    def __open_empty_fields(self, coords: Tuple[int, int]):
+    @Metrics.timed("ui.travel")
+    def __travel(self, fields: List[Tuple[int, int]]):
+        """
+        Repaint the fields changed by an undo or a redo (or a jump in the history).
+
+        :param fields: the fields changed.
+        :return: ---
         """
-        Open all empty fields of the table using backtrack technique
+        if not fields:
+            return
+
+        self.__clear_hint()
+        self.probabilities.update(fields)
+
+        for field in fields:
+            if self.state.is_revealed(field):
+                self.__paint_field(field)
+            else:
+                self.__fields.paint(field, "white_flag" if self.state.is_flagged(field) else "field")
+        Metrics.count("ui.paint", len(fields))
+
+        self.__update_game_info()
+
+        if self.__heat_map and not self.state.finished:
+            self.__show_heat_map()
+
+        self.__is_win()
+
+    def __toggle_heat_map(self):
+        self.__clear_hint()
+        self.__heat_map = not self.__heat_map
+
+        if self.__heat_map and not self.state.finished:
+            self.__show_heat_map()
+        else:
+            self.__fields.shade(dict())
+
+    @Metrics.timed("ui.heat_map")
+    def __show_heat_map(self):
+        """
+        Shade every unopened field with the probability of a mine (see core.Probability).
+
+        :return: ---
+        """
+        self.__fields.shade({coords: heat_color(probability)
+                             for coords, probability in self.probabilities.solve().heat_map().items()})
+
+    def __clear_hint(self):
+        if self.__hint is not None:
+            self.__fields.highlight(self.__hint, None)
+            self.__hint = None
+
+    def __paint_field(self, coords: Tuple[int, int]):
+        """
+        Show an opened field
 
         :param coords: Tuple[int, int]
         :return: ---
         """
-        # TODO: OPEN CORNERS!!!!
-        btn: tk.Button = self.__fields[coords[0]][coords[1]]
         value = self.board.board[coords[0]][coords[1]]
 
-        if btn["state"] != tk.DISABLED:
-            if value == 0:
-                btn["state"] = tk.DISABLED
-                btn["image"] = self.properties.images["field_open"]
-
-                if coords[0] > 0:
-                    self.__open_empty_fields((coords[0] - 1, coords[1]))
+        if value == '*':
+            self.__fields.paint(coords, "explosion")
+        elif value == 0:
+            self.__fields.paint(coords, "field_open")
+        else:
+            self.__fields.paint(coords, "field", value)
 
-                if coords[1] < self.board.dimensions[1] - 1:
-                    self.__open_empty_fields((coords[0], coords[1] + 1))
+    def __show_bombs(self):
+        """
+        Show all the items on table
 
-                if coords[0] < self.board.dimensions[0] - 1:
-                    self.__open_empty_fields((coords[0] + 1, coords[1]))
+        :return: ---
+        """
+        for b in self.board.bombs:
+            if not self.state.is_flagged(b):
+                self.__paint_field(b)
 
-                if coords[1] > 0:
-                    self.__open_empty_fields((coords[0], coords[1] - 1))
-            else:
-                self.__left_click(None, (coords[0], coords[1]))
+        # Mark all wrong fields with the red flag
+        for b in self.state.flagged_fields():
+            if self.board.board[b[0]][b[1]] != '*':
+                self.__fields.paint(b, "red_flag")
 
+    @Metrics.timed("ui.win_check")
     def __is_win(self):
         """
         Verify if the the player win the game. If yes, the game is finished.
-        To win the game, the player must mark all the fields bomb correctly;
+        To win the game, the player must mark all the fields bomb correctly or open all the safe fields;
+        the state keeps the counters of each move, so this check is O(1).
         :return:
         """
-        self.game_info.marked_fields.sort()  # sort the player marked fields
-
-        if self.game_info.marked_fields == self.board.bombs:  # compare the marked fields with the solving set
+        if self.state.win is True:
             self.game_info.win = True
             self.exit_app()
 
+    def __record_result(self):
+        """
+        Queue the result of the finished game in the result store (written by its thread, the UI does not wait).
+
+        :return: ---
+        """
+        if self.results is not None:
+            self.results.record(Result(self.game_info.player, self.board.dimensions, self.board.bomb_percent,
+                                       self.game_info.win,
+                                       self.game_info.time.end_time - self.game_info.time.start_time,
+                                       self.history.position))
+
+    def __format_leaderboard(self) -> str:
+        """
+        :return: the best times of the settings of the game, to show after the win message
+        """
+        if self.results is None:
+            return ""
+
+        lines = format_leaderboard(self.results.leaderboard(self.board.dimensions, self.board.bomb_percent))
+
+        return "\n\n{}:\n{}".format(self.game_info.settings.language.end_game["LEADERBOARD"], "\n".join(lines))
+
     def exit_app(self):
         """
         Exit and close the game. This method can be called in various situations:
@@ -263,19 +383,21 @@ class PlayableBoard(tk.Frame):
             self.game_info.time.all_time = Time.calculate_time(
                 self.game_info.time.start_time,
                 self.game_info.time.end_time)
+            self.__record_result()
 
             messagebox.showinfo(self.game_info.settings.language.end_game["TITLE"],
                                 self.game_info.settings.language.end_game["WIN_MESSAGE"].format(
                 self.game_info.player,
-                Time.format_time(self.game_info.time.all_time)))
+                Time.format_time(self.game_info.time.all_time)) + self.__format_leaderboard())
             self.game_info.exit = True
         elif self.game_info.win is False:
+            self.game_info.time.end_time = time()
+            self.__record_result()
+
             messagebox.showerror(self.game_info.settings.language.end_game["TITLE"],
                                  self.game_info.settings.language.end_game["LOSE_MESSAGE"])
             self.game_info.exit = True
 
-        if self.game_info.exit is True:  # terminate all threads correctly
-            for thread in self.__threads:
-                thread.join()
-
-        self.quit()
+        if self.game_info.exit is True:  # cancel all the scheduled jobs, there are no threads to join
+            self.scheduler.stop()
+            self.quit()
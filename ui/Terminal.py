@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Terminal (curses) implementation of the minesweeper game, to play without Tk (e.g. over SSH).
+
+Keys: arrows or hjkl move the cursor, space or enter open a field, f flags, c chords, u undoes, r redoes and q quits.
+"""
+
+from typing import Tuple, List
+from time import time
+import argparse
+import curses
+
+from core.Engine import MinesweeperBoard, Game
+from core.State import GameState, BOMB, REVEAL, FLAG, CHORD
+from core.History import History, ReplayRecorder
+from core.Archive import TimedMove
+from core.Time import Time
+
+CELL_WIDTH = 2  # columns of the terminal used by each field
+HEADER = 1  # lines of the terminal above the board
+
+KEYS = {
+    curses.KEY_UP: (-1, 0), ord("k"): (-1, 0),
+    curses.KEY_DOWN: (1, 0), ord("j"): (1, 0),
+    curses.KEY_LEFT: (0, -1), ord("h"): (0, -1),
+    curses.KEY_RIGHT: (0, 1), ord("l"): (0, 1)
+}
+
+
+class TerminalBoard(object):
+    """
+    Draw the board in a curses window. The whole visible area is only drawn when it scrolls (one string per row);
+    after a move only the changed fields are written.
+    """
+    board: MinesweeperBoard = None
+    game_info: Game = None
+    state: GameState = None
+    history: History = None
+    recorder: ReplayRecorder = None  # the moves of the player with their time, to verify the score
+
+    __screen = None
+    __cursor: Tuple[int, int] = (0, 0)
+    __origin: Tuple[int, int] = (0, 0)  # the field at the top left corner of the screen
+
+    def __init__(self, screen, board: MinesweeperBoard, info: Game):
+        self.__screen = screen
+        self.board = board
+        self.game_info = info
+        self.state = GameState(board)
+        self.history = History(self.state)
+        self.recorder = ReplayRecorder(self.history, info.time)
+
+    def __viewport(self) -> Tuple[int, int]:
+        """
+        :return: the quantity of rows and columns of the board that fit in the screen
+        """
+        height, width = self.__screen.getmaxyx()
+        return max(1, height - HEADER - 1), max(1, (width - 1) // CELL_WIDTH)
+
+    def __char(self, coords: Tuple[int, int]) -> str:
+        if self.state.is_flagged(coords):
+            return "F"
+
+        value = self.state.value(coords)
+
+        if value is None:
+            return "#"
+        elif value == BOMB:
+            return "*"
+        elif value == 0:
+            return "."
+
+        return str(value)
+
+    def __draw_all(self):
+        rows, cols = self.__viewport()
+        first_row, first_col = self.__origin
+        last_col = min(self.board.dimensions[1], first_col + cols)
+
+        self.__screen.erase()
+
+        for row in range(first_row, min(self.board.dimensions[0], first_row + rows)):
+            line = "".join(self.__char((row, col)).ljust(CELL_WIDTH) for col in range(first_col, last_col))
+            self.__screen.addstr(HEADER + row - first_row, 0, line)
+
+        self.__draw_status()
+
+    def __draw_field(self, coords: Tuple[int, int], char: str = None):
+        rows, cols = self.__viewport()
+        row = coords[0] - self.__origin[0]
+        col = coords[1] - self.__origin[1]
+
+        if 0 <= row < rows and 0 <= col < cols:
+            self.__screen.addstr(HEADER + row, col * CELL_WIDTH, self.__char(coords) if char is None else char)
+
+    def __draw_status(self):
+        language = self.game_info.settings.language
+        t = Time.calculate_time(self.game_info.time.start_time, time())
+        status = "{}: {}  {}: {}/{}".format(language.general["TIME"], Time.format_time(t),
+                                          language.general["BOMBS"], self.state.flags, self.board.total_bombs)
+
+        self.__screen.move(0, 0)
+        self.__screen.clrtoeol()
+        self.__screen.addstr(0, 0, status[:self.__screen.getmaxyx()[1] - 1])
+
+    def __move_cursor(self, delta: Tuple[int, int]):
+        rows, cols = self.__viewport()
+        row = min(max(0, self.__cursor[0] + delta[0]), self.board.dimensions[0] - 1)
+        col = min(max(0, self.__cursor[1] + delta[1]), self.board.dimensions[1] - 1)
+        self.__cursor = (row, col)
+
+        # Scroll when the cursor leaves the visible area
+        origin_row = min(max(self.__origin[0], row - rows + 1), row)
+        origin_col = min(max(self.__origin[1], col - cols + 1), col)
+
+        if (origin_row, origin_col) != self.__origin:
+            self.__origin = (origin_row, origin_col)
+            self.__draw_all()
+
+    def __show_bombs(self):
+        for b in self.board.bombs:
+            if not self.state.is_flagged(b):
+                self.__draw_field(b, "*")
+
+    def run(self) -> bool:
+        """
+        Play the game until the end or until the player quits.
+
+        :return: True if the player won, False if lost and None if quit
+        """
+        curses.curs_set(1)
+        self.__screen.timeout(500)  # refresh the time twice a second
+        self.game_info.time.start_time = time()
+        self.__draw_all()
+
+        while self.state.win is None:
+            self.__draw_status()
+            self.__screen.move(HEADER + self.__cursor[0] - self.__origin[0],
+                               (self.__cursor[1] - self.__origin[1]) * CELL_WIDTH)
+            key = self.__screen.getch()
+
+            changed: List[Tuple[int, int]] = list()
+
+            if key in KEYS:
+                self.__move_cursor(KEYS[key])
+            elif key in (ord(" "), ord("\n"), curses.KEY_ENTER):
+                changed = self.recorder.apply((REVEAL, self.__cursor))
+            elif key == ord("f"):
+                changed = self.recorder.apply((FLAG, self.__cursor))
+            elif key == ord("c"):
+                changed = self.recorder.apply((CHORD, self.__cursor))
+            elif key == ord("u"):
+                changed = self.recorder.undo()
+            elif key == ord("r"):
+                changed = self.recorder.redo()
+            elif key == ord("q"):
+                return None
+            elif key == curses.KEY_RESIZE:
+                self.__move_cursor((0, 0))
+                self.__draw_all()
+
+            for coords in changed:
+                self.__draw_field(coords)
+
+        self.game_info.win = self.state.win
+        self.game_info.time.end_time = time()
+        self.game_info.time.all_time = Time.calculate_time(self.game_info.time.start_time,
+                                                           self.game_info.time.end_time)
+
+        if self.state.win is False:
+            self.__show_bombs()
+
+        self.__draw_status()
+        self.__screen.timeout(-1)
+        self.__screen.getch()
+
+        return self.state.win
+
+
+def main(argv: List[str] = None):
+    from getpass import getuser
+    from core.Simulator import parse_dimensions
+    from core.Config import GameSettings, DATA_DIR
+    from core.Results import ResultStore, Result, FILE_NAME, format_leaderboard
+    from core.Verifier import submit
+    import os
+
+    parser = argparse.ArgumentParser(prog="minesweeper.py terminal", description="Play in the terminal")
+    parser.add_argument("-d", "--dimensions", type=parse_dimensions, default=(10, 10), help="ROWSxCOLS")
+    parser.add_argument("-b", "--bomb-percent", type=float, default=25)
+    args = parser.parse_args(argv)
+
+    board = MinesweeperBoard(dimensions=args.dimensions, bomb_percent=args.bomb_percent)
+    board.generate_board()
+
+    settings = GameSettings()
+    info = Game(getuser(), settings)
+    results = ResultStore(os.path.join(DATA_DIR, FILE_NAME))
+    results.start()
+
+    def play(screen) -> Tuple[bool, int, List[TimedMove]]:
+        terminal = TerminalBoard(screen, board, info)
+        return terminal.run(), terminal.history.position, terminal.recorder.replay
+
+    # The store is stopped even if the game fails, so the recorded results are written
+    try:
+        win, moves, replay = curses.wrapper(play)
+
+        seconds = info.time.end_time - info.time.start_time
+
+        if win is not None:
+            results.record(Result(info.player, board.dimensions, board.bomb_percent, win, seconds, moves))
+
+        if win is True:
+            # The board and the replay of the win are kept with the time of the result, so the score can be verified
+            submit(DATA_DIR, board, replay, seconds, info.player)
+            print(settings.language.end_game["WIN_MESSAGE"].format(info.player,
+                                                                   Time.format_time(info.time.all_time)))
+            print("{}:".format(settings.language.end_game["LEADERBOARD"]))
+
+            for line in format_leaderboard(results.leaderboard(board.dimensions, board.bomb_percent)):
+                print(line)
+        elif win is False:
+            print(settings.language.end_game["LOSE_MESSAGE"])
+    finally:
+        results.stop()
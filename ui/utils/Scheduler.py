@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import tkinter as tk
+
+from typing import Callable, Dict
+
+
+class Scheduler(object):
+    """
+    Run periodic jobs in the Tk event loop with after(), so the widgets are only touched by the main thread and
+    stopping the jobs does not need to join any thread.
+    """
+    __widget: tk.Misc = None
+    __jobs: Dict[str, str] = None  # name of the job -> id of its next after() call
+
+    def __init__(self, widget: tk.Misc):
+        self.__widget = widget
+        self.__jobs = dict()
+
+    def every(self, name: str, interval: int, callback: Callable[[], bool]) -> None:
+        """
+        Call a function every `interval` milliseconds, until it returns False or the job is cancelled.
+
+        :param name: the name of the job. A job with the same name is replaced.
+        :param interval: the interval in milliseconds.
+        :param callback: the function to be called.
+        :return: None
+        """
+        self.cancel(name)
+
+        def run():
+            if callback() is False:
+                self.__jobs.pop(name, None)
+            else:
+                self.__jobs[name] = self.__widget.after(interval, run)
+
+        self.__jobs[name] = self.__widget.after(interval, run)
+
+    def cancel(self, name: str) -> None:
+        job = self.__jobs.pop(name, None)
+
+        if job is not None:
+            self.__widget.after_cancel(job)
+
+    def stop(self) -> None:
+        """
+        Cancel all the jobs.
+        """
+        for name in list(self.__jobs):
+            self.cancel(name)
+
+
+class LiveLabel(tk.Label):
+    """
+    Label that is only reconfigured when its text changes.
+    """
+    __text: str = None
+
+    def set(self, text: str) -> None:
+        if text != self.__text:
+            self.__text = text
+            self["text"] = text